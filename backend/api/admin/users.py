@@ -1,6 +1,7 @@
 """Health check routes are used by the production system to monitor whether the system is live and running."""
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from ...services import UserService, UserPermissionError
 from ...models import User, Paginated, PaginationParams
 from ..authentication import registered_user
@@ -22,11 +23,14 @@ def list_users(
     page: int = 0,
     page_size: int = 10,
     order_by: str = "first_name",
-    filter: str = ""
+    filter: str = "",
+    cursor: str = ""
 ) -> Paginated[User]:
     try:
         pagination_params = PaginationParams(
-            page=page, page_size=page_size, order_by=order_by, filter=filter)
-        return user_service.list(subject, pagination_params)
+            page=page, page_size=page_size, order_by=order_by, filter=filter, cursor=cursor)
+        return ORJSONResponse(user_service.list_rows(subject, pagination_params))
     except UserPermissionError as e:
         raise HTTPException(status_code=403, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
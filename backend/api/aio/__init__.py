@@ -0,0 +1,7 @@
+"""Async API routes for the most frequently read resources.
+
+When `POSTGRES_ASYNC` is enabled, `main` includes these routers ahead of their synchronous counterparts.
+Requests matching these routes then await an asyncpg-backed `AsyncSession` on the event loop rather than
+waiting for one of the 40 workers of Starlette's threadpool. All other routes, including writes, fall
+through to the synchronous routers.
+"""
@@ -0,0 +1,44 @@
+"""Async variants of the read routes of `api.equipment`."""
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse
+from ...services.aio import AsyncEquipmentService
+from ...models import Equipment
+from ..equipment import listing_response
+
+api = APIRouter(prefix="/api/equipment")
+
+@api.get("/type/", response_model=list[Equipment] | None, tags=['Equipment'])
+async def filter_type(request: Request, type: str = "", fields: str = "", equipment_svc: AsyncEquipmentService = Depends()):
+    """API route that returns a list of Equipment Models with the exact type given as a query parameter."""
+    try:
+        return listing_response(request, await equipment_svc.cached_filter_type(type, fields))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@api.get("/status/", response_model=list[Equipment] | None, tags=['Equipment'])
+async def filter_status(request: Request, status: int = 0, fields: str = "", equipment_svc: AsyncEquipmentService = Depends()):
+    """API route that returns a list of Equipment Models by status as a query parameter, where 1 is available."""
+    try:
+        return listing_response(request, await equipment_svc.cached_filter_status(status, fields))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@api.get("", response_model=list[Equipment] | None, tags=['Equipment'])
+async def list(request: Request, fields: str = "", equipment_svc: AsyncEquipmentService = Depends()):
+    """API route that returns a list of all Equipment Models."""
+    try:
+        return listing_response(request, await equipment_svc.cached_list(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@api.get("/{equipment_id:int}", response_model=Equipment | None, tags=['Equipment'])
+async def get(equipment_id: int, fields: str = "", equipment_svc: AsyncEquipmentService = Depends()):
+    """API route that returns an Equipment Model by equipment_id as a path parameter, with only the requested
+    fields, or null if none is found."""
+    if not fields:
+        return await equipment_svc.get(equipment_id)
+    try:
+        return ORJSONResponse(await equipment_svc.get_row(equipment_id, fields))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
@@ -0,0 +1,55 @@
+"""Async variants of the read routes of `api.reservation`."""
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
+from ...services import UserPermissionError
+from ...services.aio import AsyncReservationService
+from ...models import Reservation, ReservationListing, User
+from ..authentication import async_registered_subject
+
+api = APIRouter(prefix="/api/reservation")
+
+@api.get("/type/{type}", response_model=list[Reservation], tags=['Reservation'])
+async def filter_type(type: str, fields: str = "", reservation_svc: AsyncReservationService = Depends(), subject: User = Depends(async_registered_subject)):
+    """API route that returns list of reservations by type as a path parameter, with only the requested fields."""
+    try:
+        if not fields:
+            return await reservation_svc.filter_type(type, subject)
+        return ORJSONResponse(await reservation_svc.filter_type_rows(type, subject, fields))
+    except UserPermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@api.get("/user/{user_pid}", response_model=list[Reservation], tags=['Reservation'])
+async def filter_user(user_pid: int, fields: str = "", reservation_svc: AsyncReservationService = Depends()):
+    """API route that returns list of reservations by user pid path parameter, with only the requested fields."""
+    if not fields:
+        return await reservation_svc.filter_user(user_pid)
+    try:
+        return ORJSONResponse(await reservation_svc.filter_user_rows(user_pid, fields))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@api.get("", response_model=list[Reservation] | ReservationListing, tags=['Reservation'])
+async def list(fields: str = "", compact: bool = False, reservation_svc: AsyncReservationService = Depends()):
+    """API route that returns a list of all reservations, with only the requested fields or side-loaded if compact."""
+    try:
+        if compact:
+            if fields:
+                raise ValueError('A compact listing always includes every field')
+            return ORJSONResponse(await reservation_svc.list_compact())
+        return ORJSONResponse(await reservation_svc.list_rows(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@api.get("/{reservation_id:int}", response_model=Reservation | None, tags=['Reservation'])
+async def get(reservation_id: int, fields: str = "", reservation_svc: AsyncReservationService = Depends()):
+    """API route that returns a Reservation Model by reservation_id as a path parameter, with only the requested
+    fields, or null if none is found."""
+    if not fields:
+        return await reservation_svc.get(reservation_id)
+    try:
+        return ORJSONResponse(await reservation_svc.get_row(reservation_id, fields))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
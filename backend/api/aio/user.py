@@ -0,0 +1,13 @@
+"""Async variant of the user search route of `api.user`."""
+
+from fastapi import APIRouter, Depends
+from ...services.aio import AsyncUserService
+from ...models import User
+from ..authentication import async_registered_subject
+
+api = APIRouter(prefix="/api/user")
+
+
+@api.get("", response_model=list[User], tags=['User'])
+async def search(q: str, subject: User = Depends(async_registered_subject), user_svc: AsyncUserService = Depends()):
+    return await user_svc.search(subject, q)
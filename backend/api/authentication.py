@@ -1,5 +1,4 @@
 import jwt
-import requests
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Header, HTTPException, Request, Response, Depends
 from fastapi.exceptions import HTTPException
@@ -8,6 +7,8 @@ from fastapi.security.http import HTTPAuthorizationCredentials
 from fastapi.responses import RedirectResponse
 from ..env import getenv
 from ..services import UserService
+from ..services.aio import AsyncUserService
+from ..services.delegated_auth import DelegatedAuthVerifier, DelegatedAuthError
 from ..models import User
 
 
@@ -21,19 +22,54 @@ api = APIRouter()
 
 HOST = getenv('HOST')
 AUTH_SERVER_HOST = 'csxl.unc.edu'
+AUTH_SERVER_URL = getenv('AUTH_SERVER_URL', f'https://{AUTH_SERVER_HOST}')
 _JWT_SECRET = getenv('JWT_SECRET')
 _JST_ALGORITHM = 'HS256'
 
 
+def _claims(token: str) -> dict:
+    return jwt.decode(token, _JWT_SECRET, algorithms=[_JST_ALGORITHM])
+
+
 def registered_user(
     user_service: UserService = Depends(),
     token: HTTPAuthorizationCredentials | None = Depends(HTTPBearer())
 ) -> User:
     if token:
         try:
-            auth_info = jwt.decode(
-                token.credentials, _JWT_SECRET, algorithms=[_JST_ALGORITHM])
-            user = user_service.get(auth_info['pid'])
+            user = user_service.authenticate(token.credentials, _claims)
+            if user:
+                return user
+        except:
+            ...
+    raise HTTPException(status_code=401, detail='Unauthorized')
+
+
+def registered_subject(
+    user_service: UserService = Depends(),
+    token: HTTPAuthorizationCredentials | None = Depends(HTTPBearer())
+) -> User:
+    """`registered_user` without the user's permissions, for routes that only pass the user on to services.
+
+    Services authorize through `PermissionService`, which doesn't read `User.permissions`."""
+    if token:
+        try:
+            user = user_service.authenticate(token.credentials, _claims, permissions=False)
+            if user:
+                return user
+        except:
+            ...
+    raise HTTPException(status_code=401, detail='Unauthorized')
+
+
+async def async_registered_subject(
+    user_service: AsyncUserService = Depends(),
+    token: HTTPAuthorizationCredentials | None = Depends(HTTPBearer())
+) -> User:
+    """Async variant of `registered_subject` for the routes of `api.aio`."""
+    if token:
+        try:
+            user = await user_service.authenticate(token.credentials, _claims)
             if user:
                 return user
         except:
@@ -55,6 +91,15 @@ def authenticated_pid(
 
 
 
+delegated_auth_verifier = DelegatedAuthVerifier(AUTH_SERVER_URL)
+"""Process-level verifier of delegated login tokens, closed when the application shuts down."""
+
+
+def delegated_auth() -> DelegatedAuthVerifier:
+    """Dependency providing the delegated auth verifier, which tests may override with a stand-in server."""
+    return delegated_auth_verifier
+
+
 @api.get('/verify')
 def auth_verify(token: str, continue_to: str = '/'):
     return jwt.decode(token, _JWT_SECRET, algorithms=[_JST_ALGORITHM], options={'verify_signature': True})
@@ -62,13 +107,14 @@ def auth_verify(token: str, continue_to: str = '/'):
 
 @api.get('/auth', include_in_schema=False)
 @api.get('/auth/as/{uid}/{pid}', include_in_schema=False)
-def bearer_token_bootstrap(
+async def bearer_token_bootstrap(
     request: Request,
     uid: str | None = Header(None),
     pid: int | None = Header(None),
     continue_to: str = '/',
     origin: str | None = None,
     token: str | None = None,
+    verifier: DelegatedAuthVerifier = Depends(delegated_auth),
 ):
     if request.url.path.startswith('/auth/as/'):
         # Authenticate as another user in development using special route.
@@ -90,7 +136,7 @@ def bearer_token_bootstrap(
         if not token:
             return _delegate_to_auth_server(continue_to)
         else:
-            return _verify_delegated_auth_token(continue_to, token)
+            return await _verify_delegated_auth_token(verifier, continue_to, token)
 
 
 def _delegate_to_auth_server(continue_to: str):
@@ -99,15 +145,14 @@ def _delegate_to_auth_server(continue_to: str):
     )
 
 
-def _verify_delegated_auth_token(continue_to: str, token: str):
-    params = {'token': token}
-    response = requests.get(
-        f'https://{AUTH_SERVER_HOST}/verify', params=params)
-    if response.status_code == requests.codes.ok:
+async def _verify_delegated_auth_token(verifier: DelegatedAuthVerifier, continue_to: str, token: str):
+    try:
+        verified = await verifier.verify(token)
+    except DelegatedAuthError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if verified is not None:
         # Generate a token for development app based on verified information
-        body = response.json()
-        uid = body['uid']
-        pid = body['pid']
+        uid, pid = verified
         new_token = _generate_token(uid, pid)
         return _set_client_token(new_token, continue_to)
     else:
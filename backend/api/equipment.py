@@ -10,63 +10,268 @@ Typical usage example from frontend service:
 
 """
 
-from fastapi import APIRouter, Depends
-from ..services import EquipmentService
-from ..models import Equipment, User
-from .authentication import registered_user
+import asyncio
+import anyio
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from ..services import EquipmentService, UserPermissionError
+from ..services import bulk, equipment_events
+from ..services.equipment import MAX_PAGE_SIZE, SerializedListing
+from ..models import Batch, Equipment, User, EquipmentPaginationParams, EquipmentPage, EquipmentImportReport, EquipmentTypeSummary
+from .authentication import registered_subject
 
 api = APIRouter(prefix="/api/equipment")
 
+KEEPALIVE_INTERVAL = 15
+"""Seconds between comments sent on an idle availability stream to keep proxies from closing it."""
+
+
+def listing_response(request: Request, listing: SerializedListing) -> Response:
+    """Respond with a cached listing, or with 304 Not Modified if the client's copy is current.
+
+    `Cache-Control: no-cache` lets browsers keep the listing but revalidate it with `If-None-Match` on
+    every request, so polling clients only download lists that changed."""
+    headers = {"ETag": listing.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if listing.etag in etags or "*" in etags:
+        return Response(status_code=304, headers=headers)
+    return Response(listing.body, media_type="application/json", headers=headers)
+
+
+@api.get("/page", response_model=EquipmentPage, tags=['Equipment'])
+def paginate(
+    type: str = "",
+    status: int | None = None,
+    filter: str = "",
+    order_by: str = "id",
+    page_size: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str = "",
+    fields: str = "",
+    equipment_svc: EquipmentService = Depends()
+):
+    """API route that returns one page of Equipment Models, optionally filtered by type, status and name.
+
+    Args:
+        Optional type, status and name (filter) query parameters, the column to order by, the page size
+        and the `next_cursor` of the previous page
+        Optionally the comma separated fields of each item to include, e.g. `id,status`; all fields by default
+
+    Returns:
+        A page of equipment models with only the requested fields, the total number of matches and the cursor
+        of the next page, or a 422 if a requested field does not exist or the order column or cursor is invalid
+    """
+    try:
+        params = EquipmentPaginationParams(
+            type=type, status=status, filter=filter, order_by=order_by, page_size=page_size, cursor=cursor)
+        if not fields:
+            return equipment_svc.paginate(params)
+        return ORJSONResponse(equipment_svc.paginate_rows(params, fields))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@api.get("/available", response_model=list[Equipment], tags=['Equipment'])
+def available(type: str, start: datetime, end: datetime, fields: str = "", equipment_svc: EquipmentService = Depends()):
+    """API route that returns the Equipment Models of a type that are free for a whole time window.
+
+    Args:
+        The equipment type, and the ISO 8601 start and end of the window as query parameters
+        Optionally the comma separated fields to include, e.g. `id,status`; all fields by default
+
+    Returns:
+        A list of equipment models with only the requested fields and no booking overlapping the window,
+        or a 422 if the window is empty or a requested field does not exist
+    """
+    try:
+        if not fields:
+            return equipment_svc.available(type, start, end)
+        return ORJSONResponse(equipment_svc.available_rows(type, start, end, fields))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@api.get("/summary", response_model=list[EquipmentTypeSummary], tags=['Equipment'])
+def summary(request: Request, equipment_svc: EquipmentService = Depends()):
+    """API route that returns how many equipment of each type are available, out of the total.
+
+    Returns:
+        The available and total counts of every equipment type, ordered by type,
+        or 304 Not Modified if the summary is unchanged since the ETag given in If-None-Match
+    """
+    return listing_response(request, equipment_svc.cached_summary())
+
+async def _availability_events():
+    with equipment_events.broker.subscribe() as queue:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                change = await asyncio.wait_for(queue.get(), KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if change is equipment_events.RESYNC:
+                yield "event: resync\ndata: {}\n\n"
+            else:
+                yield f"event: status\ndata: {change.json()}\n\n"
+
+@api.get("/stream", tags=['Equipment'])
+async def stream():
+    """API route that streams equipment availability changes as Server-Sent Events.
+
+    A `status` event with data `{"id": ..., "status": ...}` is sent each time an equipment is checked out,
+    returned or updated. A `resync` event means changes were made that are not described by status events,
+    or that the client fell behind, and the full list should be reloaded.
+
+    Returns:
+        A text/event-stream that stays open until the client disconnects
+    """
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(_availability_events(), media_type="text/event-stream", headers=headers)
+
+@api.get("/export", tags=['Equipment'])
+def export(format: str = "ndjson", equipment_svc: EquipmentService = Depends()):
+    """API route that streams every Equipment Model as NDJSON or CSV.
+
+    Rows are read from a server-side cursor and written as they arrive, so memory use does not grow
+    with the size of the inventory.
+
+    Args:
+        The format as a query parameter, either ndjson (default) or csv
+
+    Returns:
+        A streamed NDJSON or CSV document of all equipment
+    """
+    try:
+        content = bulk.write(format, equipment_svc.stream(), Equipment.__fields__.keys())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return StreamingResponse(content, media_type=bulk.MEDIA_TYPES[format])
+
+@api.post("/bulk", response_model=EquipmentImportReport, tags=['Equipment'])
+async def bulk_add(request: Request, format: str = "", equipment_svc: EquipmentService = Depends(), subject: User = Depends(registered_subject)):
+    """API route to add many Equipment Entities from an NDJSON or CSV request body.
+
+    The body is parsed while it streams in and inserted in chunked transactions. Rows that fail to parse
+    or violate a constraint are reported by line number; all other rows are inserted.
+
+    Args:
+        The format as a query parameter, ndjson or csv, which defaults to csv for a text/csv content type
+        and to ndjson otherwise
+
+    Returns:
+        The number of inserted rows and the rejected rows, or a 403 Forbidden if the user may not add equipment
+    """
+    if format == "":
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    body = request.stream()
+
+    def chunks():
+        # The service runs on a worker thread; each chunk is awaited on the event loop as it is needed.
+        while True:
+            try:
+                yield anyio.from_thread.run(body.__anext__)
+            except StopAsyncIteration:
+                return
+
+    try:
+        rows = bulk.read(format, chunks())
+        return await run_in_threadpool(equipment_svc.bulk_add, rows, subject)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except UserPermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
+@api.get("/batch", response_model=Batch[Equipment], tags=['Equipment'])
+def get_many(ids: list[int] = Query(default=[]), equipment_svc: EquipmentService = Depends()):
+    """API route that returns the Equipment Models of several ids in one request, e.g. `/batch?ids=1&ids=2`.
+
+    Args:
+        The equipment IDs as repeated query parameters
+
+    Returns:
+        The equipment models found in the order of the ids and the ids not found,
+        or a 422 if more than `MAX_BATCH_SIZE` distinct ids are given
+    """
+    try:
+        return equipment_svc.get_many(ids)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
 @api.get("/{equipment_id}", response_model=Equipment | None, tags=['Equipment'])
-def get(equipment_id: int, equipment_svc: EquipmentService = Depends()):
+def get(equipment_id: int, fields: str = "", equipment_svc: EquipmentService = Depends()):
     """API route that returns an Equipment Model by equipment_id as a path parameter.
 
     Args:
         The equipment ID as a path parameter
+        Optionally the comma separated fields to include, e.g. `id,status`; all fields by default
 
     Returns:
-        The equipment model or null if no equipment id is found
+        The equipment model with only the requested fields or null if no equipment id is found,
+        or a 422 if a requested field does not exist
     """
-    return equipment_svc.get(equipment_id)
+    if not fields:
+        return equipment_svc.get(equipment_id)
+    try:
+        return ORJSONResponse(equipment_svc.get_row(equipment_id, fields))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 @api.get("/type/", response_model=list[Equipment] | None, tags=['Equipment'])
-def filter_type(type: str = "", equipment_svc: EquipmentService = Depends()):
+def filter_type(request: Request, type: str = "", fields: str = "", equipment_svc: EquipmentService = Depends()):
     """API route that returns a list of Equipment Models by type as a query parameter, specifically, finds equipment with the exact type.
 
     Args:
         The equipment type
+        Optionally the comma separated fields to include, e.g. `id,status`
 
     Returns:
         A list of equipment models with the same type or null if none are found
+        or 304 Not Modified if the list is unchanged since the ETag given in If-None-Match,
+        or a 422 if a requested field does not exist
     """
-    return equipment_svc.filter_type(type)
+    try:
+        return listing_response(request, equipment_svc.cached_filter_type(type, fields))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 @api.get("/status/", response_model=list[Equipment] | None, tags=['Equipment'])
-def filter_status(status: int = 0, equipment_svc: EquipmentService = Depends()):
+def filter_status(request: Request, status: int = 0, fields: str = "", equipment_svc: EquipmentService = Depends()):
     """API route that returns a list of Equipment Models by status as a query parameter.
 
     Args:
         A status of either 1 or 0, where 1 is available
+        Optionally the comma separated fields to include, e.g. `id,status`
 
     Returns:
         A list of equipment models with the same status or null if none are found
+        or 304 Not Modified if the list is unchanged since the ETag given in If-None-Match,
+        or a 422 if a requested field does not exist
     """
-    return equipment_svc.filter_status(status)
+    try:
+        return listing_response(request, equipment_svc.cached_filter_status(status, fields))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 @api.get("", response_model=list[Equipment] | None, tags=['Equipment'])
-def list(equipment_svc: EquipmentService = Depends()):
+def list(request: Request, fields: str = "", equipment_svc: EquipmentService = Depends()):
     """API route that returns a list of all Equipment Models.
 
     Args:
-        None
+        Optionally the comma separated fields to include, e.g. `id,status`; all fields by default
 
     Returns:
         A list of all equipment models or null if none are in the database
+        or 304 Not Modified if the list is unchanged since the ETag given in If-None-Match,
+        or a 422 if a requested field does not exist
     """
-    return equipment_svc.list()
+    try:
+        return listing_response(request, equipment_svc.cached_list(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 @api.put("", response_model=Equipment | None, tags=['Equipment'])
-def update(equipment: Equipment, equipment_svc: EquipmentService = Depends(), subject: User = Depends(registered_user)):
+def update(equipment: Equipment, equipment_svc: EquipmentService = Depends(), subject: User = Depends(registered_subject)):
     """API route that updates a pre-existing Equipment Entity by an Equipment Model as a requeset body.
 
     Args:
@@ -78,7 +283,7 @@ def update(equipment: Equipment, equipment_svc: EquipmentService = Depends(), su
     return equipment_svc.update(equipment, subject)
 
 @api.post("", tags=["Equipment"])
-def add(equipment: Equipment, equipment_svc: EquipmentService = Depends(), subject: User = Depends(registered_user)):
+def add(equipment: Equipment, equipment_svc: EquipmentService = Depends(), subject: User = Depends(registered_subject)):
     """API route to add an Equipment Entity by an Equipment Model as a request body. 
 
     Args:
@@ -90,7 +295,7 @@ def add(equipment: Equipment, equipment_svc: EquipmentService = Depends(), subje
     equipment_svc.add(equipment, subject)
 
 @api.delete("", tags=["Equipment"])
-def remove(equipment_id: int, equipment_svc: EquipmentService = Depends(), subject: User = Depends(registered_user)):
+def remove(equipment_id: int, equipment_svc: EquipmentService = Depends(), subject: User = Depends(registered_subject)):
     """API route to remove an Equipment Entity using an equipment id as a query parameter. 
 
     Args:
@@ -2,6 +2,9 @@
 
 from fastapi import APIRouter, Depends
 from ..services.health import HealthService
+from ..services.scheduler import scheduler
+from ..models import PoolStatus, ScheduledJobStatus, RouteQueryStats
+from .query_timing import route_query_stats
 
 
 __authors__ = ["Kris Jordan"]
@@ -16,3 +19,23 @@ api = APIRouter(prefix="/api/health")
 @api.get("", tags=["System Health"])
 def health_check(health_svc: HealthService = Depends()) -> str:
     return health_svc.check()
+
+
+@api.get("/pool", tags=["System Health"])
+def pool_status(health_svc: HealthService = Depends()) -> PoolStatus:
+    return health_svc.pool()
+
+
+@api.get("/cache", tags=["System Health"])
+def cache_stats(health_svc: HealthService = Depends()) -> dict[str, dict]:
+    return health_svc.caches()
+
+
+@api.get("/scheduler", tags=["System Health"])
+def scheduler_status() -> list[ScheduledJobStatus]:
+    return scheduler.status()
+
+
+@api.get("/queries", tags=["System Health"])
+def query_stats() -> list[RouteQueryStats]:
+    return route_query_stats()
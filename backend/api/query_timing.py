@@ -0,0 +1,74 @@
+"""Middleware reporting the database statements each request issues.
+
+Every HTTP request runs inside `database.track_queries()`. Its statement count, total database time and
+slowest statement are sent to the client in a `Server-Timing` header, which browsers show in the network
+panel of their developer tools:
+
+    Server-Timing: db;dur=12.4;desc="5 queries", db-slowest;dur=6.1
+
+and added to per-route totals of this worker process, served by `/api/health/queries`, where a route whose
+`max_queries` grows with the data it returns points to an N+1 pattern.
+"""
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..database import track_queries, QueryStats
+from ..models import RouteQueryStats
+
+SLOWEST_STATEMENT_LENGTH = 500
+"""Characters of a route's slowest statement kept in its totals."""
+
+_routes: dict[str, RouteQueryStats] = {}
+
+
+def route_query_stats() -> list[RouteQueryStats]:
+    """Totals of the routes requested in this worker process, those spending the most time in the database first."""
+    return sorted(_routes.values(), key=lambda stats: stats.db_ms, reverse=True)
+
+
+def server_timing(stats: QueryStats) -> bytes:
+    """The `Server-Timing` header value for the statements of a request."""
+    queries = '1 query' if stats.count == 1 else f'{stats.count} queries'
+    value = f'db;dur={stats.seconds * 1000:.1f};desc="{queries}"'
+    if stats.count:
+        value += f', db-slowest;dur={stats.slowest_seconds * 1000:.1f}'
+    return value.encode('latin-1')
+
+
+def _add_to_route(route: str, stats: QueryStats) -> None:
+    totals = _routes.get(route)
+    if totals is None:
+        totals = _routes[route] = RouteQueryStats(route=route)
+    totals.requests += 1
+    totals.queries += stats.count
+    totals.max_queries = max(totals.max_queries, stats.count)
+    totals.db_ms += stats.seconds * 1000
+    if stats.count and stats.slowest_seconds * 1000 >= totals.slowest_ms:
+        totals.slowest_ms = stats.slowest_seconds * 1000
+        totals.slowest_statement = stats.slowest[:SLOWEST_STATEMENT_LENGTH]
+
+
+class QueryTimingMiddleware:
+    """ASGI middleware tracking the statements of each HTTP request."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            async def send_with_timing(message: Message) -> None:
+                if message['type'] == 'http.response.start':
+                    # Statements of a streamed body run after its headers are sent and only count in the totals.
+                    message.setdefault('headers', []).append((b'server-timing', server_timing(stats)))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                # The router adds the matched route to the scope; mounted static files have none.
+                route = scope.get('route')
+                if route is not None:
+                    _add_to_route(f"{scope['method']} {route.path}", stats)
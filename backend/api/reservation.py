@@ -11,62 +11,202 @@ Typical usage example from frontend service:
 
 """
 
-from fastapi import APIRouter, Depends
-from ..services import ReservationService
-from ..models import Reservation, User
-from .authentication import registered_user
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from ..services import ReservationService, OccupancyService, ReservationHistoryService, OverdueService, EquipmentUnavailableError, UserPermissionError
+from ..models import Batch, Reservation, ReservationListing, AllocationRequest, OccupancyGrid, ReservationHistoryPage, OverdueNotice, User
+from .authentication import registered_subject
 
 api = APIRouter(prefix="/api/reservation")
 
+@api.get("/occupancy", response_model=OccupancyGrid, tags=['Reservation'])
+def occupancy(
+    start: datetime,
+    end: datetime,
+    type: list[str] | None = Query(None),
+    subject: User = Depends(registered_subject),
+    occupancy_svc: OccupancyService = Depends()
+):
+    """API route that returns the number of bookings of each equipment type in every hour of a window.
+
+    Args:
+        The ISO 8601 start and end of the window, and optionally the equipment types to include
+        as repeated type query parameters
+        The user requesting the grid
+
+    Returns:
+        The hourly grid of bookings per type, a 403 Forbidden if the user may not view occupancy,
+        or a 422 if the window is empty or longer than a year
+    """
+    try:
+        return occupancy_svc.grid(subject, start, end, type)
+    except UserPermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@api.get("/history", response_model=ReservationHistoryPage, tags=['Reservation'])
+def history(
+    user_pid: int | None = None,
+    equipment_id: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    cursor: str = '',
+    limit: int = Query(50, ge=1, le=200),
+    subject: User = Depends(registered_subject),
+    history_svc: ReservationHistoryService = Depends()
+):
+    """API route that returns completed reservations, most recently completed first.
+
+    Args:
+        Optionally the user pid or equipment id whose reservations to list, the ISO 8601 [since, until)
+        window they completed in, the cursor of a previous page and the page size
+        The user requesting the history
+
+    Returns:
+        A page of completed reservations, a 403 Forbidden if the user may not view the requested history,
+        or a 422 if the cursor is invalid
+    """
+    try:
+        return history_svc.history(subject, user_pid, equipment_id, since, until, cursor, limit)
+    except UserPermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@api.get("/overdue", response_model=list[OverdueNotice], tags=['Reservation'])
+def overdue(subject: User = Depends(registered_subject), overdue_svc: OverdueService = Depends()):
+    """API route that returns the bookings still not returned after the end of their window.
+
+    Args:
+        The user requesting the overdue bookings
+
+    Returns:
+        The overdue notices, most overdue first, or a 403 Forbidden if the user may not view them
+    """
+    try:
+        return overdue_svc.notices(subject)
+    except UserPermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
+@api.get("/batch", response_model=Batch[Reservation], tags=['Reservation'])
+def get_many(ids: list[int] = Query(default=[]), reservation_svc: ReservationService = Depends()):
+    """API route that returns the Reservation Models of several ids in one request, e.g. `/batch?ids=1&ids=2`.
+
+    Args:
+        The reservation IDs as repeated query parameters
+
+    Returns:
+        The reservation models found in the order of the ids and the ids not found,
+        or a 422 if more than `MAX_BATCH_SIZE` distinct ids are given
+    """
+    try:
+        return reservation_svc.get_many(ids)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
 @api.get("/{reservation_id}", response_model=Reservation | None, tags=['Reservation'])
-def get(reservation_id: int, reservation_svc: ReservationService = Depends()):
+def get(reservation_id: int, fields: str = "", reservation_svc: ReservationService = Depends()):
     """API route that returns a Reservation Model by reservation_id as a path parameter.
 
     Args:
         The reservation ID as a path parameter
+        Optionally the comma separated fields to include, e.g. `id,equipment.id,start`; all fields by default
 
     Returns:
-        The reservation model or null if no reservation id is found
+        The reservation model with only the requested fields or null if no reservation id is found,
+        or a 422 if a requested field does not exist
     """
-    return reservation_svc.get(reservation_id)
+    if not fields:
+        return reservation_svc.get(reservation_id)
+    try:
+        return ORJSONResponse(reservation_svc.get_row(reservation_id, fields))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 @api.get("/type/{type}", response_model=list[Reservation], tags=['Reservation'])
-def filter_type(type: str, reservation_svc: ReservationService = Depends(), subject: User=Depends(registered_user)):
+def filter_type(type: str, fields: str = "", reservation_svc: ReservationService = Depends(), subject: User=Depends(registered_subject)):
     """API route that returns list of reservations by type as a path parameter.
 
     Args:
         The type of reservation as a path parameter
+        Optionally the comma separated fields to include; all fields by default
         The user trying to list the reservation by type
 
     Returns:
-        A list reservation models or null no reservations of that type are found
+        A list reservation models with only the requested fields or null no reservations of that type are found,
+        a 403 Forbidden if the user may not list reservations by type, or a 422 if a requested field does not exist
     """
-    return reservation_svc.filter_type(type)
+    try:
+        if not fields:
+            return reservation_svc.filter_type(type, subject)
+        return ORJSONResponse(reservation_svc.filter_type_rows(type, subject, fields))
+    except UserPermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 @api.get("/user/{user_pid}", response_model=list[Reservation], tags=['Reservation'])
-def filter_user(user_pid: int, reservation_svc: ReservationService = Depends()):
+def filter_user(user_pid: int, fields: str = "", reservation_svc: ReservationService = Depends()):
     """API route that returns list of reservations by user pid path parameter.
 
     Args:
         The user pid path parameter
+        Optionally the comma separated fields to include; all fields by default
 
     Returns:
-        A list reservation models or null no reservations of that user are found
+        A list reservation models with only the requested fields or null no reservations of that user are found,
+        or a 422 if a requested field does not exist
     """
-    return reservation_svc.filter_user(user_pid)
+    if not fields:
+        return reservation_svc.filter_user(user_pid)
+    try:
+        return ORJSONResponse(reservation_svc.filter_user_rows(user_pid, fields))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
 
+@api.post("/allocate", response_model=list[Reservation], tags=['Reservation'])
+def allocate(request: AllocationRequest, subject: User = Depends(registered_subject), reservation_svc: ReservationService = Depends()):
+    """API route to reserve any available equipment of a type for the current user in one request.
 
-@api.get("", response_model=list[Reservation], tags=['Reservation'])
-def list(reservation_svc: ReservationService = Depends()):
+    Args:
+        An AllocationRequest with the equipment type, number of items, and optional notes
+        The user the equipment is reserved for
+
+    Returns:
+        The new reservations, a 403 Forbidden if the user may not reserve several items at once,
+        or a 409 Conflict if not enough equipment of the type is available
+    """
+    try:
+        return reservation_svc.allocate(request, subject)
+    except UserPermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except EquipmentUnavailableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@api.get("", response_model=list[Reservation] | ReservationListing, tags=['Reservation'])
+def list(fields: str = "", compact: bool = False, reservation_svc: ReservationService = Depends()):
     """API route that returns a list of all reservations.
 
     Args:
-        None
-        
+        Optionally the comma separated fields to include, e.g. `id,equipment.id,start`, where `user` or
+        `equipment` alone includes all of the embedded model's fields; all fields by default
+        Optionally whether to refer to users and equipment by id and side-load each of them once
+
     Returns:
-        A list of all reservations
+        A list of all reservations with only the requested fields, or a `ReservationListing` if compact,
+        or a 422 if a requested field does not exist or fields are requested of a compact listing
     """
-    return reservation_svc.list()
+    try:
+        if compact:
+            if fields:
+                raise ValueError('A compact listing always includes every field')
+            return ORJSONResponse(reservation_svc.list_compact())
+        return ORJSONResponse(reservation_svc.list_rows(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 @api.post("", tags=['Reservation'])
 def add(reservation: Reservation, reservation_svc: ReservationService = Depends()):
@@ -76,9 +216,15 @@ def add(reservation: Reservation, reservation_svc: ReservationService = Depends(
         A Reservation
         
     Returns:
-        None
+        None, a 409 Conflict if the equipment is already checked out,
+        or a 422 if the reservation's type is not the equipment's
     """
-    reservation_svc.add(reservation)
+    try:
+        reservation_svc.add(reservation)
+    except EquipmentUnavailableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 @api.delete("", tags=['Reservation'])
 def remove(reservation_id: int, reservation_svc: ReservationService = Depends()):
@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from ..services import UserService
-from ..models import User
-from .authentication import registered_user
+from ..models import Batch, User
+from .authentication import registered_user, registered_subject
 
 api = APIRouter(prefix="/api/user")
 
@@ -9,3 +9,11 @@ api = APIRouter(prefix="/api/user")
 @api.get("", response_model=list[User], tags=['User'])
 def search(q: str, subject: User = Depends(registered_user), user_svc: UserService = Depends()):
     return user_svc.search(subject, q)
+
+
+@api.get("/batch", response_model=Batch[User], tags=['User'])
+def get_many(pids: list[int] = Query(default=[]), subject: User = Depends(registered_subject), user_svc: UserService = Depends()):
+    try:
+        return user_svc.get_many(pids)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
@@ -1,7 +1,37 @@
-"""SQLAlchemy DB Engine and Session niceties for FastAPI dependency injection."""
+"""SQLAlchemy DB Engine and Session niceties for FastAPI dependency injection.
 
+Engine and connection pool tuning is read from optional environment variables:
+
+* `POSTGRES_ECHO`: `false` (default), `true` to log statements, or `debug` to also log result rows.
+* `POSTGRES_POOL_SIZE`, `POSTGRES_MAX_OVERFLOW`: persistent and burst connections (default 5 and 10).
+* `POSTGRES_POOL_TIMEOUT`: seconds to wait for a free connection before erroring (default 30).
+* `POSTGRES_POOL_RECYCLE`: seconds after which connections are replaced, -1 to disable (default 1800).
+* `POSTGRES_POOL_PRE_PING`: test connections on checkout to survive database restarts (default true).
+* `POSTGRES_STATEMENT_TIMEOUT`: server-side statement timeout in milliseconds, 0 to disable (default 0).
+* `POSTGRES_QUERY_CACHE_SIZE`: compiled statement cache entries per engine (default 500).
+* `POSTGRES_INSERTMANYVALUES_PAGE_SIZE`: rows per batched multi-row INSERT (default 1000).
+* `POSTGRES_ASYNC`: serve the hot read routes from async handlers on an asyncpg engine (default false).
+* `POSTGRES_PREPARED_STATEMENT_CACHE_SIZE`: asyncpg server-side prepared statements kept per connection
+  (default 100).
+
+psycopg2 has no server-side prepared statements, so the statement-level knobs of the synchronous
+engine are SQLAlchemy's compiled statement cache and its batching of `executemany` INSERTs into multi-row
+VALUES clauses. The asyncpg engine additionally prepares statements on the server.
+
+Statements executed inside `track_queries()` are counted and timed on every engine, sync or async, by
+cursor execution hooks. `api.query_timing` tracks each request this way.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
 import sqlalchemy
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine as sqlalchemy_create_async_engine
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
 from .env import getenv
 
 __authors__ = ["Kris Jordan"]
@@ -9,9 +39,8 @@ __copyright__ = "Copyright 2023"
 __license__ = "MIT"
 
 
-def _engine_str(database=getenv("POSTGRES_DATABASE")) -> str:
+def _engine_str(database=getenv("POSTGRES_DATABASE"), dialect="postgresql+psycopg2") -> str:
     """Helper function for reading settings from environment variables to produce connection string."""
-    dialect = "postgresql+psycopg2"
     user = getenv("POSTGRES_USER")
     password = getenv("POSTGRES_PASSWORD")
     host = getenv("POSTGRES_HOST")
@@ -19,9 +48,141 @@ def _engine_str(database=getenv("POSTGRES_DATABASE")) -> str:
     return f"{dialect}://{user}:{password}@{host}:{port}/{database}"
 
 
-engine = sqlalchemy.create_engine(_engine_str(), echo=True)
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that also counts the threads currently waiting to check out a connection."""
+
+    waiters: int
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiters = 0
+        self._waiters_lock = threading.Lock()
+
+    def _do_get(self):
+        if self.checkedin() > 0 or self._max_overflow < 0 or self.overflow() < self._max_overflow:
+            return super()._do_get()
+        # No idle connection and no room to open another, so this checkout waits for one to be returned.
+        with self._waiters_lock:
+            self.waiters += 1
+        try:
+            return super()._do_get()
+        finally:
+            with self._waiters_lock:
+                self.waiters -= 1
+
+
+class QueryStats:
+    """Count and duration of the statements executed while tracking, e.g. by one request."""
+
+    __slots__ = ("count", "seconds", "slowest", "slowest_seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest: str | None = None
+        self.slowest_seconds = 0.0
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        if seconds >= self.slowest_seconds:
+            self.slowest = statement
+            self.slowest_seconds = seconds
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Record the statements executed in this context into new `QueryStats`.
+
+    The context is inherited by threadpool workers and the greenlets of async sessions, so statements of
+    sync routes, their dependencies and async sessions are all recorded. Outside of `track_queries` the
+    cursor hooks do nothing but look the context variable up."""
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+# The start of a tracked statement is kept on its execution context, which is discarded with the execution
+# whether the statement succeeds or raises.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _query_stats.get() is not None:
+        context._query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _query_stats.get()
+    started = getattr(context, "_query_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def _flag(variable: str, default: str) -> bool:
+    return getenv(variable, default).lower() in ("true", "1", "yes")
+
+
+def engine_options() -> dict:
+    """Keyword arguments for `sqlalchemy.create_engine` read from the environment."""
+    echo = getenv("POSTGRES_ECHO", "false").lower()
+    options = {
+        "echo": "debug" if echo == "debug" else _flag("POSTGRES_ECHO", "false"),
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": int(getenv("POSTGRES_POOL_SIZE", "5")),
+        "max_overflow": int(getenv("POSTGRES_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(getenv("POSTGRES_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(getenv("POSTGRES_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": _flag("POSTGRES_POOL_PRE_PING", "true"),
+        "query_cache_size": int(getenv("POSTGRES_QUERY_CACHE_SIZE", "500")),
+        "insertmanyvalues_page_size": int(getenv("POSTGRES_INSERTMANYVALUES_PAGE_SIZE", "1000")),
+    }
+    statement_timeout = int(getenv("POSTGRES_STATEMENT_TIMEOUT", "0"))
+    if statement_timeout > 0:
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+    return options
+
+
+def create_engine(database: str = getenv("POSTGRES_DATABASE"), **overrides) -> Engine:
+    """Create an engine for `database` configured from the environment, with optional overrides."""
+    return sqlalchemy.create_engine(_engine_str(database), **(engine_options() | overrides))
+
+
+def create_async_engine(database: str = getenv("POSTGRES_DATABASE"), **overrides) -> AsyncEngine:
+    """Create an asyncpg engine for `database` sharing the environment's pool and statement settings."""
+    options = engine_options()
+    del options["poolclass"]
+    options.pop("connect_args", None)
+    statement_timeout = int(getenv("POSTGRES_STATEMENT_TIMEOUT", "0"))
+    options["connect_args"] = {
+        "server_settings": {"statement_timeout": str(statement_timeout)} if statement_timeout > 0 else {},
+        "prepared_statement_cache_size": int(getenv("POSTGRES_PREPARED_STATEMENT_CACHE_SIZE", "100")),
+    }
+    return sqlalchemy_create_async_engine(
+        _engine_str(database, dialect="postgresql+asyncpg"), **(options | overrides))
+
+
+engine = create_engine()
 """Application-level SQLAlchemy database engine."""
 
+async_enabled = _flag("POSTGRES_ASYNC", "false")
+"""Whether this deployment serves the async routes of `api.aio` backed by `async_engine`."""
+
+_async_engine: AsyncEngine | None = None
+
+
+def async_engine() -> AsyncEngine:
+    """Application-level asyncpg engine, created on first use so sync-only deployments never load asyncpg."""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine()
+    return _async_engine
+
 
 def db_session():
     """Generator function offering dependency injection of SQLAlchemy Sessions."""
@@ -30,3 +191,9 @@ def db_session():
         yield session
     finally:
         session.close()
+
+
+async def async_db_session():
+    """Async generator function offering dependency injection of SQLAlchemy AsyncSessions."""
+    async with AsyncSession(async_engine()) as session:
+        yield session
@@ -0,0 +1,9 @@
+"""Helpers for the date times compared and stored across the application."""
+
+from datetime import datetime, timezone
+
+
+def as_utc(moment: datetime) -> datetime:
+    """`moment` in UTC, reading a time without a time zone as UTC, so naive times mean the same everywhere they are
+    compared."""
+    return moment.astimezone(timezone.utc) if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
@@ -19,7 +19,11 @@ from .role_entity import RoleEntity
 from .permission_entity import PermissionEntity
 from .user_role_entity import user_role_table
 from .equipment_entity import EquipmentEntity
+from .equipment_type_summary_entity import EquipmentTypeSummaryEntity
 from .reservation_entity import ReservationEntity
+from .reservation_occupancy_entity import ReservationOccupancyEntity
+from .reservation_history_entity import ReservationHistoryEntity
+from .overdue_notice_entity import OverdueNoticeEntity
 
 
 __authors__ = ["Kris Jordan"]
@@ -1,6 +1,6 @@
 """Table for all equipment in the database"""
 
-from sqlalchemy import Integer, String
+from sqlalchemy import Integer, String, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import Self
 from .entity_base import EntityBase
@@ -8,6 +8,13 @@ from ..models import Equipment
 
 class EquipmentEntity(EntityBase):
     __tablename__ = 'equipment'
+    __table_args__ = (
+        # Composite (sort column, id) indexes back keyset pagination in every supported order.
+        Index('ix_equipment_name_id', 'name', 'id'),
+        Index('ix_equipment_type_id', 'type', 'id'),
+        Index('ix_equipment_status_id', 'status', 'id'),
+        Index('ix_equipment_type_status_id', 'type', 'status', 'id'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(64), nullable=False, default='')
@@ -0,0 +1,21 @@
+"""Table of maintained equipment counts per type, backing the availability summary."""
+
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from .entity_base import EntityBase
+from ..models import EquipmentTypeSummary
+
+
+class EquipmentTypeSummaryEntity(EntityBase):
+    __tablename__ = 'equipment_type_summary'
+
+    type: Mapped[str] = mapped_column(String(32), primary_key=True)
+    available: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def to_model(self) -> EquipmentTypeSummary:
+        return EquipmentTypeSummary(
+            type=self.type,
+            available=self.available,
+            total=self.total,
+        )
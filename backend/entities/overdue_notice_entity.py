@@ -0,0 +1,29 @@
+"""Table of notices raised for booked reservations that were not returned by the end of their window."""
+
+from datetime import datetime
+from sqlalchemy import Integer, String, DateTime, ForeignKey, func
+from sqlalchemy.orm import Mapped, mapped_column
+from .entity_base import EntityBase
+from ..models import OverdueNotice
+
+
+class OverdueNoticeEntity(EntityBase):
+    __tablename__ = 'overdue_notice'
+
+    # At most one notice per reservation; it is dropped with the reservation once the equipment is returned.
+    reservation_id: Mapped[int] = mapped_column(ForeignKey('reservation.id', ondelete='CASCADE'), primary_key=True)
+    type: Mapped[str] = mapped_column(String(32))
+    user_id: Mapped[int] = mapped_column(Integer, index=True)
+    equipment_id: Mapped[int] = mapped_column(Integer)
+    due: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    def to_model(self) -> OverdueNotice:
+        return OverdueNotice(
+            reservation_id=self.reservation_id,
+            type=self.type,
+            user_id=self.user_id,
+            equipment_id=self.equipment_id,
+            due=self.due,
+            created_at=self.created_at,
+        )
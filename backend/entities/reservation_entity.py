@@ -1,16 +1,32 @@
 """Table for all reservations in the database"""
 
-from sqlalchemy import Integer, String, ForeignKey
+from sqlalchemy import Index, Integer, String, ForeignKey, text
+from sqlalchemy.dialects.postgresql import TSTZRANGE, ExcludeConstraint, Range
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from datetime import datetime
 from typing import Self
 from .entity_base import EntityBase
 from .user_entity import UserEntity
 from .equipment_entity import EquipmentEntity
 from ..models import Reservation
+from ..datetimes import as_utc
 
 
 class ReservationEntity(EntityBase):
     __tablename__ = 'reservation'
+    __table_args__ = (
+        # No two bookings of the same equipment may overlap. Matching equipment ids as single-point integer
+        # ranges keeps the constraint on core GiST operator classes, without the btree_gist extension. With
+        # `during` leading, the constraint's index also answers availability queries on `during` alone.
+        ExcludeConstraint(
+            ('during', '&&'),
+            (text("int4range(equipment_id, equipment_id, '[]')"), '&&'),
+            name='reservation_during_excl',
+            using='gist',
+        ),
+        # Bookings by the end of their window, for the overdue sweep. Immediate checkouts have no end.
+        Index('ix_reservation_due', text('upper(during)'), postgresql_where=text('during IS NOT NULL')),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     type: Mapped[str] = mapped_column(String(32), index=True)
@@ -23,6 +39,9 @@ class ReservationEntity(EntityBase):
     
     notes: Mapped[str] = mapped_column(String(200), nullable=True)
 
+    # The booked [start, end) window, or NULL for an immediate checkout of no fixed length.
+    during: Mapped[Range | None] = mapped_column(TSTZRANGE, nullable=True)
+
     @classmethod
     def from_model(cls, model: Reservation) -> Self:
         return cls(
@@ -31,6 +50,7 @@ class ReservationEntity(EntityBase):
             user_id=model.user.id,
             equipment_id=model.equipment.id,
             notes=model.notes,
+            during=None if model.start is None else Range(as_utc(model.start), as_utc(model.end), bounds='[)'),
         )
     
     def to_model(self) -> Reservation:
@@ -39,5 +59,7 @@ class ReservationEntity(EntityBase):
             type=self.type,
             user = self.user.to_model(),
             equipment = self.equipment.to_model(),
-            notes = self.notes
+            notes = self.notes,
+            start = None if self.during is None else self.during.lower,
+            end = None if self.during is None else self.during.upper,
         )
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""Append-only table of completed reservations, range partitioned by the month they completed in."""
+
+from datetime import datetime
+from sqlalchemy import Index, Integer, String, DateTime, PrimaryKeyConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from .entity_base import EntityBase
+from ..models import ReservationRecord
+
+
+class ReservationHistoryEntity(EntityBase):
+    __tablename__ = 'reservation_history'
+    __table_args__ = (
+        # Unique and secondary indexes on a partitioned table must include the partition key, and are
+        # created on every monthly partition. Leading with the filter column and ending with the partition
+        # key lets history queries for one user or item seek within only the months they ask for.
+        PrimaryKeyConstraint('id', 'completed_at'),
+        Index('ix_reservation_history_user_id_completed_at', 'user_id', 'completed_at'),
+        Index('ix_reservation_history_equipment_id_completed_at', 'equipment_id', 'completed_at'),
+        {'postgresql_partition_by': 'RANGE (completed_at)'},
+    )
+
+    id: Mapped[int] = mapped_column(Integer)
+    """Id the reservation had in the reservation table."""
+    type: Mapped[str] = mapped_column(String(32))
+
+    # Plain ids rather than foreign keys, so history outlives the users and equipment it mentions.
+    user_id: Mapped[int] = mapped_column(Integer)
+    equipment_id: Mapped[int] = mapped_column(Integer)
+
+    notes: Mapped[str] = mapped_column(String(200), nullable=True)
+    start: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    end: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    completed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    """When the reservation was returned or cancelled; the partition key."""
+
+    def to_model(self) -> ReservationRecord:
+        return ReservationRecord(
+            id=self.id,
+            type=self.type,
+            user_id=self.user_id,
+            equipment_id=self.equipment_id,
+            notes=self.notes,
+            start=self.start,
+            end=self.end,
+            completed_at=self.completed_at,
+        )
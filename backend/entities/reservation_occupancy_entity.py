@@ -0,0 +1,16 @@
+"""Table of maintained booking counts per equipment type and hour, backing the occupancy calendar."""
+
+from datetime import datetime
+from sqlalchemy import Integer, String, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from .entity_base import EntityBase
+
+
+class ReservationOccupancyEntity(EntityBase):
+    __tablename__ = 'reservation_occupancy'
+
+    type: Mapped[str] = mapped_column(String(32), primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    """Start of the hour, in UTC."""
+    booked: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    """Number of bookings of the type overlapping the hour."""
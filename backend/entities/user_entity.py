@@ -1,7 +1,8 @@
 '''User accounts for all registered users in the application.'''
 
 
-from sqlalchemy import Integer, String
+from sqlalchemy import Integer, String, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import Self
 from .entity_base import EntityBase
@@ -16,6 +17,12 @@ __license__ = 'MIT'
 
 class UserEntity(EntityBase):
     __tablename__ = 'user'
+    __table_args__ = (
+        # Sort keys for keyset pagination of the user list; the other orderable columns are unique.
+        Index('ix_user_first_name_id', 'first_name', 'id'),
+        Index('ix_user_last_name_id', 'last_name', 'id'),
+        Index('ix_user_search_vector', 'search_vector', postgresql_using='gin'),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     pid: Mapped[int] = mapped_column(Integer, unique=True, index=True)
@@ -30,6 +37,18 @@ class UserEntity(EntityBase):
     pronouns: Mapped[str] = mapped_column(
         String(32), nullable=False, default='')
 
+    # Full-text search document maintained by Postgres: names and onyen rank above email, whose local
+    # part and domain are split into words so `jane` and `unc` both match `jane@unc.edu`.
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', first_name || ' ' || last_name || ' ' || onyen), 'A') || "
+            "setweight(to_tsvector('simple', translate(email, '@.', '  ')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
+
     roles: Mapped[list['RoleEntity']] = relationship(secondary=user_role_table, back_populates='users')
     permissions: Mapped['PermissionEntity'] = relationship(back_populates='user')
     reservations: Mapped['ReservationEntity'] = relationship(back_populates='user', cascade="all, delete")
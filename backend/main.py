@@ -1,7 +1,11 @@
 """Entrypoint of backend API exposing the FastAPI `app` to be served by an application server such as uvicorn."""
 
 from fastapi import FastAPI
+from .database import async_enabled, engine
+from .services import equipment_events, overdue
+from .services.scheduler import scheduler
 from .api import health, static_files, profile, authentication, user, equipment, reservation
+from .api.query_timing import QueryTimingMiddleware
 from .api.admin import users as admin_users
 from .api.admin import roles as admin_roles
 
@@ -20,6 +24,29 @@ app = FastAPI(
     openapi_tags=[health.openapi_tags],
 )
 
+app.add_middleware(QueryTimingMiddleware)
+
+if async_enabled:
+    # Async read routes take precedence; everything else falls through to the synchronous routers.
+    from .api.aio import user as async_user, equipment as async_equipment, reservation as async_reservation
+    app.include_router(async_user.api)
+    app.include_router(async_equipment.api)
+    app.include_router(async_reservation.api)
+
+if equipment_events.notify_enabled:
+    # Relay equipment changes committed by every worker process to this worker's stream subscribers.
+    notify_bridge = equipment_events.NotifyBridge(engine)
+    app.on_event("startup")(notify_bridge.start)
+    app.on_event("shutdown")(notify_bridge.stop)
+
+if overdue.SWEEP_INTERVAL > 0:
+    # Every worker schedules the sweep; an advisory lock lets only one of them run it at a time.
+    scheduler.every(overdue.SWEEP_INTERVAL, 'overdue_sweep', lambda: overdue.sweep_overdue(engine))
+
+app.on_event("startup")(scheduler.start)
+app.on_event("shutdown")(scheduler.stop)
+app.on_event("shutdown")(authentication.delegated_auth_verifier.aclose)
+
 app.include_router(user.api)
 app.include_router(profile.api)
 app.include_router(health.api)
@@ -1,12 +1,15 @@
 """Package for all models in the application."""
 
 from .pagination import Paginated, PaginationParams
+from .batch import Batch
 from .permission import Permission
 from .user import User, ProfileForm, NewUser
 from .role import Role
 from .role_details import RoleDetails
-from .equipment import Equipment
-from .reservation import Reservation
+from .equipment import Equipment, EquipmentPaginationParams, EquipmentPage, EquipmentImportError, EquipmentImportReport, EquipmentStatusChange, EquipmentTypeSummary
+from .reservation import Reservation, CompactReservation, ReservationListing, AllocationRequest, ReservationRecord, ReservationHistoryPage, OverdueNotice
+from .health import PoolStatus, ScheduledJobStatus, RouteQueryStats
+from .occupancy import OccupancyGrid
 
 __authors__ = ["Kris Jordan"]
 __copyright__ = "Copyright 2023"
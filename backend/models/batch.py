@@ -0,0 +1,11 @@
+from typing import Generic, TypeVar
+from pydantic.generics import GenericModel
+
+T = TypeVar("T")
+
+
+class Batch(GenericModel, Generic[T]):
+    """Models looked up by a list of ids, in the order the ids were given."""
+    items: list[T]
+    missing: list[int]
+    """Requested ids with no model, in the order they were given."""
@@ -1,10 +1,46 @@
 """Data object to represent equipment that can be checked out."""
 
 from pydantic import BaseModel
+from .pagination import Paginated, PaginationParams
 
 class Equipment(BaseModel):
     id: int | None
     name: str
     type: str
     status: int
-    notes: str = ''
\ No newline at end of file
+    notes: str = ''
+
+
+class EquipmentPaginationParams(PaginationParams):
+    """Pagination parameters with the equipment-specific filters, all applied in the same query."""
+    type: str = ''
+    status: int | None = None
+
+
+class EquipmentPage(Paginated[Equipment]):
+    params: EquipmentPaginationParams
+
+
+class EquipmentImportError(BaseModel):
+    """A row of a bulk equipment import that was rejected, by line number of the uploaded file."""
+    line: int
+    message: str
+
+
+class EquipmentImportReport(BaseModel):
+    """Outcome of a bulk equipment import. Rows not listed in `errors` were inserted."""
+    inserted: int = 0
+    errors: list[EquipmentImportError] = []
+
+
+class EquipmentStatusChange(BaseModel):
+    """Pushed to availability stream subscribers when an equipment is checked out or returned."""
+    id: int
+    status: int
+
+
+class EquipmentTypeSummary(BaseModel):
+    """Number of available and total equipment of a type."""
+    type: str
+    available: int
+    total: int
@@ -0,0 +1,44 @@
+"""Data objects reported by the system health endpoints."""
+
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class PoolStatus(BaseModel):
+    """Live utilization of the database connection pool."""
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    waiters: int
+
+
+class ScheduledJobStatus(BaseModel):
+    """Counters of a periodic background job in this worker process."""
+    name: str
+    interval: float
+    """Seconds between the end of one run and the start of the next."""
+    runs: int = 0
+    """Runs that did the job's work in this worker."""
+    skipped: int = 0
+    """Runs that found another worker holding the job's lock and did nothing."""
+    failures: int = 0
+    processed: int = 0
+    """Total items handled across runs, e.g. notices created."""
+    last_run: datetime | None = None
+    last_duration_ms: float | None = None
+
+
+class RouteQueryStats(BaseModel):
+    """Database statements issued by the requests of one route in this worker process."""
+    route: str
+    """Method and path template of the route, e.g. `GET /api/equipment/{equipment_id}`."""
+    requests: int = 0
+    queries: int = 0
+    """Total statements across requests."""
+    max_queries: int = 0
+    """Most statements issued by a single request, where an N+1 pattern shows first."""
+    db_ms: float = 0
+    """Total milliseconds spent executing statements across requests."""
+    slowest_ms: float = 0
+    slowest_statement: str | None = None
@@ -0,0 +1,17 @@
+"""Data object to represent the booked occupancy of equipment types over time."""
+
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class OccupancyGrid(BaseModel):
+    """Bookings per equipment type and hour over the [start, end) window.
+
+    `booked[i][j]` is the number of bookings of `types[i]` overlapping the `j`th hour after `start`, out of the
+    `capacity[i]` equipment of that type."""
+    start: datetime
+    end: datetime
+    bucket_hours: int = 1
+    types: list[str]
+    capacity: list[int]
+    booked: list[list[int]]
@@ -10,6 +10,8 @@ class PaginationParams(BaseModel):
     page_size: int = 10
     order_by: str = ""
     filter: str = ""
+    cursor: str = ""
+    """Opaque keyset cursor from a previous page's `next_cursor`. When given, `page` is ignored."""
 
 
 class Paginated(GenericModel, Generic[T]):
@@ -17,3 +19,4 @@ class Paginated(GenericModel, Generic[T]):
     items: list[T]
     length: int
     params: PaginationParams
+    next_cursor: str | None = None
@@ -1,6 +1,7 @@
 """Data object to represent reservations from users checking out or returning equipment."""
 
-from pydantic import BaseModel
+from datetime import datetime
+from pydantic import BaseModel, Field, root_validator
 from . import User, Equipment
 
 class Reservation(BaseModel):
@@ -8,4 +9,76 @@ class Reservation(BaseModel):
     type: str
     user: User
     equipment: Equipment
-    notes: str | None = None
\ No newline at end of file
+    notes: str | None = None
+    start: datetime | None = None
+    """Start of a booking for a future window. Reservations without one check the equipment out immediately."""
+    end: datetime | None = None
+
+    @root_validator(skip_on_failure=True)
+    def window_is_ordered(cls, values):
+        start, end = values.get('start'), values.get('end')
+        if (start is None) != (end is None):
+            raise ValueError('A booking needs both a start and an end')
+        if start is not None and start >= end:
+            raise ValueError('A booking must end after it starts')
+        return values
+
+
+class CompactReservation(BaseModel):
+    """A reservation referring to its user and equipment by id, as listed in a `ReservationListing`."""
+    id: int
+    type: str
+    user_id: int
+    equipment_id: int
+    notes: str | None = None
+    start: datetime | None = None
+    end: datetime | None = None
+
+
+class ReservationListing(BaseModel):
+    """Reservations with their users and equipment side-loaded, each listed once however many
+    reservations refer to it."""
+    reservations: list[CompactReservation]
+    users: dict[int, User]
+    """Users of the reservations by id."""
+    equipment: dict[int, Equipment]
+    """Equipment of the reservations by id."""
+
+
+class AllocationRequest(BaseModel):
+    """Request to reserve any `count` available items of a type, e.g. a set of laptops for a class."""
+    type: str
+    count: int = Field(1, ge=1, le=100)
+    notes: str | None = None
+
+
+class ReservationRecord(BaseModel):
+    """A completed reservation from the history archive.
+
+    Records keep the ids of their user and equipment rather than embedding them, since either may since
+    have been removed."""
+    id: int
+    type: str
+    user_id: int
+    equipment_id: int
+    notes: str | None = None
+    start: datetime | None = None
+    end: datetime | None = None
+    completed_at: datetime
+
+
+class ReservationHistoryPage(BaseModel):
+    """Completed reservations, most recently completed first."""
+    items: list[ReservationRecord]
+    next_cursor: str | None = None
+    """Opaque cursor of the following page, or None on the last page."""
+
+
+class OverdueNotice(BaseModel):
+    """A booked reservation still outstanding after the end of its window, found by the overdue sweep."""
+    reservation_id: int
+    type: str
+    user_id: int
+    equipment_id: int
+    due: datetime
+    created_at: datetime
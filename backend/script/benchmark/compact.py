@@ -0,0 +1,70 @@
+"""Benchmark the compact, side-loaded reservation listing against the nested one.
+
+Reservations are spread over few users and items, as on the admin reservation page, where the nested listing
+repeats each user and item in every reservation referring to them. Both listings are timed from the query
+through the route's response class, without the HTTP layer, and the size of each response body is reported.
+
+Rows are inserted inside a transaction which is rolled back at the end, so the development database is left
+untouched.
+
+Usage: python3 -m backend.script.benchmark.compact
+"""
+
+import sys
+import time
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from ...database import engine
+from ...env import getenv
+from ...services import EquipmentService, PermissionService, ReservationService, OccupancyService, ReservationHistoryService
+
+if getenv("MODE") != "development":
+    print("This script can only be run in development mode.", file=sys.stderr)
+    print("Add MODE=development to your .env file in workspace's `backend/` directory")
+    exit(1)
+
+RESERVATIONS = 20_000
+USERS = 200
+EQUIPMENT = 2_000
+
+
+def timed(render, repeat: int = 5) -> tuple[float, int]:
+    """Seconds per call of `render` and the size of the body it rendered."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = render()
+    return (time.perf_counter() - start) / repeat, len(body)
+
+
+def main() -> None:
+    with Session(engine) as session:
+        session.execute(text('''
+            INSERT INTO equipment (id, name, type, status, notes)
+            SELECT 100000 + i, 'Item ' || i, 'type' || (i % 10), 1, 'Generated for the compact listing benchmark'
+            FROM generate_series(0, :rows - 1) AS i'''), {'rows': EQUIPMENT})
+        session.execute(text('''
+            INSERT INTO "user" (id, pid, onyen, email, first_name, last_name, pronouns)
+            SELECT 100000 + i, 200000000 + i, 'user' || i, 'user' || i || '@unc.edu', 'First' || i, 'Last' || i, 'they / them'
+            FROM generate_series(0, :rows - 1) AS i'''), {'rows': USERS})
+        session.execute(text('''
+            INSERT INTO reservation (type, user_id, equipment_id, notes)
+            SELECT 'type' || (i % 10), 100000 + i % :users, 100000 + i % :equipment, ''
+            FROM generate_series(0, :rows - 1) AS i'''), {'rows': RESERVATIONS, 'users': USERS, 'equipment': EQUIPMENT})
+
+        permission = PermissionService(session)
+        reservation_svc = ReservationService(session, EquipmentService(session, permission), permission,
+                                             OccupancyService(session, permission), ReservationHistoryService(session, permission))
+
+        print(f'{RESERVATIONS:,} generated reservations of {USERS:,} users and {EQUIPMENT:,} items')
+        for label, render in (
+            ('nested', lambda: ORJSONResponse(reservation_svc.list_rows()).body),
+            ('compact', lambda: ORJSONResponse(reservation_svc.list_compact()).body),
+        ):
+            seconds, size = timed(render)
+            print(f'{label:>8}: {seconds * 1000:8.1f} ms   {size / 1024:8.0f} KiB')
+        session.rollback()
+
+
+if __name__ == '__main__':
+    main()
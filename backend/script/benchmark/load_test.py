@@ -0,0 +1,52 @@
+"""Closed-loop HTTP load test reporting throughput and latency percentiles.
+
+Run the API once with `POSTGRES_ASYNC=false` and once with `POSTGRES_ASYNC=true` to compare the
+threadpool-bound synchronous routes against the async routes of `api.aio`.
+
+Usage: python3 -m backend.script.benchmark.load_test [url] [--clients 200] [--requests 10000]
+"""
+
+import argparse
+import asyncio
+import time
+import httpx
+
+
+async def client(http: httpx.AsyncClient, url: str, remaining: list[int], latencies: list[float], errors: list[int]) -> None:
+    while remaining[0] > 0:
+        remaining[0] -= 1
+        start = time.perf_counter()
+        try:
+            response = await http.get(url)
+            if response.status_code != 200:
+                errors[0] += 1
+        except httpx.HTTPError:
+            errors[0] += 1
+        latencies.append(time.perf_counter() - start)
+
+
+async def main(url: str, clients: int, requests: int) -> None:
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as http:
+        await http.get(url)
+        remaining, latencies, errors = [requests], [], [0]
+        start = time.perf_counter()
+        await asyncio.gather(*(client(http, url, remaining, latencies, errors) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    print(f'{url} with {clients} clients')
+    print(f'  requests/sec: {len(latencies) / elapsed:10.1f}')
+    print(f'  p50 latency:  {percentile(0.50):10.1f} ms')
+    print(f'  p99 latency:  {percentile(0.99):10.1f} ms')
+    print(f'  errors:       {errors[0]:10d}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('url', nargs='?', default='http://localhost:1561/api/equipment')
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=10_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.clients, args.requests))
@@ -0,0 +1,98 @@
+"""Benchmark `OccupancyService.grid` against bucketing booked reservations in Python over a year of bookings.
+
+Equipment and bookings are inserted inside a transaction which is rolled back at the end, so the development
+database is left untouched.
+
+Usage: python3 -m backend.script.benchmark.occupancy
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import Range
+from sqlalchemy.orm import Session
+from ...database import engine
+from ...entities import ReservationEntity
+from ...env import getenv
+from ...services import OccupancyService, PermissionService
+from ...services.occupancy import BUCKET
+from ..dev_data.users import root
+
+if getenv("MODE") != "development":
+    print("This script can only be run in development mode.", file=sys.stderr)
+    print("Add MODE=development to your .env file in workspace's `backend/` directory")
+    exit(1)
+
+TYPES = 10
+ITEMS_PER_TYPE = 50
+YEAR = datetime(2031, 1, 1, tzinfo=timezone.utc)
+
+
+def naive_grid(session: Session, start: datetime, end: datetime) -> dict[str, list[int]]:
+    """The grid computed by loading every booking in the window and bucketing it in Python."""
+    length = (end - start) // BUCKET
+    grid: dict[str, list[int]] = {}
+    query = select(ReservationEntity).where(ReservationEntity.during.overlaps(Range(start, end, bounds='[)')))
+    for reservation in session.scalars(query):
+        row = grid.setdefault(reservation.type, [0] * length)
+        first = max(0, (reservation.during.lower - start) // BUCKET)
+        last = min(length, -((start - reservation.during.upper) // BUCKET))
+        for bucket in range(first, last):
+            row[bucket] += 1
+    return grid
+
+
+def timed(compute, repeat: int = 5) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        compute()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main() -> None:
+    with Session(engine) as session:
+        session.execute(text('''
+            INSERT INTO equipment (id, name, type, status, notes)
+            SELECT 100000 + i, 'Item ' || i, 'type' || (i % :types), 1, ''
+            FROM generate_series(0, :items - 1) AS i'''), {'types': TYPES, 'items': TYPES * ITEMS_PER_TYPE})
+        # Two disjoint bookings per item per weekday: one in the morning and one in the afternoon.
+        inserted = session.execute(text('''
+            INSERT INTO reservation (type, user_id, equipment_id, during)
+            SELECT e.type, 1, e.id, tstzrange(day + make_interval(hours => slot.start), day + make_interval(hours => slot.start + slot.length))
+            FROM equipment e
+            CROSS JOIN generate_series(CAST(:year AS timestamptz), CAST(:year AS timestamptz) + interval '364 days', interval '1 day') AS day
+            CROSS JOIN LATERAL (VALUES
+                (8 + (e.id + extract(doy FROM day)::int) % 3, 1 + (e.id * extract(doy FROM day)::int) % 2),
+                (13 + (e.id + extract(doy FROM day)::int) % 4, 2)
+            ) AS slot(start, length)
+            WHERE e.id >= 100000 AND extract(isodow FROM day) < 6'''), {'year': YEAR}).rowcount
+        session.execute(text('ANALYZE reservation'))
+
+        # The counters `OccupancyService.rebuild` would compute, without its commit.
+        session.execute(text('''
+            INSERT INTO reservation_occupancy (type, bucket, booked)
+            SELECT r.type, bucket, count(*)
+            FROM reservation r, generate_series(date_trunc('hour', lower(r.during), 'UTC'), upper(r.during) - interval '1 microsecond', interval '1 hour') AS bucket
+            WHERE r.during IS NOT NULL
+            GROUP BY r.type, bucket
+            ON CONFLICT (type, bucket) DO UPDATE SET booked = excluded.booked'''))
+        session.execute(text('''
+            INSERT INTO equipment_type_summary (type, available, total)
+            SELECT type, count(*), count(*) FROM equipment WHERE id >= 100000 GROUP BY type
+            ON CONFLICT (type) DO UPDATE SET available = equipment_type_summary.available + excluded.available,
+                                             total = equipment_type_summary.total + excluded.total'''))
+        session.execute(text('ANALYZE reservation_occupancy'))
+
+        occupancy_svc = OccupancyService(session, PermissionService(session))
+        print(f'{inserted:,} bookings of {TYPES * ITEMS_PER_TYPE:,} items')
+        week = (YEAR + timedelta(days=140), YEAR + timedelta(days=147))
+        year = (YEAR, YEAR + timedelta(days=365))
+        for label, (start, end) in (('week', week), ('year', year)):
+            print(f"{label:>5}: naive {timed(lambda: naive_grid(session, start, end), 1 if label == 'year' else 5):9.1f} ms"
+                  f"   grid {timed(lambda: occupancy_svc.grid(root, start, end)):8.1f} ms")
+        session.rollback()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Microbenchmark of permission pattern matching.
+
+Compares `services.permission.compile_pattern` against the previous implementation, which rebuilt a
+regular expression per pattern on every freshly constructed `PermissionService` (one per request).
+
+Usage: python3 -m backend.script.benchmark.permission_patterns
+"""
+
+import re
+import timeit
+from ...services.permission import compile_pattern
+
+PATTERNS = ['*', 'checkin.*', 'user.search', 'equipment/*', 'role.*', 'reservation.*']
+CHECKS = [
+    ('checkin.create', 'checkin'),
+    ('equipment.update', 'equipment/42'),
+    ('user.search', 'user/1'),
+    ('role.details', 'role/3'),
+    ('reservation.filter_type', 'reservation/laptop'),
+]
+ROUNDS = 20_000
+
+
+def legacy_per_request() -> None:
+    """Regexes compiled by a per-request `lru_cache` on `self`: cold for every request."""
+    for action, resource in CHECKS:
+        for pattern in PATTERNS:
+            action_re = re.compile(f"^{pattern.replace('*', '.*')}$")
+            if action_re.fullmatch(action) is not None:
+                resource_re = re.compile(f"^{pattern.replace('*', '.*')}$")
+                resource_re.fullmatch(resource)
+
+
+def compiled() -> None:
+    for action, resource in CHECKS:
+        for pattern in PATTERNS:
+            if compile_pattern(pattern)(action):
+                compile_pattern(pattern)(resource)
+
+
+def main() -> None:
+    matches = ROUNDS * len(CHECKS) * len(PATTERNS)
+    for name, benchmark in (('legacy', legacy_per_request), ('compile_pattern', compiled)):
+        seconds = min(timeit.repeat(benchmark, number=ROUNDS, repeat=3))
+        print(f'{name:>16}: {matches / seconds:>14,.0f} matches/sec')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Benchmark the column tuple and orjson serialization of the list routes against the previous model path.
+
+The previous path built an entity and a Pydantic model per row, which FastAPI then validated against the
+route's `response_model`, converted with `jsonable_encoder` and encoded with the standard library. Both paths
+are timed through the routes' own response fields and response classes, without the HTTP layer.
+
+Rows are inserted inside a transaction which is rolled back at the end, so the development database is left
+untouched.
+
+Usage: python3 -m backend.script.benchmark.serialization
+"""
+
+import asyncio
+import json
+import sys
+import time
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from ...database import engine
+from ...env import getenv
+from ...models import PaginationParams
+from ...services import EquipmentService, PermissionService, ReservationService, UserService, OccupancyService, ReservationHistoryService
+from ...services.equipment import SerializedListing, LISTING_FIELDS, listing_query
+from ...api import reservation
+from ...api.admin import users
+from ..dev_data.users import root
+
+if getenv("MODE") != "development":
+    print("This script can only be run in development mode.", file=sys.stderr)
+    print("Add MODE=development to your .env file in workspace's `backend/` directory")
+    exit(1)
+
+ROWS = 20_000
+
+
+def response_field(router, path: str):
+    return next(route.response_field for route in router.routes
+                if isinstance(route, APIRoute) and route.path == path and 'GET' in route.methods)
+
+
+def model_response(field, content) -> bytes:
+    """The body FastAPI renders for a route returning models: validate, `jsonable_encoder`, `json.dumps`."""
+    return JSONResponse(asyncio.run(serialize_response(field=field, response_content=content))).body
+
+
+def timed(render, repeat: int = 5) -> float:
+    """Rows serialized per second by `render`, which returns the number of rows it serialized."""
+    start = time.perf_counter()
+    rows = sum(render() for _ in range(repeat))
+    return rows / (time.perf_counter() - start)
+
+
+def main() -> None:
+    with Session(engine) as session:
+        session.execute(text('''
+            INSERT INTO equipment (id, name, type, status, notes)
+            SELECT 100000 + i, 'Item ' || i, 'type' || (i % 10), 1, 'Generated for the serialization benchmark'
+            FROM generate_series(0, :rows - 1) AS i'''), {'rows': ROWS})
+        session.execute(text('''
+            INSERT INTO "user" (id, pid, onyen, email, first_name, last_name, pronouns)
+            SELECT 100000 + i, 200000000 + i, 'user' || i, 'user' || i || '@unc.edu', 'First' || i, 'Last' || i, 'they / them'
+            FROM generate_series(0, :rows - 1) AS i'''), {'rows': ROWS})
+        session.execute(text('''
+            INSERT INTO reservation (type, user_id, equipment_id, notes)
+            SELECT 'type' || (i % 10), 100000 + i, 100000 + i, ''
+            FROM generate_series(0, :rows - 1) AS i'''), {'rows': ROWS})
+
+        permission = PermissionService(session)
+        equipment_svc = EquipmentService(session, permission)
+        reservation_svc = ReservationService(session, equipment_svc, permission, OccupancyService(session, permission), ReservationHistoryService(session, permission))
+        user_svc = UserService(session, permission)
+        page = PaginationParams(page_size=1000, order_by='id')
+        reservations_field = response_field(reservation.api, '/api/reservation')
+        users_field = response_field(users.api, '/api/admin/users')
+
+        def before_equipment():
+            models = equipment_svc.list()
+            json.dumps([model.dict() for model in models], separators=(',', ':')).encode()
+            return len(models)
+
+        def after_equipment():
+            rows = session.execute(listing_query()).all()
+            SerializedListing.of_rows(LISTING_FIELDS, rows)
+            return len(rows)
+
+        def before_reservations():
+            models = reservation_svc.list()
+            model_response(reservations_field, models)
+            return len(models)
+
+        def after_reservations():
+            rows = reservation_svc.list_rows()
+            ORJSONResponse(rows)
+            return len(rows)
+
+        def before_users():
+            result = user_svc.list(root, page)
+            model_response(users_field, result)
+            return len(result.items)
+
+        def after_users():
+            result = user_svc.list_rows(root, page)
+            ORJSONResponse(result)
+            return len(result['items'])
+
+        print(f'{ROWS:,} generated rows of each; rows/second, higher is better')
+        for label, before, after in (
+            ('equipment (uncached)', before_equipment, after_equipment),
+            ('reservations', before_reservations, after_reservations),
+            ('users (1000 per page)', before_users, after_users),
+        ):
+            print(f'{label:>22}: before {timed(before):10,.0f}   after {timed(after):10,.0f}')
+        session.rollback()
+
+
+if __name__ == '__main__':
+    main()
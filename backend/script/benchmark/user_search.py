@@ -0,0 +1,82 @@
+"""Benchmark `UserService.search` against the previous `ILIKE '%q%'` search over 100k generated users.
+
+Users are inserted inside a transaction which is rolled back at the end, so the development database
+is left untouched.
+
+Usage: python3 -m backend.script.benchmark.user_search
+"""
+
+import random
+import string
+import sys
+import time
+from sqlalchemy import insert, select, or_, text
+from sqlalchemy.orm import Session
+from ...database import engine
+from ...entities import UserEntity
+from ...env import getenv
+from ...models import User
+from ...services import UserService, PermissionService
+
+if getenv("MODE") != "development":
+    print("This script can only be run in development mode.", file=sys.stderr)
+    print("Add MODE=development to your .env file in workspace's `backend/` directory")
+    exit(1)
+
+USERS = 100_000
+FIRST_NAMES = ['Jane', 'John', 'Sol', 'Arden', 'Merritt', 'Kris', 'Alex', 'Sam', 'Taylor', 'Jordan', 'Riley', 'Casey']
+LAST_NAMES = ['Doe', 'Smith', 'Student', 'Ambassador', 'Manager', 'Jordan', 'Nguyen', 'Garcia', 'Kim', 'Patel']
+QUERIES = ['jane', 'jane doe', 'smi', 'kim tay', 'xq', 'garcia@unc']
+
+
+def generate_users(count: int):
+    rng = random.Random(42)
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        suffix = ''.join(rng.choices(string.ascii_lowercase, k=4))
+        onyen = f'{first[0]}{last}{suffix}'.lower()[:24] + str(i)
+        yield {
+            'pid': 200_000_000 + i,
+            'onyen': onyen,
+            'email': f'{onyen}@unc.edu',
+            'first_name': first,
+            'last_name': last,
+            'pronouns': '',
+        }
+
+
+def legacy_search(session: Session, query: str) -> list[User]:
+    criteria = or_(
+        UserEntity.first_name.ilike(f'%{query}%'),
+        UserEntity.last_name.ilike(f'%{query}%'),
+        UserEntity.onyen.ilike(f'%{query}%'),
+        UserEntity.email.ilike(f'%{query}%'),
+    )
+    return [entity.to_model() for entity in session.execute(select(UserEntity).where(criteria).limit(10)).scalars()]
+
+
+def timed(search, repeat: int = 20) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in QUERIES:
+            search(query)
+    return (time.perf_counter() - start) * 1000 / (repeat * len(QUERIES))
+
+
+def main() -> None:
+    with Session(engine) as session:
+        users = list(generate_users(USERS))
+        for chunk in range(0, USERS, 10_000):
+            session.execute(insert(UserEntity), users[chunk:chunk + 10_000])
+        session.execute(text('ANALYZE "user"'))
+
+        user_svc = UserService(session, PermissionService(session))
+        subject = User(pid=0)
+        print(f'{USERS:,} users')
+        print(f"{'ILIKE (previous)':>18}: {timed(lambda q: legacy_search(session, q)):8.2f} ms/query")
+        print(f"{'search_vector':>18}: {timed(lambda q: user_svc.search(subject, q)):8.2f} ms/query")
+        session.rollback()
+
+
+if __name__ == '__main__':
+    main()
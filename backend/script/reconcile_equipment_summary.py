@@ -0,0 +1,24 @@
+"""Verify the per-type equipment counters against a full scan of the equipment table and fix any drift.
+
+Creates the counters table if it does not exist yet, so this also backfills the summary of an existing
+database. Exits with status 1 if any counters had to be corrected, for use from a scheduled job.
+
+Usage: python3 -m backend.script.reconcile_equipment_summary
+"""
+
+import sys
+from sqlalchemy.orm import Session
+from ..database import engine
+from ..entities import EquipmentTypeSummaryEntity
+from ..services import EquipmentService, PermissionService
+
+
+EquipmentTypeSummaryEntity.__table__.create(engine, checkfirst=True)
+
+with Session(engine) as session:
+    corrected = EquipmentService(session, PermissionService(session)).reconcile_summary()
+
+for summary in corrected:
+    print(f"Corrected `{summary.type}`: {summary.available} available of {summary.total}")
+print(f"{len(corrected)} equipment types corrected")
+sys.exit(1 if corrected else 0)
@@ -70,6 +70,11 @@ with Session(engine) as session:
     session.execute(text(f'ALTER SEQUENCE {entities.EquipmentEntity.__table__}_id_seq RESTART WITH {len(equipment.models) + 1}'))
     session.commit()
 
+# Count Equipment by Type
+with Session(engine) as session:
+    from ..services import EquipmentService, PermissionService
+    EquipmentService(session, PermissionService(session)).reconcile_summary()
+
 # Add Reservation
 with Session(engine) as session:
     from .dev_data import reservation
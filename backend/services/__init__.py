@@ -1,5 +1,8 @@
 from .user import UserService
 from .permission import PermissionService, UserPermissionError
 from .role import RoleService
-from .equipment import EquipmentService
+from .equipment import EquipmentService, EquipmentUnavailableError, InsufficientEquipmentError
+from .occupancy import OccupancyService
+from .reservation_history import ReservationHistoryService
+from .overdue import OverdueService
 from .reservation import ReservationService
\ No newline at end of file
@@ -0,0 +1,11 @@
+"""Async variants of the hot read paths of the service layer.
+
+These services run on an `AsyncSession` from `database.async_db_session` so the routes of `api.aio`
+can await the database from the event loop instead of occupying a worker of Starlette's threadpool.
+They share caches, queries and models with their synchronous counterparts in `services`.
+"""
+
+from .permission import AsyncPermissionService
+from .user import AsyncUserService
+from .equipment import AsyncEquipmentService
+from .reservation import AsyncReservationService
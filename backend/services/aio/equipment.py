@@ -0,0 +1,58 @@
+"""Async counterpart of `services.equipment.EquipmentService` for read paths."""
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...database import async_db_session
+from ...models import Equipment
+from ...entities import EquipmentEntity
+from ..equipment import SerializedListing, LISTING_FIELDS, listing_query, _listings
+from ..fields import parse_fields
+from .permission import AsyncPermissionService
+
+
+class AsyncEquipmentService:
+
+    _session: AsyncSession
+    _permission: AsyncPermissionService
+
+    def __init__(self, session: AsyncSession = Depends(async_db_session), permission: AsyncPermissionService = Depends()):
+        self._session = session
+        self._permission = permission
+
+    async def get(self, id: int) -> Equipment | None:
+        """Function that returns an Equipment based on a given id, or None if it doesn't exist."""
+        equipment_entity = await self._session.get(EquipmentEntity, id)
+        if equipment_entity is None:
+            return None
+        return equipment_entity.to_model()
+
+    async def get_row(self, id: int, fields: str = '') -> dict | None:
+        """Async `EquipmentService.get_row`: an Equipment as a JSON-ready dict with only the requested fields.
+
+        Throws:
+            A ValueError if a field does not exist"""
+        selected = parse_fields(fields, LISTING_FIELDS)
+        row = (await self._session.execute(listing_query(EquipmentEntity.id == id, fields=selected))).first()
+        return None if row is None else dict(zip(selected, row))
+
+    async def cached_list(self, fields: str = '') -> SerializedListing:
+        """Function that returns the serialized full list of equipment, from cache when unchanged."""
+        return await self._cached(('list',), fields)
+
+    async def cached_filter_type(self, type: str, fields: str = '') -> SerializedListing:
+        """Function that returns the serialized list of equipment of a type, from cache when unchanged."""
+        return await self._cached(('type', type), fields, EquipmentEntity.type.ilike(type))
+
+    async def cached_filter_status(self, status: int, fields: str = '') -> SerializedListing:
+        """Function that returns the serialized list of equipment of a status, from cache when unchanged."""
+        return await self._cached(('status', status), fields, EquipmentEntity.status == status)
+
+    async def _cached(self, key: tuple, fields: str, *criteria) -> SerializedListing:
+        fields = parse_fields(fields, LISTING_FIELDS)
+        key = (*key, fields)
+        generation = _listings.generation
+        listing = _listings.get(key, generation)
+        if listing is None:
+            listing = SerializedListing.of_rows(fields, await self._session.execute(listing_query(*criteria, fields=fields)))
+            _listings.set(key, listing, generation)
+        return listing
@@ -0,0 +1,33 @@
+"""Async counterpart of `services.permission.PermissionService` for read paths."""
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...database import async_db_session
+from ...models import User
+from ..permission import CompiledPermissions, UserPermissionError, _compiled_permissions, _subject_permissions_query
+
+
+class AsyncPermissionService:
+
+    _session: AsyncSession
+
+    def __init__(self, session: AsyncSession = Depends(async_db_session)):
+        self._session = session
+
+    async def enforce(self, subject: User, action: str, resource: str) -> None:
+        if await self.check(subject, action, resource) is False:
+            raise UserPermissionError(action, resource)
+
+    async def check(self, subject: User, action: str, resource: str) -> bool:
+        compiled = await self._compiled(subject)
+        return compiled.allows(action, resource)
+
+    async def _compiled(self, subject: User) -> CompiledPermissions:
+        if subject.id is None:
+            return CompiledPermissions([])
+        compiled = _compiled_permissions.get(subject.id)
+        if compiled is None:
+            result = await self._session.execute(_subject_permissions_query(subject.id))
+            compiled = CompiledPermissions([p.to_model() for p in result.scalars()])
+            _compiled_permissions.set(subject.id, compiled)
+        return compiled
@@ -0,0 +1,91 @@
+"""Async counterpart of `services.reservation.ReservationService` for read paths."""
+
+from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, contains_eager
+from ...database import async_db_session
+from ...models import Reservation, User
+from ...entities import ReservationEntity, UserEntity
+from ..fields import parse_fields
+from ..reservation import _LOAD_RELATIONS, _ROW_FIELDS, _ROW_GROUPS, rows_query, rows_of, of_user, COMPACT_QUERY, compact_rows, side_load_queries, compact_listing
+from .permission import AsyncPermissionService
+
+
+class AsyncReservationService:
+
+    _session: AsyncSession
+    _permission: AsyncPermissionService
+
+    def __init__(self, session: AsyncSession = Depends(async_db_session), permission: AsyncPermissionService = Depends()):
+        self._session = session
+        self._permission = permission
+
+    async def get(self, id: int) -> Reservation | None:
+        """Function that returns a reservation based on a given id, or None if it doesn't exist."""
+        query = select(ReservationEntity).where(ReservationEntity.id == id).options(*_LOAD_RELATIONS)
+        reservation_entity = await self._session.scalar(query)
+        if reservation_entity is None:
+            return None
+        return reservation_entity.to_model()
+
+    async def get_row(self, id: int, fields: str = '') -> dict | None:
+        """Async `ReservationService.get_row`: a reservation as a JSON-ready dict with only the requested fields.
+
+        Throws:
+            A ValueError if a field does not exist"""
+        rows = await self._rows(fields, ReservationEntity.id == id)
+        return rows[0] if rows else None
+
+    async def filter_type(self, type: str, subject: User) -> list[Reservation]:
+        """Funtion that returns a list of reservation based on the type of equipment.
+
+        Throws:
+            A UserPermissionError if the user doesn't have permission to filter reservations by type"""
+        await self._permission.enforce(subject, 'reservation.filter_type', f'reservation/{type}')
+        query = select(ReservationEntity).where(ReservationEntity.type.ilike(type)).options(*_LOAD_RELATIONS).order_by(ReservationEntity.id)
+        return [entity.to_model() for entity in await self._session.scalars(query)]
+
+    async def filter_type_rows(self, type: str, subject: User, fields: str = '') -> "list[dict]":
+        """Async `ReservationService.filter_type_rows`: the reservations of a type with only the requested fields.
+
+        Throws:
+            A UserPermissionError if the user doesn't have permission to filter reservations by type
+            A ValueError if a field does not exist"""
+        await self._permission.enforce(subject, 'reservation.filter_type', f'reservation/{type}')
+        return await self._rows(fields, ReservationEntity.type.ilike(type))
+
+    async def filter_user(self, user_pid: int) -> list[Reservation]:
+        """Funtion that returns a list of reservation based on the pid of the user associated with the reservation."""
+        query = (
+            select(ReservationEntity)
+            .join(ReservationEntity.user)
+            .where(UserEntity.pid == user_pid)
+            .options(contains_eager(ReservationEntity.user), joinedload(ReservationEntity.equipment))
+            .order_by(ReservationEntity.id)
+        )
+        return [entity.to_model() for entity in await self._session.scalars(query)]
+
+    async def filter_user_rows(self, user_pid: int, fields: str = '') -> "list[dict]":
+        """Async `ReservationService.filter_user_rows`: the reservations of a user with only the requested fields.
+
+        Throws:
+            A ValueError if a field does not exist"""
+        return await self._rows(fields, of_user(user_pid))
+
+    async def list_rows(self, fields: str = '') -> "list[dict]":
+        """Async `ReservationService.list_rows`: all reservations as JSON-ready dicts with only the requested fields.
+
+        Throws:
+            A ValueError if a field does not exist"""
+        return await self._rows(fields)
+
+    async def list_compact(self) -> dict:
+        """Async `ReservationService.list_compact`: all reservations with their users and equipment side-loaded."""
+        reservations = compact_rows(await self._session.execute(COMPACT_QUERY))
+        users_query, equipment_query = side_load_queries(reservations)
+        return compact_listing(reservations, await self._session.execute(users_query), await self._session.execute(equipment_query))
+
+    async def _rows(self, fields: str, *criteria) -> "list[dict]":
+        selected = parse_fields(fields, _ROW_FIELDS, _ROW_GROUPS)
+        return rows_of(selected, await self._session.execute(rows_query(selected, *criteria)))
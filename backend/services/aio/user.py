@@ -0,0 +1,39 @@
+"""Async counterpart of `services.user.UserService` for read paths."""
+
+from typing import Callable
+from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...database import async_db_session
+from ...models import User
+from ...entities import UserEntity
+from ..user import _search_statement, _authenticated, _token_ttl
+
+
+class AsyncUserService:
+
+    _session: AsyncSession
+
+    def __init__(self, session: AsyncSession = Depends(async_db_session)):
+        self._session = session
+
+    async def authenticate(self, token: str, claims: Callable[[str], dict]) -> User | None:
+        """Async `UserService.authenticate` without permissions, sharing its cache of users by token."""
+        generation = _authenticated.generation
+        user = _authenticated.get(token, generation)
+        if user is None:
+            auth_info = claims(token)
+            query = select(UserEntity).where(UserEntity.pid == auth_info['pid'])
+            user_entity: UserEntity = await self._session.scalar(query)
+            if user_entity is None:
+                return None
+            user = user_entity.to_model()
+            _authenticated.set(token, user, generation, _token_ttl(auth_info))
+        return user.copy()
+
+    async def search(self, subject: User, query: str) -> list[User]:
+        statement = _search_statement(query)
+        if statement is None:
+            return []
+        entities = await self._session.scalars(statement)
+        return [entity.to_model() for entity in entities]
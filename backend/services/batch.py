@@ -0,0 +1,40 @@
+"""Lookups of several rows by id in a single statement, behind the `/batch` routes.
+
+A screen showing a set of items would otherwise request each by id, costing a round trip and a `SELECT`
+apiece. A batch binds its ids as one array parameter of `id = ANY(:ids)`, so every batch size shares the
+same statement text, and returns the models in the order the ids were requested.
+"""
+
+from typing import Iterable, Mapping, TypeVar
+from sqlalchemy import ColumnElement, Integer, any_, literal
+from sqlalchemy.dialects.postgresql import ARRAY
+from ..models import Batch
+
+T = TypeVar("T")
+
+MAX_BATCH_SIZE = 100
+"""Most distinct ids a single batch may look up."""
+
+
+def batch_ids(ids: Iterable[int]) -> list[int]:
+    """The distinct `ids` in the order given.
+
+    Throws:
+        A ValueError if there are more than `MAX_BATCH_SIZE` of them"""
+    distinct = list(dict.fromkeys(ids))
+    if len(distinct) > MAX_BATCH_SIZE:
+        raise ValueError(f'A batch may look up at most {MAX_BATCH_SIZE} ids, not {len(distinct)}')
+    return distinct
+
+
+def any_id(column: ColumnElement[int], ids: list[int]) -> ColumnElement[bool]:
+    """`column = ANY(:ids)`, with the ids bound as a single array parameter."""
+    return column == any_(literal(ids, ARRAY(Integer)))
+
+
+def ordered_batch(ids: list[int], found: Mapping[int, T]) -> Batch[T]:
+    """The models `found` by id, in the order of `ids`, and the ids none was found for."""
+    return Batch(
+        items=[found[id] for id in ids if id in found],
+        missing=[id for id in ids if id not in found],
+    )
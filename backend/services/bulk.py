@@ -0,0 +1,114 @@
+"""Streaming readers and writers for bulk equipment import and export.
+
+Readers consume the request body as an iterable of byte chunks and yield `(line, row)` pairs one at a
+time, so an upload of any size is parsed in constant memory. Writers do the reverse for exports,
+encoding one model at a time. Two formats are supported:
+
+* `ndjson`: one JSON object per line.
+* `csv`: a header row naming the columns followed by one row per item.
+"""
+
+import csv
+import io
+import json
+from typing import Any, Iterable, Iterator
+from pydantic import BaseModel
+
+FORMATS = ('ndjson', 'csv')
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+class RowError(ValueError):
+    """A row of a bulk upload that could not be parsed."""
+
+
+def _lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Split a stream of byte chunks into decoded lines, keeping their line endings."""
+    buffer = b''
+    for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            yield line.decode('utf-8-sig') + '\n'
+    if buffer:
+        yield buffer.decode('utf-8-sig')
+
+
+def read_ndjson(chunks: Iterable[bytes]) -> Iterator[tuple[int, dict[str, Any] | RowError]]:
+    """Yield each non-blank line of an NDJSON stream as a dict, or the RowError it failed with."""
+    for line_number, line in enumerate(_lines(chunks), start=1):
+        if line.strip() == '':
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, RowError(f'Invalid JSON: {e.msg}')
+            continue
+        if not isinstance(row, dict):
+            yield line_number, RowError('Expected a JSON object')
+        else:
+            yield line_number, row
+
+
+def read_csv(chunks: Iterable[bytes]) -> Iterator[tuple[int, dict[str, Any] | RowError]]:
+    """Yield each data row of a CSV stream as a dict keyed by the header row.
+
+    Empty cells are omitted from the row so that model defaults apply."""
+    reader = csv.reader(_lines(chunks))
+    header = next(reader, None)
+    if header is None:
+        return
+    header = [column.strip() for column in header]
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        if len(values) != len(header):
+            yield reader.line_num, RowError(f'Expected {len(header)} columns but found {len(values)}')
+            continue
+        yield reader.line_num, {column: value for column, value in zip(header, values) if value != ''}
+
+
+def write_ndjson(models: Iterable[BaseModel]) -> Iterator[bytes]:
+    for model in models:
+        yield (model.json() + '\n').encode()
+
+
+def write_csv(models: Iterable[BaseModel], columns: list[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(columns)
+    for model in models:
+        writer.writerow([getattr(model, column) for column in columns])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def read(format: str, chunks: Iterable[bytes]) -> Iterator[tuple[int, dict[str, Any] | RowError]]:
+    """Parse a stream in `format`, yielding `(line, row)` pairs.
+
+    Raises:
+        ValueError: if the format is not supported."""
+    if format == 'ndjson':
+        return read_ndjson(chunks)
+    if format == 'csv':
+        return read_csv(chunks)
+    raise ValueError(f'Unsupported format `{format}`, expected one of {", ".join(FORMATS)}')
+
+
+def write(format: str, models: Iterable[BaseModel], columns: list[str]) -> Iterator[bytes]:
+    """Encode models in `format`, yielding one chunk per model.
+
+    Raises:
+        ValueError: if the format is not supported."""
+    if format == 'ndjson':
+        return write_ndjson(models)
+    if format == 'csv':
+        return write_csv(models, columns)
+    raise ValueError(f'Unsupported format `{format}`, expected one of {", ".join(FORMATS)}')
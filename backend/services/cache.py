@@ -0,0 +1,131 @@
+"""Small, thread-safe caching primitives shared by the service layer.
+
+FastAPI runs our synchronous route handlers on a threadpool, so any process-level cache must be safe
+to use from many threads at once. `TTLCache` combines a time-to-live on every entry with least-recently-used
+eviction once the cache reaches `maxsize`, which bounds both staleness and memory.
+
+`VersionedCache` layers a generation counter over a `TTLCache` for results that many different writes can
+invalidate at once: writers bump the generation and every entry stored under an older one stops being
+served, without tracking which keys a write affected.
+
+Every cache constructed here is tracked so that `clear_all` can reset process-level state, e.g. between
+tests that rebuild the database from scratch.
+"""
+
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_caches: "weakref.WeakSet[TTLCache]" = weakref.WeakSet()
+
+
+class TTLCache(Generic[K, V]):
+    """Bounded mapping whose entries expire `ttl` seconds after they are set."""
+
+    maxsize: int
+    ttl: float
+    hits: int
+    misses: int
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        _caches.add(self)
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        """Return the live value for `key`, or `default` if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """Store `value` under `key`, evicting the least recently used entries beyond `maxsize`."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        """Remove and return the value stored for `key`, if any."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return None if entry is None else entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """Size and hit rate counters, useful for health and metrics endpoints."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class VersionedCache(Generic[K, V]):
+    """TTLCache whose entries are all invalidated at once by `bump`.
+
+    Readers must capture `generation` *before* loading the value they store. A write that commits while the
+    value is being loaded then bumps past the captured generation, so a stale value is never served."""
+
+    generation: int
+    ttl: float
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.ttl = ttl
+        self.generation = 0
+        self._entries: TTLCache[tuple[int, K], V] = TTLCache(maxsize, ttl)
+        self._lock = threading.Lock()
+
+    def bump(self) -> int:
+        """Invalidate every entry and return the new generation."""
+        with self._lock:
+            self.generation += 1
+            return self.generation
+
+    def get(self, key: K, generation: int) -> V | None:
+        return self._entries.get((generation, key))
+
+    def set(self, key: K, value: V, generation: int, ttl: float | None = None) -> None:
+        if generation == self.generation:
+            self._entries.set((generation, key), value, ttl)
+
+    def stats(self) -> dict[str, int | float]:
+        return self._entries.stats() | {"generation": self.generation}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def clear_all() -> None:
+    """Empty every cache created in this process."""
+    for cache in list(_caches):
+        cache.clear()
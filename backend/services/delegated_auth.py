@@ -0,0 +1,93 @@
+"""Verification of tokens issued by the delegated authentication server for development and staging logins.
+
+Deployments other than production cannot authenticate users themselves, so they redirect to the production
+server and verify the token it hands back with a request to its `/verify` route. `DelegatedAuthVerifier`
+makes that request on a single pooled `httpx.AsyncClient`, reusing connections and TLS sessions across
+logins, and awaits it without holding a threadpool worker. Requests are bounded by timeouts and retried with
+exponential backoff on connection errors and 5xx responses. Verified tokens are remembered briefly, so a
+browser retrying a login redirect does not verify the same token again.
+
+The verifier takes an optional `httpx` transport, letting tests and local setups plug in a stand-in auth
+server such as an `httpx.MockTransport`.
+"""
+
+import asyncio
+import logging
+import httpx
+from .cache import TTLCache
+
+TIMEOUT = httpx.Timeout(5.0, connect=2.0)
+"""Seconds to wait for the auth server: connecting, and every other phase of a request."""
+
+RETRIES = 2
+"""Attempts after the first when the auth server is unreachable or fails."""
+
+BACKOFF = 0.2
+"""Seconds before the first retry, doubling on each following one."""
+
+LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+"""Connections kept to the auth server. Logins beyond `max_connections` wait for a free one."""
+
+logger = logging.getLogger(__name__)
+
+
+class DelegatedAuthError(Exception):
+    """Raised when the auth server cannot be reached or keeps failing, as opposed to rejecting a token."""
+
+    def __init__(self, message: str):
+        super().__init__(f'Could not verify the token with the auth server: {message}')
+
+
+class DelegatedAuthVerifier:
+
+    def __init__(
+        self,
+        base_url: str,
+        transport: httpx.AsyncBaseTransport | None = None,
+        timeout: httpx.Timeout = TIMEOUT,
+        retries: int = RETRIES,
+        backoff: float = BACKOFF,
+        cache_ttl: float = 60,
+    ):
+        self._client = httpx.AsyncClient(base_url=base_url, transport=transport, timeout=timeout, limits=LIMITS)
+        self._retries = retries
+        self._backoff = backoff
+        self._verified: TTLCache[str, tuple[str, int]] = TTLCache(maxsize=1024, ttl=cache_ttl)
+
+    async def verify(self, token: str) -> tuple[str, int] | None:
+        """Verify a token with the auth server.
+
+        Args:
+            The token the auth server issued
+
+        Returns:
+            The onyen and pid the token was issued to, or None if the auth server rejects it
+
+        Throws:
+            A DelegatedAuthError if the auth server is unreachable or fails on every attempt"""
+        verified = self._verified.get(token)
+        if verified is not None:
+            return verified
+
+        for attempt in range(self._retries + 1):
+            if attempt > 0:
+                await asyncio.sleep(self._backoff * 2 ** (attempt - 1))
+            try:
+                response = await self._client.get('/verify', params={'token': token})
+            except httpx.TransportError as e:
+                logger.warning('Auth server request failed (attempt %d): %r', attempt + 1, e)
+                failure = repr(e)
+                continue
+            if response.status_code >= 500:
+                failure = f'HTTP {response.status_code}'
+                continue
+            if response.status_code != httpx.codes.OK:
+                return None
+            body = response.json()
+            verified = (body['uid'], int(body['pid']))
+            self._verified.set(token, verified)
+            return verified
+        raise DelegatedAuthError(failure)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
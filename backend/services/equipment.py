@@ -1,13 +1,155 @@
 """This class holds the service methods that interact with the database equipment table."""
 
+import hashlib
+import orjson
+from typing import Any, Iterable, Iterator, NamedTuple, Self, Sequence
 from fastapi import Depends
-from sqlalchemy import select
+from pydantic import ValidationError
+from datetime import datetime, timezone
+from sqlalchemy import ColumnElement, Select, select, insert, update, exists, func, tuple_, event, text
+from sqlalchemy.dialects.postgresql import Range, insert as pg_insert
+from sqlalchemy.exc import IntegrityError, DataError
 from sqlalchemy.orm import Session
 from ..database import db_session
-from ..models import Equipment, User
-from ..entities import EquipmentEntity
+from ..models import Batch, Equipment, User, EquipmentPaginationParams, EquipmentPage, EquipmentImportError, EquipmentImportReport, EquipmentStatusChange, EquipmentTypeSummary
+from ..entities import EquipmentEntity, EquipmentTypeSummaryEntity, ReservationEntity
+from ..datetimes import as_utc
+from . import equipment_events
+from .batch import batch_ids, any_id, ordered_batch
+from .cache import TTLCache, VersionedCache
+from .fields import parse_fields
+from .pagination import encode_cursor, decode_seek_key
 from .permission import PermissionService
 
+MAX_PAGE_SIZE = 100
+
+IMPORT_CHUNK_SIZE = 1000
+"""Rows inserted, and committed, per transaction of a bulk import."""
+
+EXPORT_BATCH_SIZE = 1000
+"""Rows fetched per round trip from the server-side cursor of a streaming export."""
+
+# Columns equipment pages may be ordered by; each is indexed together with `id` for keyset seeks.
+_ORDER_COLUMNS = {
+    'id': EquipmentEntity.id,
+    'name': EquipmentEntity.name,
+    'type': EquipmentEntity.type,
+    'status': EquipmentEntity.status,
+}
+
+# Total counts for paginated listings keyed by filter. Writes clear it; the TTL bounds staleness from
+# other worker processes.
+_page_counts: TTLCache[tuple, int] = TTLCache(maxsize=256, ttl=30)
+
+
+
+class SerializedListing(NamedTuple):
+    """A JSON encoded list of models and the strong ETag of that encoding."""
+    body: bytes
+    etag: str
+
+    @classmethod
+    def of_rows(cls, fields: Sequence[str], rows: Iterable[Sequence]) -> Self:
+        """Encode rows of column values as objects keyed by `fields`, without building a model per row."""
+        body = orjson.dumps([dict(zip(fields, row)) for row in rows])
+        return cls(body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+
+
+# Fields of the Equipment model, each read from the column of the same name. Serialized listings select
+# the columns of the requested fields directly, so a listing costs one tuple per row rather than an entity
+# and a model.
+LISTING_FIELDS = tuple(Equipment.__fields__)
+
+
+def listing_query(*criteria, fields: Sequence[str] = LISTING_FIELDS) -> Select:
+    return select(*(getattr(EquipmentEntity, field) for field in fields)).where(*criteria)
+
+
+# Fields of the EquipmentTypeSummary model, each read from the summary table's column of the same name.
+SUMMARY_FIELDS = tuple(EquipmentTypeSummary.__fields__)
+
+
+def summary_query() -> Select:
+    return (
+        select(*(getattr(EquipmentTypeSummaryEntity, field) for field in SUMMARY_FIELDS))
+        .where(EquipmentTypeSummaryEntity.total > 0)
+        .order_by(EquipmentTypeSummaryEntity.type)
+    )
+
+
+# Serialized results of the equipment list and filter routes, keyed by filter. Every committed write to
+# the equipment table bumps the generation; the TTL bounds staleness from writes in other worker processes.
+_listings: VersionedCache[tuple, SerializedListing] = VersionedCache(maxsize=256, ttl=30)
+
+
+def _changed(session: Session, *changes: EquipmentStatusChange) -> None:
+    """Invalidate the equipment listings and publish `changes` once `session`'s current transaction commits.
+
+    Writes that change more than statuses pass no changes, which tells stream subscribers to resync."""
+    session.info.setdefault('equipment_changes', []).extend(changes or [equipment_events.RESYNC])
+
+
+@event.listens_for(Session, 'before_commit')
+def _notify_changes(session: Session) -> None:
+    if equipment_events.notify_enabled and session.info.get('equipment_changes'):
+        equipment_events.notify(session, session.info['equipment_changes'])
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_changes(session: Session) -> None:
+    changes = session.info.pop('equipment_changes', None)
+    if changes is not None:
+        _listings.bump()
+        if not equipment_events.notify_enabled:
+            equipment_events.broker.publish(changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session: Session) -> None:
+    session.info.pop('equipment_changes', None)
+
+
+def _count_by_type(session: Session, *changes: tuple[str, int, int]) -> None:
+    """Apply `(type, status, delta)` changes to the per-type counters in `session`'s transaction.
+
+    All types are upserted by one statement in type order, so concurrent writers lock counter rows in the
+    same order and cannot deadlock."""
+    deltas: dict[str, tuple[int, int]] = {}
+    for type, status, delta in changes:
+        available, total = deltas.get(type, (0, 0))
+        deltas[type] = (available + (delta if status == 1 else 0), total + delta)
+    rows = [
+        {'type': type, 'available': available, 'total': total}
+        for type, (available, total) in sorted(deltas.items()) if available or total
+    ]
+    if rows:
+        statement = pg_insert(EquipmentTypeSummaryEntity).values(rows)
+        statement = statement.on_conflict_do_update(index_elements=[EquipmentTypeSummaryEntity.type], set_={
+            'available': EquipmentTypeSummaryEntity.available + statement.excluded.available,
+            'total': EquipmentTypeSummaryEntity.total + statement.excluded.total,
+        })
+        session.execute(statement)
+
+
+def _booked_now() -> ColumnElement[bool]:
+    """Whether a booking of the equipment row being queried covers the present."""
+    return exists().where(
+        ReservationEntity.equipment_id == EquipmentEntity.id,
+        ReservationEntity.during.contains(func.now()),
+    )
+
+
+class EquipmentUnavailableError(Exception):
+    def __init__(self, equipment_id: int | None):
+        super().__init__(f'Equipment `{equipment_id}` is not available')
+
+class InsufficientEquipmentError(EquipmentUnavailableError):
+    def __init__(self, type: str, requested: int, available: int):
+        Exception.__init__(self, f'Requested {requested} `{type}` but only {available} available')
+        self.type = type
+        self.requested = requested
+        self.available = available
+
 class EquipmentService:
 
     _session: Session
@@ -32,7 +174,39 @@ class EquipmentService:
         else:
             model = equipment_entity.to_model()
             return model
+
+    def get_row(self, id: int, fields: str = '') -> dict | None:
+        """Function that returns an Equipment as a JSON-ready dict with only the requested fields.
+
+        Args:
+            An id as an integer
+            Optionally the comma separated fields to include, e.g. `id,status`; all fields by default
+
+        Returns:
+            The equipment with the given id or None if it doesn't exist
+
+        Throws:
+            A ValueError if a field does not exist"""
+        selected = parse_fields(fields, LISTING_FIELDS)
+        row = self._session.execute(listing_query(EquipmentEntity.id == id, fields=selected)).first()
+        return None if row is None else dict(zip(selected, row))
         
+    def get_many(self, ids: Sequence[int]) -> Batch[Equipment]:
+        """Function that returns the Equipment with the given ids in a single query.
+
+        Args:
+            The ids of the equipment, at most `MAX_BATCH_SIZE` distinct ones
+
+        Returns:
+            The equipment found, in the order of the ids, and the ids of equipment that doesn't exist
+
+        Throws:
+            A ValueError if more than `MAX_BATCH_SIZE` distinct ids are given"""
+        ids = batch_ids(ids)
+        query = select(EquipmentEntity).where(any_id(EquipmentEntity.id, ids))
+        found = {entity.id: entity.to_model() for entity in self._session.scalars(query)}
+        return ordered_batch(ids, found)
+
     def filter_type(self, type: str) -> list[Equipment]:
         """Funtion that returns a list of Equipment based on the type of equipment.
         
@@ -66,6 +240,214 @@ class EquipmentService:
         entities = self._session.execute(query).scalars()
         return [entity.to_model() for entity in entities]
     
+    def available(self, type: str, start: datetime, end: datetime) -> "list[Equipment]":
+        """Function that returns the equipment of a type that is free for the whole of a time window.
+
+        Overlapping bookings are found through the GiST index of the reservation exclusion constraint, so
+        only the bookings in the window are read. A window that includes the present also excludes
+        equipment that is checked out right now.
+
+        Args:
+            An equipment type as a string
+            The start and end of the window
+
+        Returns:
+            The equipment of the given type with no booking overlapping the window, in id order
+
+        Throws:
+            A ValueError if the window does not end after it starts"""
+        return [Equipment(**row) for row in self.available_rows(type, start, end)]
+
+    def available_rows(self, type: str, start: datetime, end: datetime, fields: str = '') -> "list[dict]":
+        """Function that returns the equipment `available` finds as JSON-ready dicts with only the requested fields.
+
+        Args:
+            An equipment type as a string
+            The start and end of the window
+            Optionally the comma separated fields to include, e.g. `id,status`; all fields by default
+
+        Returns:
+            The equipment of the given type with no booking overlapping the window, in id order
+
+        Throws:
+            A ValueError if a field does not exist or the window does not end after it starts"""
+        selected = parse_fields(fields, LISTING_FIELDS)
+        start, end = as_utc(start), as_utc(end)
+        if start >= end:
+            raise ValueError('The window must end after it starts')
+        booked = exists().where(
+            ReservationEntity.equipment_id == EquipmentEntity.id,
+            ReservationEntity.during.overlaps(Range(start, end, bounds='[)')),
+        )
+        query = listing_query(EquipmentEntity.type == type, ~booked, fields=selected)
+        if start <= datetime.now(timezone.utc) < end:
+            query = query.where(EquipmentEntity.status == 1)
+        return [dict(zip(selected, row)) for row in self._session.execute(query.order_by(EquipmentEntity.id))]
+
+    def cached_list(self, fields: str = '') -> SerializedListing:
+        """Function that returns the serialized full list of equipment, from cache when unchanged.
+
+        Args:
+            Optionally the comma separated fields to include, e.g. `id,status`; all fields by default
+
+        Throws:
+            A ValueError if a field does not exist"""
+        return self._cached(('list',), fields)
+
+    def cached_filter_type(self, type: str, fields: str = '') -> SerializedListing:
+        """Function that returns the serialized list of equipment of a type, from cache when unchanged."""
+        return self._cached(('type', type), fields, EquipmentEntity.type.ilike(type))
+
+    def cached_filter_status(self, status: int, fields: str = '') -> SerializedListing:
+        """Function that returns the serialized list of equipment of a status, from cache when unchanged."""
+        return self._cached(('status', status), fields, EquipmentEntity.status == status)
+
+    def summary(self) -> "list[EquipmentTypeSummary]":
+        """Function that returns the number of available and total equipment of each type.
+
+        Reads the counters maintained by every write, so the cost grows with the number of types rather
+        than the size of the inventory.
+
+        Returns:
+            The counts of every type with any equipment, ordered by type"""
+        query = (
+            select(EquipmentTypeSummaryEntity)
+            .where(EquipmentTypeSummaryEntity.total > 0)
+            .order_by(EquipmentTypeSummaryEntity.type)
+        )
+        return [entity.to_model() for entity in self._session.scalars(query)]
+
+    def cached_summary(self) -> SerializedListing:
+        """Function that returns the serialized per-type summary, from cache when unchanged."""
+        return self._serialized(('summary',), SUMMARY_FIELDS, summary_query())
+
+    def reconcile_summary(self) -> "list[EquipmentTypeSummary]":
+        """Function that verifies the per-type counters against a full scan of the equipment table and fixes them.
+
+        Writes to the equipment table are blocked while the scan runs so the counts are exact.
+
+        Returns:
+            The corrected counts of every type whose counters had drifted"""
+        self._session.execute(text(f'LOCK TABLE {EquipmentEntity.__tablename__} IN SHARE MODE'))
+        scan = select(
+            EquipmentEntity.type,
+            func.count().filter(EquipmentEntity.status == 1),
+            func.count(),
+        ).group_by(EquipmentEntity.type)
+        actual = {type: (available, total) for type, available, total in self._session.execute(scan)}
+        stored = {entity.type: entity for entity in self._session.scalars(select(EquipmentTypeSummaryEntity).with_for_update())}
+
+        corrected = []
+        for type in sorted(actual.keys() | stored.keys()):
+            available, total = actual.get(type, (0, 0))
+            entity = stored.get(type)
+            if entity is None:
+                entity = EquipmentTypeSummaryEntity(type=type, available=0, total=0)
+                self._session.add(entity)
+            if (entity.available, entity.total) != (available, total):
+                entity.available, entity.total = available, total
+                corrected.append(entity.to_model())
+        if corrected:
+            _changed(self._session)
+        self._session.commit()
+        return corrected
+
+    def _cached(self, key: tuple, fields: str, *criteria) -> SerializedListing:
+        fields = parse_fields(fields, LISTING_FIELDS)
+        return self._serialized((*key, fields), fields, listing_query(*criteria, fields=fields))
+
+    def _serialized(self, key: tuple, fields: Sequence[str], query: Select) -> SerializedListing:
+        generation = _listings.generation
+        listing = _listings.get(key, generation)
+        if listing is None:
+            listing = SerializedListing.of_rows(fields, self._session.execute(query))
+            _listings.set(key, listing, generation)
+        return listing
+
+    def paginate(self, params: EquipmentPaginationParams) -> EquipmentPage:
+        """Function that returns one page of equipment using keyset pagination.
+
+        Type, status and name (`params.filter`) filters are combined in a single query which seeks past
+        the `params.cursor` row on an indexed (order column, id) key instead of using an offset.
+
+        Args:
+            The pagination parameters and filters
+
+        Returns:
+            The page of equipment, a cached total count of matching equipment and the cursor of the next page
+
+        Throws:
+            A ValueError if the order column or cursor is invalid"""
+        return EquipmentPage(**self.paginate_rows(params))
+
+    def paginate_rows(self, params: EquipmentPaginationParams, fields: str = '') -> dict:
+        """Function that returns the page `paginate` finds as a JSON-ready dict with only the requested item fields.
+
+        Only the columns of the requested fields are selected, plus the order column and id the next cursor
+        is made of.
+
+        Args:
+            The pagination parameters and filters
+            Optionally the comma separated fields to include, e.g. `id,status`; all fields by default
+
+        Returns:
+            A dict in the shape of `EquipmentPage`
+
+        Throws:
+            A ValueError if a field does not exist or the order column or cursor is invalid"""
+        selected = parse_fields(fields, LISTING_FIELDS)
+        order_by = params.order_by or 'id'
+        if order_by not in _ORDER_COLUMNS:
+            raise ValueError(f'Cannot order equipment by `{order_by}`')
+        order_column = _ORDER_COLUMNS[order_by]
+        page_size = max(1, min(params.page_size, MAX_PAGE_SIZE))
+
+        criteria = []
+        if params.type != '':
+            criteria.append(EquipmentEntity.type.ilike(params.type))
+        if params.status is not None:
+            criteria.append(EquipmentEntity.status == params.status)
+        if params.filter != '':
+            criteria.append(EquipmentEntity.name.icontains(params.filter, autoescape=True))
+
+        # The cursor columns follow the selected ones, so each row's leading values are the selected fields.
+        query = listing_query(*criteria, fields=(*selected, order_by, 'id'))
+        if params.cursor != '':
+            key = decode_seek_key(params.cursor, order_by, (order_column, EquipmentEntity.id))
+            query = query.where(tuple_(order_column, EquipmentEntity.id) > tuple_(*key))
+        query = query.order_by(order_column, EquipmentEntity.id).limit(page_size + 1)
+
+        rows = self._session.execute(query).all()
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = encode_cursor(order_by, *rows[-1][-2:])
+
+        return {
+            'items': [dict(zip(selected, row)) for row in rows],
+            'length': self._count((params.type, params.status, params.filter), criteria),
+            'params': params.dict(),
+            'next_cursor': next_cursor,
+        }
+
+    def stream(self, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Equipment]:
+        """Function that yields all equipment in id order without loading it into memory at once.
+
+        Rows are fetched `batch_size` at a time from a server-side cursor.
+
+        Returns:
+            An iterator over every equipment in the database"""
+        query = select(EquipmentEntity).order_by(EquipmentEntity.id).execution_options(yield_per=batch_size)
+        for entity in self._session.scalars(query):
+            yield entity.to_model()
+
+    def _count(self, key: tuple, criteria: list) -> int:
+        length = _page_counts.get(key)
+        if length is None:
+            length = self._session.scalar(select(func.count()).select_from(EquipmentEntity).where(*criteria))
+            _page_counts.set(key, length)
+        return length
+
     def update(self, equipment: Equipment, subject: User) -> Equipment | None:
         """Function that updates an equipment in the database.
         
@@ -79,10 +461,16 @@ class EquipmentService:
         Throws:
             A UserPermissionError if the user doesn't have permission to edit equipment"""
         self._permission.enforce(subject, 'equipment.update', f'equipment/{equipment.id}')
-        entity = self._session.get(EquipmentEntity, equipment.id)
+        entity = self._session.get(EquipmentEntity, equipment.id, with_for_update=True)
         if (entity):
+            _count_by_type(self._session, (entity.type, entity.status, -1), (equipment.type, equipment.status, 1))
+            if (entity.name, entity.type, entity.notes) == (equipment.name, equipment.type, equipment.notes):
+                _changed(self._session, EquipmentStatusChange(id=entity.id, status=equipment.status))
+            else:
+                _changed(self._session)
             entity.update(equipment)
             self._session.commit()
+            _page_counts.clear()
         else:
             self._session.commit()
             return None
@@ -100,7 +488,76 @@ class EquipmentService:
         self._permission.enforce(subject, 'equipment.add', 'equipment/*')
         entity = EquipmentEntity.from_model(equipment)
         self._session.add(entity)
+        _count_by_type(self._session, (equipment.type, equipment.status, 1))
+        _changed(self._session)
         self._session.commit()
+        _page_counts.clear()
+
+    def bulk_add(self, rows: Iterable[tuple[int, dict[str, Any] | Exception]], subject: User, chunk_size: int = IMPORT_CHUNK_SIZE) -> EquipmentImportReport:
+        """Function that adds many equipment to the database in chunked transactions.
+
+        Rows are validated as they arrive and inserted `chunk_size` at a time with a single batched INSERT
+        per chunk. If a chunk violates a constraint it is retried row by row so only the offending rows are
+        rejected. Permission is checked once for the whole import.
+
+        Args:
+            `(line, row)` pairs of raw equipment fields, or of the error a row failed to parse with
+            The user attempting to add the equipment
+
+        Returns:
+            The number of inserted rows and the line and reason of every rejected row
+
+        Throws:
+            A UserPermissionError if the user doesn't have permission to add equipment"""
+        self._permission.enforce(subject, 'equipment.add', 'equipment/*')
+        report = EquipmentImportReport()
+        chunk: list[tuple[int, dict[str, Any]]] = []
+        for line, row in rows:
+            if isinstance(row, Exception):
+                report.errors.append(EquipmentImportError(line=line, message=str(row)))
+                continue
+            try:
+                values = Equipment.parse_obj(row).dict(exclude_none=True)
+            except ValidationError as e:
+                message = '; '.join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+                report.errors.append(EquipmentImportError(line=line, message=message))
+                continue
+            chunk.append((line, values))
+            if len(chunk) >= chunk_size:
+                self._insert_chunk(chunk, report)
+                chunk = []
+        if chunk:
+            self._insert_chunk(chunk, report)
+        report.errors.sort(key=lambda error: error.line)
+        if report.inserted:
+            _page_counts.clear()
+        return report
+
+    def _insert_chunk(self, chunk: "list[tuple[int, dict[str, Any]]]", report: EquipmentImportReport):
+        # Rows with and without explicit ids compile to different INSERTs, so each set is batched separately.
+        try:
+            for with_id in (True, False):
+                batch = [values for _, values in chunk if ('id' in values) == with_id]
+                if batch:
+                    self._session.execute(insert(EquipmentEntity), batch)
+            _count_by_type(self._session, *((values['type'], values['status'], 1) for _, values in chunk))
+            _changed(self._session)
+            self._session.commit()
+            report.inserted += len(chunk)
+        except (IntegrityError, DataError):
+            self._session.rollback()
+            inserted = []
+            for line, values in chunk:
+                try:
+                    with self._session.begin_nested():
+                        self._session.execute(insert(EquipmentEntity), [values])
+                    inserted.append((values['type'], values['status'], 1))
+                except (IntegrityError, DataError) as e:
+                    report.errors.append(EquipmentImportError(line=line, message=str(e.orig).splitlines()[0]))
+            report.inserted += len(inserted)
+            _count_by_type(self._session, *inserted)
+            _changed(self._session)
+            self._session.commit()
 
     def remove(self, equipment_id: int, subject: User):
         """Function that removes an equipment from the database.
@@ -112,25 +569,110 @@ class EquipmentService:
         Throws:
             A UserPermissionError if the user doesn't have permission to remove equipment"""
         self._permission.enforce(subject, 'equipment.remove', f'equipment/{equipment_id}')
-        entity = self._session.get(EquipmentEntity, equipment_id)
+        entity = self._session.get(EquipmentEntity, equipment_id, with_for_update=True)
         if (entity):
             self._session.delete(entity)
+            _count_by_type(self._session, (entity.type, entity.status, -1))
+            _changed(self._session)
         self._session.commit()
+        _page_counts.clear()
 
     def checkout(self, equipment: Equipment):
-        """Helper function that marks an equipment as unavailable.
-        
+        """Helper function that atomically marks an available equipment as unavailable.
+
+        A single conditional `UPDATE ... WHERE status = 1` claims the equipment, so of any number of
+        concurrent checkouts exactly one succeeds. A booking covering the present is then looked for in a
+        statement of its own: a booking made concurrently holds the equipment row through `hold`, so the
+        UPDATE waits for it and the following statement sees it committed. The change is committed by the
+        caller, who rolls back on error.
+
         Args:
-            The equipment to checkout"""
+            The equipment to checkout
+
+        Throws:
+            An EquipmentUnavailableError if the equipment does not exist, is already checked out or is
+            booked for the present"""
+        query = (
+            update(EquipmentEntity)
+            .where(EquipmentEntity.id == equipment.id, EquipmentEntity.status == 1)
+            .values(status=0)
+            .returning(EquipmentEntity.type)
+        )
+        type = self._session.execute(query).scalar()
+        if type is None:
+            raise EquipmentUnavailableError(equipment.id)
+        if self._session.scalar(select(_booked_now()).where(EquipmentEntity.id == equipment.id)):
+            raise EquipmentUnavailableError(equipment.id)
+        _count_by_type(self._session, (type, 1, -1), (type, 0, 1))
+        _changed(self._session, EquipmentStatusChange(id=equipment.id, status=0))
         equipment.status = 0
-        entity = self._session.get(EquipmentEntity, equipment.id)
-        entity.update(equipment)
+        _page_counts.clear()
+
+    def hold(self, equipment: Equipment):
+        """Helper function that locks an available equipment against checkouts for a booking covering the present.
+
+        The equipment row stays share-locked until the caller commits, so a concurrent `checkout` waits for the
+        booking and then finds it, and a concurrent `claim` skips the equipment.
+
+        Args:
+            The equipment to hold
+
+        Throws:
+            An EquipmentUnavailableError if the equipment does not exist or is checked out"""
+        query = select(EquipmentEntity.status).where(EquipmentEntity.id == equipment.id).with_for_update(read=True)
+        if self._session.scalar(query) != 1:
+            raise EquipmentUnavailableError(equipment.id)
+
+    def claim(self, type: str, count: int = 1) -> "list[Equipment]":
+        """Helper function that atomically marks `count` available equipment of a type as unavailable.
+
+        Free rows are selected `FOR UPDATE SKIP LOCKED`, so concurrent claims for the same type each lock
+        a disjoint set of items instead of queueing behind one another. Items booked for the present are
+        not free, and those being booked are locked and skipped. The change is committed by the caller.
+
+        Args:
+            The equipment type to claim, matched case-insensitively like `filter_type`
+            The number of items to claim
+
+        Returns:
+            The claimed equipment in id order
+
+        Throws:
+            An InsufficientEquipmentError if fewer than `count` items are available, in which case nothing is claimed"""
+        query = (
+            select(EquipmentEntity)
+            .where(EquipmentEntity.type.ilike(type), EquipmentEntity.status == 1, ~_booked_now())
+            .order_by(EquipmentEntity.id)
+            .limit(count)
+            .with_for_update(skip_locked=True)
+        )
+        entities = self._session.scalars(query).all()
+        if len(entities) < count:
+            raise InsufficientEquipmentError(type, count, len(entities))
+        for entity in entities:
+            entity.status = 0
+        self._session.flush()
+        changes = ((entity.type, status, delta) for entity in entities for status, delta in ((1, -1), (0, 1)))
+        _count_by_type(self._session, *changes)
+        _changed(self._session, *(EquipmentStatusChange(id=entity.id, status=0) for entity in entities))
+        _page_counts.clear()
+        return [entity.to_model() for entity in entities]
 
     def checkin(self, equipment: Equipment):
-        """Helper function that marks an equipment as available.
-        
+        """Helper function that marks an equipment as available. The change is committed by the caller.
+
         Args:
-            The equipment to checkout"""
+            The equipment to checkin"""
+        query = (
+            update(EquipmentEntity)
+            .where(EquipmentEntity.id == equipment.id, EquipmentEntity.status != 1)
+            .values(status=1)
+            .returning(EquipmentEntity.type)
+        )
         equipment.status = 1
-        entity = self._session.get(EquipmentEntity, equipment.id)
-        entity.update(equipment)
\ No newline at end of file
+        type = self._session.execute(query).scalar()
+        if type is None:
+            return
+        _count_by_type(self._session, (type, 0, -1), (type, 1, 1))
+        _changed(self._session, EquipmentStatusChange(id=equipment.id, status=1))
+        _page_counts.clear()
@@ -0,0 +1,161 @@
+"""In-process fan-out of equipment status changes to availability stream subscribers.
+
+Committed writes publish `EquipmentStatusChange` deltas to `broker`, which hands them to every subscribed
+stream through a bounded asyncio queue on the subscriber's event loop. Writes that change more than
+statuses (adds, removals, bulk imports) publish `RESYNC` instead, telling subscribers to reload the list.
+A subscriber that falls more than `QUEUE_SIZE` events behind is also sent `RESYNC` in place of the events
+it missed, so a slow client never holds memory or blocks publishers.
+
+With more than one worker process, set `EQUIPMENT_EVENTS_NOTIFY=true`. Changes are then sent with
+Postgres `NOTIFY` inside the writing transaction, which delivers them only if it commits, and every
+worker's `NotifyBridge` relays the notifications it `LISTEN`s for to its own subscribers.
+"""
+
+import asyncio
+import json
+import logging
+import select
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+import psycopg2
+from sqlalchemy import Engine, text
+from sqlalchemy.orm import Session
+from ..env import getenv
+from ..models import EquipmentStatusChange
+
+QUEUE_SIZE = 256
+
+CHANNEL = 'equipment_events'
+
+RESYNC = None
+"""Published in place of deltas when subscribers should reload the full list."""
+
+_NOTIFY_PAYLOAD_LIMIT = 7900
+
+notify_enabled = getenv('EQUIPMENT_EVENTS_NOTIFY', 'false').lower() in ('true', '1', 'yes')
+"""Whether changes are relayed through Postgres LISTEN/NOTIFY rather than published in-process."""
+
+logger = logging.getLogger(__name__)
+
+Event = EquipmentStatusChange | None
+
+
+class EventBroker:
+    """Thread-safe fan-out of events to asyncio queues, each drained on its own event loop."""
+
+    def __init__(self, queue_size: int = QUEUE_SIZE):
+        self._queue_size = queue_size
+        self._subscribers: dict[asyncio.Queue[Event], asyncio.AbstractEventLoop] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def subscribe(self) -> Iterator["asyncio.Queue[Event]"]:
+        """Register a queue receiving every event published while the context is open.
+
+        Must be entered from a coroutine running on the loop that will read the queue."""
+        queue: asyncio.Queue[Event] = asyncio.Queue(self._queue_size)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        try:
+            yield queue
+        finally:
+            with self._lock:
+                del self._subscribers[queue]
+
+    def publish(self, events: list[Event]) -> None:
+        """Deliver `events` to every subscriber. Safe to call from any thread."""
+        if not events:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, events)
+            except RuntimeError:
+                # The subscriber's loop has closed; its context exit will unregister the queue.
+                pass
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+
+def _offer(queue: "asyncio.Queue[Event]", events: list[Event]) -> None:
+    if queue.qsize() + len(events) > queue.maxsize:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(RESYNC)
+        return
+    for event in events:
+        queue.put_nowait(event)
+
+
+broker = EventBroker()
+"""Process-level broker the availability stream subscribes to."""
+
+
+def _encode(events: list[Event]) -> str:
+    payload = json.dumps([None if event is None else event.dict() for event in events], separators=(',', ':'))
+    return payload if len(payload) <= _NOTIFY_PAYLOAD_LIMIT else '[null]'
+
+
+def _decode(payload: str) -> list[Event]:
+    return [None if event is None else EquipmentStatusChange(**event) for event in json.loads(payload)]
+
+
+def notify(session: Session, events: list[Event]) -> None:
+    """Queue `events` for delivery to every worker when `session`'s transaction commits."""
+    session.execute(text('SELECT pg_notify(:channel, :payload)'), {'channel': CHANNEL, 'payload': _encode(events)})
+
+
+class NotifyBridge:
+    """Background thread relaying `NOTIFY`s on `CHANNEL` to a broker.
+
+    The thread holds one dedicated connection outside the engine's pool and reconnects if it drops,
+    publishing `RESYNC` after each (re)connect since notifications sent while disconnected are lost."""
+
+    def __init__(self, engine: Engine, target: EventBroker = broker, poll_interval: float = 1.0):
+        self._connect_args = engine.url.translate_connect_args(username='user', database='dbname')
+        self._target = target
+        self._poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._listening = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='equipment-events-listener', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def wait_listening(self, timeout: float | None = None) -> bool:
+        return self._listening.wait(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                connection = psycopg2.connect(**self._connect_args)
+            except psycopg2.Error:
+                logger.exception('Could not connect to listen for equipment events')
+                self._stop.wait(self._poll_interval)
+                continue
+            try:
+                connection.autocommit = True
+                connection.cursor().execute(f'LISTEN {CHANNEL}')
+                self._listening.set()
+                self._target.publish([RESYNC])
+                while not self._stop.is_set():
+                    if select.select([connection], [], [], self._poll_interval)[0]:
+                        connection.poll()
+                        while connection.notifies:
+                            self._target.publish(_decode(connection.notifies.pop(0).payload))
+            except psycopg2.Error:
+                logger.exception('Lost the equipment events listener connection')
+            finally:
+                self._listening.clear()
+                connection.close()
@@ -0,0 +1,32 @@
+"""Sparse fieldsets: the subset of a model's fields a client asks a list route for with `?fields=`.
+
+A route given `fields=id,status` selects only those columns and responds with objects of only those keys, so
+status boards polling large lists read and download a fraction of each row. Fields of an embedded model are
+named with a dot, e.g. `equipment.id`, and the embedded model's name alone selects all of its fields.
+"""
+
+from typing import Mapping, Sequence
+
+
+def parse_fields(fields: str, available: Sequence[str], groups: Mapping[str, Sequence[str]] = {}) -> tuple[str, ...]:
+    """Parse a comma separated `fields` parameter.
+
+    Args:
+        The parameter, where an empty string selects every field
+        The fields that may be selected, in the order responses list them
+        Names that select several fields at once, e.g. an embedded model and its dotted fields
+
+    Returns:
+        The selected fields in the order of `available`, so equal selections compare and cache equally
+
+    Throws:
+        A ValueError naming any field that is not available"""
+    requested = {field.strip() for field in fields.split(',')} - {''}
+    if not requested:
+        return tuple(available)
+    unknown = requested - set(available) - set(groups)
+    if unknown:
+        raise ValueError(f'Unknown fields: {", ".join(sorted(unknown))}')
+    for group in requested & set(groups):
+        requested.update(groups[group])
+    return tuple(field for field in available if field in requested)
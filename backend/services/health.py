@@ -11,6 +11,10 @@ In this context health does not refer to correctness as much as running, connect
 from fastapi import Depends
 from sqlalchemy import text
 from ..database import Session, db_session
+from ..models import PoolStatus
+from .equipment import _listings
+from .permission import _compiled_permissions
+from .user import _authenticated
 
 __authors__ = ["Kris Jordan"]
 __copyright__ = "Copyright 2023"
@@ -28,3 +32,21 @@ class HealthService:
         result = self._session.execute(stmt)
         row = result.all()[0]
         return str(f"{row[0]} @ {row[1]}")
+
+    def pool(self) -> PoolStatus:
+        pool = self._session.get_bind().pool
+        return PoolStatus(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            waiters=getattr(pool, "waiters", 0),
+        )
+
+    def caches(self) -> dict[str, dict[str, int | float]]:
+        """Size and hit rate of this worker's process-level caches."""
+        return {
+            "authenticated_users": _authenticated.stats(),
+            "permissions": _compiled_permissions.stats(),
+            "equipment_listings": _listings.stats(),
+        }
@@ -0,0 +1,131 @@
+"""This class holds the service methods that maintain and query hourly booking counts per equipment type."""
+
+from array import array
+from datetime import datetime, timedelta
+from fastapi import Depends
+from sqlalchemy import select, delete, func, literal, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from ..database import db_session
+from ..models import OccupancyGrid, User
+from ..entities import ReservationEntity, ReservationOccupancyEntity, EquipmentTypeSummaryEntity
+from ..datetimes import as_utc
+from .permission import PermissionService
+
+BUCKET = timedelta(hours=1)
+
+MAX_BUCKETS = 24 * 366
+"""Longest window, in buckets, a single grid may cover."""
+
+
+def _floor(moment: datetime) -> datetime:
+    return as_utc(moment).replace(minute=0, second=0, microsecond=0)
+
+
+def _ceil(moment: datetime) -> datetime:
+    floor = _floor(moment)
+    return floor if floor == as_utc(moment) else floor + BUCKET
+
+
+def _buckets(start, end):
+    """Set-returning SQL expression of the UTC hours overlapped by the [start, end) range."""
+    return func.generate_series(func.date_trunc('hour', start, 'UTC'), end - timedelta(microseconds=1), BUCKET)
+
+
+class OccupancyService:
+
+    _session: Session
+    _permission: PermissionService
+
+    def __init__(self, session: Session = Depends(db_session), permission: PermissionService = Depends()):
+        self._session = session
+        self._permission = permission
+
+    def record(self, type: str, start: datetime, end: datetime, delta: int):
+        """Helper function that adds `delta` bookings of a type to every hour of a window.
+
+        Hours are upserted in ascending order by a single statement, so concurrent bookings lock counter rows
+        in the same order. The change is committed by the caller.
+
+        Args:
+            The equipment type booked
+            The start and end of the booking
+            1 for a new booking, -1 for a removed one"""
+        bucket = _buckets(literal(start), literal(end)).column_valued('bucket')
+        rows = select(literal(type), bucket, literal(delta)).order_by(bucket)
+        statement = pg_insert(ReservationOccupancyEntity).from_select(['type', 'bucket', 'booked'], rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[ReservationOccupancyEntity.type, ReservationOccupancyEntity.bucket],
+            set_={'booked': ReservationOccupancyEntity.booked + statement.excluded.booked},
+        )
+        self._session.execute(statement)
+
+    def grid(self, subject: User, start: datetime, end: datetime, types: list[str] | None = None) -> OccupancyGrid:
+        """Function that returns hourly booking counts per equipment type as a dense grid.
+
+        Only the maintained counters in the window are read, through their (type, bucket) primary key.
+
+        Args:
+            The user requesting the grid
+            The start and end of the window, widened to whole hours
+            The equipment types to include, or None for every type with equipment
+
+        Returns:
+            The grid of bookings per type and hour, with the number of equipment of each type
+
+        Throws:
+            A UserPermissionError if the user may not view occupancy
+            A ValueError if the window is empty or longer than `MAX_BUCKETS` hours"""
+        self._permission.enforce(subject, 'reservation.occupancy', 'reservation/*')
+        start, end = _floor(start), _ceil(end)
+        length = (end - start) // BUCKET
+        if not 0 < length <= MAX_BUCKETS:
+            raise ValueError(f'The window must cover between 1 and {MAX_BUCKETS} hours')
+
+        summary = select(EquipmentTypeSummaryEntity.type, EquipmentTypeSummaryEntity.total)
+        if types is None:
+            summary = summary.where(EquipmentTypeSummaryEntity.total > 0)
+        else:
+            summary = summary.where(EquipmentTypeSummaryEntity.type.in_(types))
+        capacity = dict(self._session.execute(summary).all())
+        types = sorted(capacity) if types is None else types
+
+        booked = {type: array('i', [0]) * length for type in types}
+        query = (
+            select(ReservationOccupancyEntity.type, ReservationOccupancyEntity.bucket, ReservationOccupancyEntity.booked)
+            .where(
+                ReservationOccupancyEntity.type.in_(types),
+                ReservationOccupancyEntity.bucket >= start,
+                ReservationOccupancyEntity.bucket < end,
+                ReservationOccupancyEntity.booked != 0,
+            )
+        )
+        for type, bucket, count in self._session.execute(query):
+            booked[type][(bucket - start) // BUCKET] = count
+
+        return OccupancyGrid.construct(
+            start=start,
+            end=end,
+            bucket_hours=1,
+            types=types,
+            capacity=[capacity.get(type, 0) for type in types],
+            booked=[booked[type].tolist() for type in types],
+        )
+
+    def rebuild(self) -> int:
+        """Function that recomputes every hourly counter from the bookings in the reservation table.
+
+        Returns:
+            The number of hours with bookings"""
+        buckets = _buckets(func.lower(ReservationEntity.during), func.upper(ReservationEntity.during)).table_valued('bucket').render_derived(name='buckets')
+        rows = (
+            select(ReservationEntity.type, buckets.c.bucket, func.count())
+            .join(buckets, true())
+            .where(ReservationEntity.during.is_not(None))
+            .group_by(ReservationEntity.type, buckets.c.bucket)
+        )
+        self._session.execute(delete(ReservationOccupancyEntity))
+        result = self._session.execute(
+            pg_insert(ReservationOccupancyEntity).from_select(['type', 'bucket', 'booked'], rows))
+        self._session.commit()
+        return result.rowcount
@@ -0,0 +1,97 @@
+"""This class holds the service methods that find bookings not returned by the end of their window.
+
+A booking is overdue once the end of its window has passed and it is still in the reservation table, i.e. it
+was never returned. The sweep runs periodically on every worker through `scheduler`, but only the worker that
+wins a Postgres advisory lock does any work, so each overdue booking produces exactly one notice.
+"""
+
+from datetime import datetime, timezone
+from fastapi import Depends
+from sqlalchemy import Engine, select, func, exists
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from ..database import db_session
+from ..env import getenv
+from ..models import OverdueNotice, User
+from ..entities import ReservationEntity, OverdueNoticeEntity
+from .permission import PermissionService
+
+SWEEP_INTERVAL = float(getenv('OVERDUE_SWEEP_INTERVAL', '300'))
+"""Seconds between overdue sweeps in each worker, or 0 to disable the sweep."""
+
+SWEEP_BATCH_SIZE = 500
+"""Notices created per transaction, bounding how long a sweep holds its lock and row locks."""
+
+# Key of the transaction-level advisory lock electing the worker that sweeps.
+_SWEEP_LOCK = 0x4F564552
+
+
+class OverdueService:
+
+    _session: Session
+    _permission: PermissionService
+
+    def __init__(self, session: Session = Depends(db_session), permission: PermissionService = Depends()):
+        self._session = session
+        self._permission = permission
+
+    def sweep(self, now: datetime | None = None, batch_size: int = SWEEP_BATCH_SIZE) -> int | None:
+        """Function that creates a notice for every overdue booking that does not have one yet.
+
+        Overdue bookings are found through the partial index on the end of their window, oldest first,
+        and inserted in batches of `batch_size`, each in its own transaction.
+
+        Args:
+            The moment bookings must have ended by, defaulting to now
+            The maximum number of notices created per transaction
+
+        Returns:
+            The number of notices created, or None if another worker is sweeping"""
+        now = now or datetime.now(timezone.utc)
+        due = func.upper(ReservationEntity.during)
+        overdue = (
+            select(ReservationEntity.id, ReservationEntity.type, ReservationEntity.user_id, ReservationEntity.equipment_id, due)
+            .where(
+                ReservationEntity.during.is_not(None),
+                due <= now,
+                ~exists().where(OverdueNoticeEntity.reservation_id == ReservationEntity.id),
+            )
+            .order_by(due)
+            .limit(batch_size)
+        )
+        statement = (
+            pg_insert(OverdueNoticeEntity)
+            .from_select(['reservation_id', 'type', 'user_id', 'equipment_id', 'due'], overdue)
+            .on_conflict_do_nothing()
+        )
+
+        created = None
+        while self._session.scalar(select(func.pg_try_advisory_xact_lock(_SWEEP_LOCK))):
+            batch = self._session.execute(statement).rowcount
+            self._session.commit()
+            created = (created or 0) + batch
+            if batch < batch_size:
+                return created
+        self._session.rollback()
+        return created
+
+    def notices(self, subject: User) -> list[OverdueNotice]:
+        """Function that returns every open overdue notice, most overdue first.
+
+        Args:
+            The user requesting the notices
+
+        Returns:
+            The notices of bookings that are still not returned
+
+        Throws:
+            A UserPermissionError if the user may not view overdue reservations"""
+        self._permission.enforce(subject, 'reservation.overdue', 'reservation/*')
+        query = select(OverdueNoticeEntity).order_by(OverdueNoticeEntity.due, OverdueNoticeEntity.reservation_id)
+        return [entity.to_model() for entity in self._session.scalars(query)]
+
+
+def sweep_overdue(engine: Engine) -> int | None:
+    """Scheduled job running one `OverdueService.sweep` on its own session."""
+    with Session(engine) as session:
+        return OverdueService(session, PermissionService(session)).sweep()
@@ -0,0 +1,50 @@
+"""Opaque cursors for keyset (seek) pagination.
+
+A cursor records the sort key of the last row on a page so the next page can seek directly past it
+with an indexed `WHERE (order_column, id) > (:value, :id)` instead of an `OFFSET` that rescans every
+preceding row. Cursors are URL-safe base64 JSON; clients should treat them as opaque.
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, Sequence
+from sqlalchemy import Column
+
+
+def encode_cursor(*values: Any) -> str:
+    payload = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    """Decode a cursor produced by `encode_cursor`.
+
+    Raises:
+        ValueError: if the cursor is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError('Invalid pagination cursor') from e
+    if not isinstance(values, list):
+        raise ValueError('Invalid pagination cursor')
+    return values
+
+
+def decode_seek_key(cursor: str, order_by: str, columns: Sequence[Column]) -> list[Any]:
+    """Decode a cursor of a page ordered by `order_by` into the values of its sort key `columns`.
+
+    Raises:
+        ValueError: if the cursor is malformed, belongs to another order, or a value does not match the type
+        of its column."""
+    values = decode_cursor(cursor)
+    if len(values) != len(columns) + 1 or values[0] != order_by:
+        raise ValueError('Pagination cursor does not match the requested order')
+    for value, column in zip(values[1:], columns):
+        python_type = column.type.python_type
+        if value is None and column.nullable:
+            continue
+        if not isinstance(value, python_type) or (isinstance(value, bool) and python_type is not bool):
+            raise ValueError('Invalid pagination cursor')
+    return values[1:]
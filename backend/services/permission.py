@@ -1,11 +1,13 @@
 import re
 from fastapi import Depends
 from functools import lru_cache
-from sqlalchemy import select
+from typing import Callable
+from sqlalchemy import select, or_, Select
 from sqlalchemy.orm import Session
 from ..database import db_session
 from ..models import User, Permission, Role, RoleDetails
-from ..entities import UserEntity, PermissionEntity, RoleEntity
+from ..entities import UserEntity, PermissionEntity, RoleEntity, user_role_table
+from .cache import TTLCache
 
 
 class UserPermissionError(Exception):
@@ -14,6 +16,87 @@ class UserPermissionError(Exception):
             f'Not authorized to perform `{action}` on `{resource}`')
 
 
+class CompiledPermissions:
+    """A subject's permissions compiled for fast, repeated authorization decisions.
+
+    Rules are stored in a prefix trie keyed by the literal prefix of each action pattern (the
+    characters before its first `*`). Checking an action walks the trie along the action string, so
+    only rules whose literal prefix matches are ever tested against their full patterns.
+    """
+
+    permissions: list[Permission]
+
+    def __init__(self, permissions: list[Permission]):
+        self.permissions = permissions
+        self._root: dict = {}
+        for permission in permissions:
+            node = self._root
+            for char in permission.action.split('*', 1)[0]:
+                node = node.setdefault(char, {})
+            node.setdefault(None, []).append(
+                (compile_pattern(permission.action), compile_pattern(permission.resource)))
+
+    def allows(self, action: str, resource: str) -> bool:
+        node = self._root
+        for char in action:
+            if self._match_rules(node, action, resource):
+                return True
+            node = node.get(char)
+            if node is None:
+                return False
+        return self._match_rules(node, action, resource)
+
+    def _match_rules(self, node: dict, action: str, resource: str) -> bool:
+        for action_matches, resource_matches in node.get(None, ()):
+            if action_matches(action) and resource_matches(resource):
+                return True
+        return False
+
+
+Matcher = Callable[[str], bool]
+
+
+@lru_cache(maxsize=2048)
+def compile_pattern(pattern: str) -> Matcher:
+    """Compile a permission pattern into a predicate over action or resource strings.
+
+    A `*` matches any run of characters, including none; every other character matches itself. Patterns
+    with no wildcard, only wildcards, or a single wildcard are matched with plain string operations and
+    only the remaining patterns fall back to a regular expression.
+    """
+    parts = pattern.split('*')
+    if len(parts) == 1:
+        return pattern.__eq__
+    if not any(parts):
+        return _match_anything
+    if len(parts) == 2:
+        prefix, suffix = parts
+        minimum = len(prefix) + len(suffix)
+        return lambda value: len(value) >= minimum and value.startswith(prefix) and value.endswith(suffix)
+    expression = re.compile('.*'.join(re.escape(part) for part in parts), re.DOTALL)
+    return lambda value: expression.fullmatch(value) is not None
+
+
+def _match_anything(value: str) -> bool:
+    return True
+
+
+# Compiled permissions keyed by user id. Entries are dropped explicitly whenever a grant, revoke, or
+# role membership change could alter them; the TTL bounds staleness across worker processes.
+_compiled_permissions: TTLCache[int, CompiledPermissions] = TTLCache(maxsize=4096, ttl=300)
+
+
+def _subject_permissions_query(user_id: int) -> Select:
+    """Query a user's own and role-granted permissions in a single statement."""
+    return (
+        select(PermissionEntity)
+        .outerjoin(user_role_table, PermissionEntity.role_id == user_role_table.c.role_id)
+        .where(or_(PermissionEntity.user_id == user_id, user_role_table.c.user_id == user_id))
+        .distinct()
+        .order_by(PermissionEntity.id)
+    )
+
+
 class PermissionService:
 
     _session: Session
@@ -22,10 +105,7 @@ class PermissionService:
         self._session = session
 
     def get_permissions(self, subject: User) -> list[Permission]:
-        user_permissions = self._get_user_permissions(subject)
-        roles_permissions = self._get_user_roles_permissions(subject)
-        permissions = user_permissions + roles_permissions
-        return [permission.to_model() for permission in permissions]
+        return [permission.copy() for permission in self._compiled(subject).permissions]
 
     def grant(self, grantor: User, grantee: User | Role | RoleDetails, permission: Permission) -> bool:
         # To grant a permission, two things must be true:
@@ -47,6 +127,7 @@ class PermissionService:
 
         self._session.add(permission_entity)
         self._session.commit()
+        self.invalidate(grantee.id if type(grantee) is User else None)
         return True
 
     def revoke(self, revoker: User, permission: Permission) -> bool:
@@ -60,56 +141,40 @@ class PermissionService:
         self.enforce(revoker, 'permission.revoke', f'permission/{permission_entity.id}')
         self.enforce(revoker, permission_entity.action, permission_entity.resource)
 
+        user_id = permission_entity.user_id if permission_entity.role_id is None else None
         self._session.delete(permission_entity)
         self._session.commit()
+        self.invalidate(user_id)
         return True
 
+    def invalidate(self, user_id: int | None = None) -> None:
+        """Drop cached permissions for one user, or for every user when `user_id` is None.
+
+        Role-level changes affect every member of the role, so callers pass None for those."""
+        if user_id is None:
+            _compiled_permissions.clear()
+        else:
+            _compiled_permissions.pop(user_id)
+
     def enforce(self, subject: User, action: str, resource: str) -> None:
         if self.check(subject, action, resource) is False:
             raise UserPermissionError(action, resource)
 
     def check(self, subject: User, action: str, resource: str) -> bool:
-        # Check user permissions
-        user_perms = self._get_user_permissions(subject)
-        if self._has_permission(user_perms, action, resource):
-            return True
-
-        # Check role permissions
-        role_permissions = self._get_user_roles_permissions(subject)
-        return self._has_permission(role_permissions, action, resource)
-
-    def _get_user_permissions(self, subject: User) -> list[PermissionEntity]:
-        user_query = select(PermissionEntity).where(
-            PermissionEntity.user_id == subject.id)
-        user_perms = [p for p in self._session.execute(user_query).scalars()]
-        return user_perms
-
-    def _get_user_roles_permissions(self, subject: User) -> list[PermissionEntity]:
-        user_entity = self._session.get(UserEntity, subject.id)
-        if user_entity == None:
-            return []
-        role_ids = [role.id for role in user_entity.roles]
-        if len(role_ids) == 0:
-            return []
-        role_query = select(PermissionEntity).where(
-            PermissionEntity.role_id.in_(role_ids))
-        return [p for p in self._session.execute(role_query).scalars()]
-
-    def _has_permission(self, permissions: list[PermissionEntity], action: str, resource: str) -> bool:
-        for permission in permissions:
-            if self._check_permission(permission, action, resource):
-                return True
-        return False
-
-    def _check_permission(self, permission: PermissionEntity, action: str, resource: str) -> bool:
-        action_re = self._expand_pattern(permission.action)
-        if action_re.fullmatch(action) is not None:
-            resource_re = self._expand_pattern(permission.resource)
-            return resource_re.fullmatch(resource) is not None
-        else:
-            return False
-
-    @lru_cache()
-    def _expand_pattern(self, pattern: str) -> re.Pattern:
-        search = pattern.replace('*', '.*')
-        return re.compile(f'^{search}$')
+        return self._compiled(subject).allows(action, resource)
+
+    def _compiled(self, subject: User) -> CompiledPermissions:
+        if subject.id is None:
+            return CompiledPermissions([])
+        compiled = _compiled_permissions.get(subject.id)
+        if compiled is None:
+            compiled = CompiledPermissions(self._get_subject_permissions(subject))
+            _compiled_permissions.set(subject.id, compiled)
+        return compiled
+
+    def _get_subject_permissions(self, subject: User) -> list[Permission]:
+        query = _subject_permissions_query(subject.id)
+        return [p.to_model() for p in self._session.execute(query).scalars()]
+
+    def _check_permission(self, permission: Permission | PermissionEntity, action: str, resource: str) -> bool:
+        return compile_pattern(permission.action)(action) and compile_pattern(permission.resource)(resource)
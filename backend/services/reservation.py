@@ -1,26 +1,151 @@
 """This class holds the service methods that interact with the database reservation table."""
 
+from datetime import datetime, timezone
+from typing import Iterable, Sequence
 from fastapi import Depends
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import ColumnElement, Row, Select, select, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, contains_eager
 from ..database import db_session
-from ..models import Reservation, User
-from ..entities import ReservationEntity, UserEntity
-from . import EquipmentService
+from ..models import Batch, Reservation, AllocationRequest, User, Equipment
+from ..entities import ReservationEntity, UserEntity, EquipmentEntity
+from ..datetimes import as_utc
+from .batch import batch_ids, any_id, ordered_batch
+from .equipment import EquipmentService, EquipmentUnavailableError
+from .fields import parse_fields
+from .occupancy import OccupancyService
+from .reservation_history import ReservationHistoryService
 from .permission import PermissionService
 
 
+# SQLSTATE of a violated exclusion constraint, raised for overlapping bookings of the same equipment.
+_EXCLUSION_VIOLATION = '23P01'
+
+# Reservation models embed their user and equipment, so every read path loads both relationships in
+# the same statement rather than lazily issuing two more queries per reservation.
+_LOAD_RELATIONS = (joinedload(ReservationEntity.user), joinedload(ReservationEntity.equipment))
+
+# Fields `list_rows` can select, in the order of the `Reservation` model, and the columns they are read
+# from. Fields of the embedded user and equipment are dotted, and `user` or `equipment` alone selects all of
+# them; a user's permissions are not stored on the user and are always listed empty.
+_USER_FIELDS = tuple(field for field in User.__fields__ if field != 'permissions')
+_EQUIPMENT_FIELDS = tuple(Equipment.__fields__)
+_ROW_GROUPS = {
+    'user': tuple(f'user.{field}' for field in _USER_FIELDS),
+    'equipment': tuple(f'equipment.{field}' for field in _EQUIPMENT_FIELDS),
+}
+_ROW_COLUMNS = {
+    'id': ReservationEntity.id,
+    'type': ReservationEntity.type,
+    **{f'user.{field}': getattr(UserEntity, field) for field in _USER_FIELDS},
+    **{f'equipment.{field}': getattr(EquipmentEntity, field) for field in _EQUIPMENT_FIELDS},
+    'notes': ReservationEntity.notes,
+    'start': func.lower(ReservationEntity.during),
+    'end': func.upper(ReservationEntity.during),
+}
+_ROW_FIELDS = tuple(_ROW_COLUMNS)
+_COMPACT_COLUMNS = (
+    ReservationEntity.id,
+    ReservationEntity.type,
+    ReservationEntity.user_id,
+    ReservationEntity.equipment_id,
+    ReservationEntity.notes,
+    func.lower(ReservationEntity.during),
+    func.upper(ReservationEntity.during),
+)
+_USER_COLUMNS = tuple(_ROW_COLUMNS[field] for field in _ROW_GROUPS['user'])
+_EQUIPMENT_COLUMNS = tuple(_ROW_COLUMNS[field] for field in _ROW_GROUPS['equipment'])
+
+
+def rows_query(selected: Sequence[str], *criteria) -> Select:
+    """Select the columns of the `selected` fields of the reservations matching `criteria`, joining only the
+    tables the fields need."""
+    query = select(*(_ROW_COLUMNS[field] for field in selected)).select_from(ReservationEntity).where(*criteria)
+    if any(field.startswith('user.') for field in selected):
+        query = query.join(ReservationEntity.user)
+    if any(field.startswith('equipment.') for field in selected):
+        query = query.join(ReservationEntity.equipment)
+    return query.order_by(ReservationEntity.id)
+
+
+def rows_of(selected: Sequence[str], rows: Iterable[Row]) -> "list[dict]":
+    """Assemble the rows of `rows_query(selected)` into dicts in the shape of `Reservation`."""
+    # Each key of a row is either a column of the reservation or a run of columns of an embedded model.
+    layout: list[tuple[str, int, list[str] | None]] = []
+    for index, field in enumerate(selected):
+        embedded, _, name = field.rpartition('.')
+        if not embedded:
+            layout.append((field, index, None))
+        elif layout and layout[-1][0] == embedded:
+            layout[-1][2].append(name)
+        else:
+            layout.append((embedded, index, [name]))
+
+    result = [
+        {
+            key: row[index] if names is None else dict(zip(names, row[index:index + len(names)]))
+            for key, index, names in layout
+        }
+        for row in rows
+    ]
+    if set(_ROW_GROUPS['user']) <= set(selected):
+        for row in result:
+            row['user']['permissions'] = []
+    return result
+
+
+def of_user(user_pid: int) -> ColumnElement[bool]:
+    """Whether a reservation is of the user with `user_pid`, without joining the user table."""
+    user_id = select(UserEntity.id).where(UserEntity.pid == user_pid).correlate(None).scalar_subquery()
+    return ReservationEntity.user_id == user_id
+
+
+COMPACT_QUERY = select(*_COMPACT_COLUMNS).order_by(ReservationEntity.id)
+
+
+def compact_rows(rows: Iterable[Row]) -> "list[dict]":
+    """Assemble the rows of `COMPACT_QUERY` into dicts in the shape of `CompactReservation`."""
+    return [
+        {'id': row[0], 'type': row[1], 'user_id': row[2], 'equipment_id': row[3],
+         'notes': row[4], 'start': row[5], 'end': row[6]}
+        for row in rows
+    ]
+
+
+def side_load_queries(reservations: "list[dict]") -> tuple[Select, Select]:
+    """Select the users and the equipment the `compact_rows` of `reservations` refer to, each once."""
+    user_ids = list({reservation['user_id'] for reservation in reservations})
+    equipment_ids = list({reservation['equipment_id'] for reservation in reservations})
+    return (
+        select(*_USER_COLUMNS).where(any_id(UserEntity.id, user_ids)).order_by(UserEntity.id),
+        select(*_EQUIPMENT_COLUMNS).where(any_id(EquipmentEntity.id, equipment_ids)).order_by(EquipmentEntity.id),
+    )
+
+
+def compact_listing(reservations: "list[dict]", users: Iterable[Row], equipment: Iterable[Row]) -> dict:
+    """Assemble a JSON-ready dict in the shape of `ReservationListing` from the rows of `side_load_queries`."""
+    # JSON object keys are strings, so users and equipment are keyed by their ids as strings.
+    return {
+        'reservations': reservations,
+        'users': {str(row[0]): dict(zip(_USER_FIELDS, row), permissions=[]) for row in users},
+        'equipment': {str(row[0]): dict(zip(_EQUIPMENT_FIELDS, row)) for row in equipment},
+    }
+
 
 class ReservationService:
 
     _session: Session
     _equipment_svc: EquipmentService
     _permission: PermissionService
+    _occupancy_svc: OccupancyService
+    _history_svc: ReservationHistoryService
 
-    def __init__(self, session: Session = Depends(db_session), equipment_svc: EquipmentService = Depends(), permission: PermissionService = Depends()):
+    def __init__(self, session: Session = Depends(db_session), equipment_svc: EquipmentService = Depends(), permission: PermissionService = Depends(), occupancy_svc: OccupancyService = Depends(), history_svc: ReservationHistoryService = Depends()):
         self._session = session
         self._equipment_svc = equipment_svc
         self._permission = permission
+        self._occupancy_svc = occupancy_svc
+        self._history_svc = history_svc
 
     def get(self, id: int) -> Reservation | None:
         """Function that returns a reservation based on a given id.
@@ -30,14 +155,45 @@ class ReservationService:
             
         Returns:
             The reservation with the given id or None if it doesn't exist"""
-        query = select(ReservationEntity).where(ReservationEntity.id == id)
+        query = select(ReservationEntity).where(ReservationEntity.id == id).options(*_LOAD_RELATIONS)
         reservation_entity: ReservationEntity = self._session.scalar(query)
         if reservation_entity:
             reservationModel = reservation_entity.to_model()
             return reservationModel
         else:
             return None
+
+    def get_row(self, id: int, fields: str = '') -> dict | None:
+        """Function that returns a reservation as a JSON-ready dict with only the requested fields.
+
+        Args:
+            An id as an integer
+            Optionally the comma separated fields to include, e.g. `id,equipment.id,start`; all by default
+
+        Returns:
+            The reservation with the given id or None if it doesn't exist
+
+        Throws:
+            A ValueError if a field does not exist"""
+        rows = self._rows(fields, ReservationEntity.id == id)
+        return rows[0] if rows else None
         
+    def get_many(self, ids: Sequence[int]) -> Batch[Reservation]:
+        """Function that returns the reservations with the given ids in a single query.
+
+        Args:
+            The ids of the reservations, at most `MAX_BATCH_SIZE` distinct ones
+
+        Returns:
+            The reservations found, in the order of the ids, and the ids of reservations that don't exist
+
+        Throws:
+            A ValueError if more than `MAX_BATCH_SIZE` distinct ids are given"""
+        ids = batch_ids(ids)
+        query = select(ReservationEntity).where(any_id(ReservationEntity.id, ids)).options(*_LOAD_RELATIONS)
+        found = {entity.id: entity.to_model() for entity in self._session.scalars(query)}
+        return ordered_batch(ids, found)
+
     def filter_type(self, type: str, subject: User) -> list[Reservation]:
         """Funtion that returns a list of reservation based on the type of equipment.
         
@@ -48,9 +204,26 @@ class ReservationService:
         Returns:
             A list of reservations of the given type or an empty list if no reservation fits the criteria"""
         self._permission.enforce(subject, 'reservation.filter_type', f'reservation/{type}')
-        query = select(ReservationEntity).where(ReservationEntity.type.ilike(type))
+        query = select(ReservationEntity).where(ReservationEntity.type.ilike(type)).options(*_LOAD_RELATIONS).order_by(ReservationEntity.id)
         reservationEntities = self._session.execute(query).scalars()
         return [reservationEntity.to_model() for reservationEntity in reservationEntities]
+
+    def filter_type_rows(self, type: str, subject: User, fields: str = '') -> "list[dict]":
+        """Funtion that returns the reservations of a type as JSON-ready dicts with only the requested fields.
+
+        Args:
+            An equipment type as a string
+            The user attempting to list the reservation by type
+            Optionally the comma separated fields to include; all by default
+
+        Returns:
+            A list of reservations of the given type, ordered by id
+
+        Throws:
+            A UserPermissionError if the user may not list reservations by type
+            A ValueError if a field does not exist"""
+        self._permission.enforce(subject, 'reservation.filter_type', f'reservation/{type}')
+        return self._rows(fields, ReservationEntity.type.ilike(type))
     
     def filter_user(self, user_pid: int) -> list[Reservation]:
         """Funtion that returns a list of reservation based on the user associated with the reservation.
@@ -60,11 +233,32 @@ class ReservationService:
             
         Returns:
             A list of reservations of the given user pid or an empty list if no reservation fits the criteria"""
-        userQuery = select(UserEntity).where(UserEntity.pid.__eq__(user_pid))
-        userModel = self._session.execute(userQuery).scalar().to_model()
-        query = select(ReservationEntity).where(ReservationEntity.user_id.__eq__(userModel.id))
+        query = (
+            select(ReservationEntity)
+            .join(ReservationEntity.user)
+            .where(UserEntity.pid == user_pid)
+            .options(contains_eager(ReservationEntity.user), joinedload(ReservationEntity.equipment))
+            .order_by(ReservationEntity.id)
+        )
         reservationEntities = self._session.execute(query).scalars()
         return [reservationEntity.to_model() for reservationEntity in reservationEntities]
+
+    def filter_user_rows(self, user_pid: int, fields: str = '') -> "list[dict]":
+        """Funtion that returns the reservations of a user as JSON-ready dicts with only the requested fields.
+
+        The user is matched by a subquery on pid, so the user table is only joined when a field of the user
+        is requested.
+
+        Args:
+            A user pid
+            Optionally the comma separated fields to include; all by default
+
+        Returns:
+            A list of reservations of the given user pid, ordered by id
+
+        Throws:
+            A ValueError if a field does not exist"""
+        return self._rows(fields, of_user(user_pid))
     
     def list(self) -> list[Reservation]:
         """Funtion that returns all reservations.
@@ -75,36 +269,147 @@ class ReservationService:
         Returns:
             A list of all reservations."""
 
-        query = select(ReservationEntity)
+        query = select(ReservationEntity).options(*_LOAD_RELATIONS).order_by(ReservationEntity.id)
         reservationEntities = self._session.execute(query).scalars()
         return [reservationEntity.to_model() for reservationEntity in reservationEntities]
     
+    def list_rows(self, fields: str = '') -> "list[dict]":
+        """Funtion that returns all reservations as plain JSON-ready dicts in the shape of `Reservation`.
+
+        Only the columns of the requested fields are selected, joining the user and equipment tables only
+        when a field of theirs is requested, and assembled into nested dicts without building an entity or
+        model per row.
+
+        Args:
+            Optionally the comma separated fields to include, e.g. `id,equipment.id,start`; all by default
+
+        Returns:
+            A list of all reservations, ordered by id
+
+        Throws:
+            A ValueError if a field does not exist"""
+        return self._rows(fields)
+
+    def list_compact(self) -> dict:
+        """Funtion that returns all reservations as a JSON-ready dict in the shape of `ReservationListing`.
+
+        Reservations refer to their user and equipment by id. Their users and equipment are then selected
+        once each, by the ids collected in the single pass over the reservations, rather than joined onto and
+        read with every reservation. A user holding many reservations, or an item with a long history, is
+        read and serialized once rather than per reservation.
+
+        Returns:
+            All reservations ordered by id, with their users and equipment keyed by id"""
+        reservations = compact_rows(self._session.execute(COMPACT_QUERY))
+        users_query, equipment_query = side_load_queries(reservations)
+        return compact_listing(reservations, self._session.execute(users_query), self._session.execute(equipment_query))
+
     def add(self, reservation: Reservation):
         """Funtion that adds a reservation to the database table.
+
+        A reservation without a start checks the equipment out immediately; the equipment is checked out and
+        the reservation inserted in the same transaction. A reservation with a start and end books the
+        equipment for that window instead, which the database rejects if it overlaps another booking. As in
+        `EquipmentService.available`, a window covering the present also needs the equipment not checked out,
+        and a checkout needs it not booked for the present. The reservation's type must be the equipment's,
+        since bookings are counted by it against the equipment of that type.
         
         Args:
             A reservation object
             
         Returns:
-            None"""
-        self._equipment_svc.checkout(reservation.equipment)
+            None
+
+        Throws:
+            An EquipmentUnavailableError if the equipment does not exist, is already checked out, or booked during the window
+            A ValueError if the reservation's type is not the equipment's"""
+        type = self._session.scalar(select(EquipmentEntity.type).where(EquipmentEntity.id == reservation.equipment.id))
+        if type is None:
+            raise EquipmentUnavailableError(reservation.equipment.id)
+        if reservation.type != type:
+            raise ValueError(f'Equipment `{reservation.equipment.id}` is a {type}, not a {reservation.type}')
+        try:
+            if reservation.start is None:
+                self._equipment_svc.checkout(reservation.equipment)
+            elif as_utc(reservation.start) <= datetime.now(timezone.utc) < as_utc(reservation.end):
+                self._equipment_svc.hold(reservation.equipment)
+        except EquipmentUnavailableError:
+            self._session.rollback()
+            raise
         reservationEntity = ReservationEntity.from_model(reservation)
         self._session.add(reservationEntity)
+        try:
+            if reservation.start is not None:
+                self._occupancy_svc.record(reservation.type, reservation.start, reservation.end, 1)
+            self._session.commit()
+        except IntegrityError as e:
+            self._session.rollback()
+            if getattr(e.orig, 'pgcode', None) == _EXCLUSION_VIOLATION:
+                raise EquipmentUnavailableError(reservation.equipment.id) from e
+            raise
+
+    def allocate(self, request: AllocationRequest, subject: User) -> "list[Reservation]":
+        """Funtion that reserves any available equipment of a type for the subject.
+
+        The equipment is claimed and the reservations inserted in one transaction, so either all
+        `request.count` items are reserved or none are. Claiming more than one item at once requires
+        the `reservation.allocate` permission.
+
+        Args:
+            An allocation request with the equipment type and number of items
+            The user the equipment is reserved for
+
+        Returns:
+            The new reservations in equipment id order
+
+        Throws:
+            A UserPermissionError if the user may not reserve several items at once
+            An InsufficientEquipmentError if fewer than the requested number of items are available"""
+        if request.count > 1:
+            self._permission.enforce(subject, 'reservation.allocate', f'reservation/{request.type}')
+        try:
+            equipment = self._equipment_svc.claim(request.type, request.count)
+        except EquipmentUnavailableError:
+            self._session.rollback()
+            raise
+        entities = [
+            ReservationEntity(type=item.type, user_id=subject.id, equipment_id=item.id, notes=request.notes)
+            for item in equipment
+        ]
+        self._session.add_all(entities)
         self._session.commit()
+        query = (
+            select(ReservationEntity)
+            .where(ReservationEntity.id.in_([entity.id for entity in entities]))
+            .options(*_LOAD_RELATIONS)
+            .order_by(ReservationEntity.equipment_id)
+        )
+        return [entity.to_model() for entity in self._session.scalars(query)]
+
+    def _rows(self, fields: str, *criteria) -> "list[dict]":
+        selected = parse_fields(fields, _ROW_FIELDS, _ROW_GROUPS)
+        return rows_of(selected, self._session.execute(rows_query(selected, *criteria)))
 
     def remove(self, reservation_id: int):
         """Funtion that deletes a reservation to the database table.
+
+        The reservation is moved to the history archive in the same transaction, so its usage is kept
+        without growing the table active reservations are read from.
         
         Args:
             A reservation id
             
         Returns:
             None"""
-        reservationEntity = self._session.get(ReservationEntity, reservation_id)
+        reservationEntity = self._session.get(ReservationEntity, reservation_id, options=_LOAD_RELATIONS)
         if (reservationEntity):
             self._session.delete(reservationEntity)
             reservation = reservationEntity.to_model()
-            self._equipment_svc.checkin(reservation.equipment)
+            if reservation.start is None:
+                self._equipment_svc.checkin(reservation.equipment)
+            else:
+                self._occupancy_svc.record(reservation.type, reservation.start, reservation.end, -1)
+            self._history_svc.archive(reservation)
         self._session.commit()
 
 
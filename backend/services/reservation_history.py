@@ -0,0 +1,139 @@
+"""This class holds the service methods that archive completed reservations and query their history.
+
+Completed reservations are moved out of the hot reservation table into `reservation_history`, an append-only
+table range partitioned by the month each reservation completed in. Monthly partitions are created on
+demand by the first reservation archived in them, and history queries bounded by `since`/`until` are pruned
+to the partitions of those months by the planner.
+"""
+
+from datetime import datetime, timezone
+from fastapi import Depends
+from sqlalchemy import select, func, text, tuple_
+from sqlalchemy.orm import Session
+from ..database import db_session
+from ..models import Reservation, ReservationHistoryPage, User
+from ..entities import ReservationHistoryEntity, UserEntity
+from ..datetimes import as_utc
+from .pagination import encode_cursor, decode_cursor
+from .permission import PermissionService
+
+# Key of the transaction-level advisory lock serializing partition creation between workers.
+_PARTITION_LOCK = 0x52455356
+
+
+def _month(moment: datetime) -> datetime:
+    """First instant of the UTC month containing `moment`."""
+    return as_utc(moment).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(month: datetime) -> datetime:
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+def _partition_name(month: datetime) -> str:
+    return f'{ReservationHistoryEntity.__tablename__}_{month:%Y_%m}'
+
+
+class ReservationHistoryService:
+
+    _session: Session
+    _permission: PermissionService
+
+    def __init__(self, session: Session = Depends(db_session), permission: PermissionService = Depends()):
+        self._session = session
+        self._permission = permission
+
+    def archive(self, reservation: Reservation, completed_at: datetime | None = None):
+        """Helper function that appends a completed reservation to the history archive.
+
+        The change is committed by the caller, in the same transaction that deletes the reservation.
+
+        Args:
+            The reservation being returned or cancelled
+            When it completed, defaulting to now"""
+        completed_at = completed_at or datetime.now(timezone.utc)
+        self._ensure_partition(_month(completed_at))
+        self._session.add(ReservationHistoryEntity(
+            id=reservation.id,
+            type=reservation.type,
+            user_id=reservation.user.id,
+            equipment_id=reservation.equipment.id,
+            notes=reservation.notes,
+            start=reservation.start,
+            end=reservation.end,
+            completed_at=completed_at,
+        ))
+
+    def history(
+        self,
+        subject: User,
+        user_pid: int | None = None,
+        equipment_id: int | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        cursor: str = '',
+        limit: int = 50,
+    ) -> ReservationHistoryPage:
+        """Function that returns completed reservations, most recently completed first.
+
+        Users may list their own history; listing anyone else's, or an item's, requires the
+        `reservation.history` permission.
+
+        Args:
+            The user requesting the history
+            Optionally the pid of the user whose reservations to list
+            Optionally the id of the equipment whose reservations to list
+            Optionally the [since, until) window the reservations completed in, e.g. a term
+            The `next_cursor` of a previous page, or an empty string for the first page
+            The maximum number of reservations to return
+
+        Returns:
+            A page of completed reservations and the cursor of the next page
+
+        Throws:
+            A UserPermissionError if the user may not view the requested history
+            A ValueError if the cursor is invalid"""
+        if user_pid is None or user_pid != subject.pid or equipment_id is not None:
+            self._permission.enforce(subject, 'reservation.history', 'reservation/history')
+
+        query = select(ReservationHistoryEntity)
+        if user_pid is not None:
+            user_id = self._session.scalar(select(UserEntity.id).where(UserEntity.pid == user_pid))
+            if user_id is None:
+                return ReservationHistoryPage(items=[])
+            query = query.where(ReservationHistoryEntity.user_id == user_id)
+        if equipment_id is not None:
+            query = query.where(ReservationHistoryEntity.equipment_id == equipment_id)
+        if since is not None:
+            query = query.where(ReservationHistoryEntity.completed_at >= since)
+        if until is not None:
+            query = query.where(ReservationHistoryEntity.completed_at < until)
+        if cursor != '':
+            values = decode_cursor(cursor)
+            try:
+                completed_at, id = datetime.fromisoformat(values[0]), int(values[1])
+            except (IndexError, TypeError, ValueError) as e:
+                raise ValueError('Invalid pagination cursor') from e
+            # The plain bound lets the planner prune later months; the row comparison breaks ties.
+            query = query.where(
+                ReservationHistoryEntity.completed_at <= completed_at,
+                tuple_(ReservationHistoryEntity.completed_at, ReservationHistoryEntity.id) < tuple_(completed_at, id),
+            )
+        query = query.order_by(ReservationHistoryEntity.completed_at.desc(), ReservationHistoryEntity.id.desc())
+
+        entities = self._session.scalars(query.limit(limit + 1)).all()
+        next_cursor = None
+        if len(entities) > limit:
+            entities = entities[:limit]
+            next_cursor = encode_cursor(entities[-1].completed_at.isoformat(), entities[-1].id)
+        return ReservationHistoryPage(items=[entity.to_model() for entity in entities], next_cursor=next_cursor)
+
+    def _ensure_partition(self, month: datetime):
+        name = _partition_name(month)
+        if self._session.scalar(select(func.to_regclass(name))) is not None:
+            return
+        self._session.execute(select(func.pg_advisory_xact_lock(_PARTITION_LOCK)))
+        self._session.execute(text(
+            f'CREATE TABLE IF NOT EXISTS {name} PARTITION OF {ReservationHistoryEntity.__tablename__} '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+        ))
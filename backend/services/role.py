@@ -37,6 +37,7 @@ class RoleService:
         assert role is permission.role
         self._session.delete(permission)
         self._session.commit()
+        self._permission.invalidate()
         return True
 
     def add(self, subject: User, id: int, member: User):
@@ -46,6 +47,7 @@ class RoleService:
         if user:
             role.users.append(user)
             self._session.commit()
+            self._permission.invalidate(user.id)
         return self.details(subject, id)
 
     def remove(self, subject: User, id: int, userId: int):
@@ -54,4 +56,5 @@ class RoleService:
         user = self._session.get(UserEntity, userId)
         role.users.remove(user)
         self._session.commit()
+        self._permission.invalidate(userId)
         return True
\ No newline at end of file
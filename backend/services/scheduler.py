@@ -0,0 +1,75 @@
+"""Periodic background jobs run alongside request handling in each worker process.
+
+Jobs are plain blocking functions run on the event loop's default executor, a thread pool separate from the
+one Starlette runs synchronous routes on, so a slow job never delays a request. A job waits `interval` seconds
+after each run finishes before starting again and so never overlaps itself, and at most `max_concurrency`
+jobs run at once. A job coordinates across worker processes itself, typically with an advisory lock, and
+returns None when another worker holds it.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable
+from ..models import ScheduledJobStatus
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], int | None]
+"""A job returns the number of items it handled, or None if another worker ran it instead."""
+
+
+class Scheduler:
+
+    def __init__(self, max_concurrency: int = 2):
+        self._max_concurrency = max_concurrency
+        self._jobs: dict[str, tuple[Job, ScheduledJobStatus]] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    def every(self, interval: float, name: str, job: Job) -> None:
+        """Register `job` to run every `interval` seconds once the scheduler starts, beginning immediately."""
+        self._jobs[name] = (job, ScheduledJobStatus(name=name, interval=interval))
+
+    async def start(self) -> None:
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+        self._tasks = [
+            asyncio.create_task(self._loop(job, status, semaphore), name=f'scheduler-{name}')
+            for name, (job, status) in self._jobs.items()
+        ]
+
+    async def stop(self) -> None:
+        """Stop scheduling runs. A run already in progress finishes on its thread."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def status(self) -> list[ScheduledJobStatus]:
+        return [status.copy() for _, status in self._jobs.values()]
+
+    async def _loop(self, job: Job, status: ScheduledJobStatus, semaphore: asyncio.Semaphore) -> None:
+        while True:
+            async with semaphore:
+                await self._run(job, status)
+            await asyncio.sleep(status.interval)
+
+    async def _run(self, job: Job, status: ScheduledJobStatus) -> None:
+        status.last_run = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        try:
+            processed = await asyncio.to_thread(job)
+        except Exception:
+            status.failures += 1
+            logger.exception('Scheduled job %s failed', status.name)
+        else:
+            if processed is None:
+                status.skipped += 1
+            else:
+                status.runs += 1
+                status.processed += processed
+        status.last_duration_ms = (time.perf_counter() - started) * 1000
+
+
+scheduler = Scheduler()
+"""Process-level scheduler started and stopped with the application."""
@@ -1,11 +1,70 @@
+import re
+import time
+from typing import Callable
 from fastapi import Depends
-from sqlalchemy import select, or_, func
+from sqlalchemy import select, or_, func, tuple_, Select
 from sqlalchemy.orm import Session
 from ..database import db_session
-from ..models import User, Paginated, PaginationParams
+from ..models import Batch, User, Paginated, PaginationParams
 from ..entities import UserEntity
+from .batch import batch_ids, any_id, ordered_batch
+from .cache import TTLCache, VersionedCache
+from .pagination import encode_cursor, decode_seek_key
 from .permission import PermissionService
 
+# Columns users may be ordered by, mapped to the indexed sort key used to seek between pages. Unique
+# columns are a complete key on their own; the others are indexed together with `id` as a tie-breaker.
+_ORDER_KEYS = {
+    'first_name': (UserEntity.first_name, UserEntity.id),
+    'last_name': (UserEntity.last_name, UserEntity.id),
+    'onyen': (UserEntity.onyen,),
+    'email': (UserEntity.email,),
+    'pid': (UserEntity.pid,),
+    'id': (UserEntity.id,),
+}
+
+# Words of a search query, split the same way Postgres' `simple` text search configuration splits them.
+_SEARCH_WORD = re.compile(r'[^\W_]+')
+
+# Users resolved from bearer tokens, keyed by token and without their permissions. An entry lives no longer
+# than its token. Saving any user bumps the generation of this worker; the TTL bounds staleness from edits
+# made in other worker processes.
+_authenticated: VersionedCache[str, User] = VersionedCache(maxsize=4096, ttl=300)
+
+# Fields of the User model and the columns they are read from. Listing selects these columns directly rather
+# than loading entities; permissions are not part of a listing.
+_LIST_FIELDS = tuple(field for field in User.__fields__ if field != 'permissions')
+_LIST_COLUMNS = tuple(getattr(UserEntity, field) for field in _LIST_FIELDS)
+
+# Total counts of users matching a list filter. New users clear it; the TTL bounds staleness otherwise.
+_list_counts: TTLCache[str, int] = TTLCache(maxsize=256, ttl=30)
+
+
+def _search_statement(query: str) -> Select | None:
+    """Build the ranked full-text search for `query`, or None if it contains no words."""
+    words = _SEARCH_WORD.findall(query.lower())
+    if len(words) == 0:
+        return None
+    ts_query = func.to_tsquery('simple', ' & '.join(f'{word}:*' for word in words))
+    return (
+        select(UserEntity)
+        .where(UserEntity.search_vector.op('@@')(ts_query))
+        .order_by(
+            func.ts_rank(UserEntity.search_vector, ts_query).desc(),
+            UserEntity.last_name,
+            UserEntity.first_name,
+            UserEntity.id,
+        )
+        .limit(10)
+    )
+
+
+def _token_ttl(auth_info: dict) -> float:
+    """Seconds a token's user may stay cached: the cache's TTL, or less if the token expires sooner."""
+    if 'exp' not in auth_info:
+        return _authenticated.ttl
+    return max(0.0, min(_authenticated.ttl, auth_info['exp'] - time.time()))
+
 
 class UserService:
 
@@ -26,22 +85,100 @@ class UserService:
             model.permissions = self._permission.get_permissions(model)
             return model
 
+    def get_many(self, pids: "list[int]") -> Batch[User]:
+        """Function that returns the users with the given pids in a single query.
+
+        Users are read as in a listing, without their permissions.
+
+        Args:
+            The pids of the users, at most `MAX_BATCH_SIZE` distinct ones
+
+        Returns:
+            The users found, in the order of the pids, and the pids of users that don't exist
+
+        Throws:
+            A ValueError if more than `MAX_BATCH_SIZE` distinct pids are given"""
+        pids = batch_ids(pids)
+        query = select(*_LIST_COLUMNS).where(any_id(UserEntity.pid, pids))
+        found = {row.pid: User(**row._asdict()) for row in self._session.execute(query)}
+        return ordered_batch(pids, found)
+
+    def authenticate(self, token: str, claims: Callable[[str], dict], permissions: bool = True) -> User | None:
+        """Function that returns the registered user a bearer token was issued to.
+
+        Users are cached by token until the token's `exp`, so repeated requests with the same token neither
+        verify it again nor query the user. Permissions come from `PermissionService`'s own cache, which
+        grants and revocations invalidate.
+
+        Args:
+            The bearer token
+            A function verifying the token and returning its claims, raising if it is invalid. Only called
+            when the token is not cached.
+            Whether to load the user's permissions, which routes that only pass the user on to services
+            don't need
+
+        Returns:
+            The user with the token's pid, or None if no such user is registered"""
+        generation = _authenticated.generation
+        user = _authenticated.get(token, generation)
+        if user is None:
+            auth_info = claims(token)
+            query = select(UserEntity).where(UserEntity.pid == auth_info['pid'])
+            user_entity: UserEntity = self._session.scalar(query)
+            if user_entity is None:
+                return None
+            user = user_entity.to_model()
+            _authenticated.set(token, user, generation, _token_ttl(auth_info))
+        user = user.copy()
+        if permissions:
+            user.permissions = self._permission.get_permissions(user)
+        return user
+
     def search(self, subject: User, query: str) -> list[User]:
-        statement = select(UserEntity)
-        criteria = or_(
-            UserEntity.first_name.ilike(f'%{query}%'),
-            UserEntity.last_name.ilike(f'%{query}%'),
-            UserEntity.onyen.ilike(f'%{query}%'),
-            UserEntity.email.ilike(f'%{query}%'),
-        )
-        statement = statement.where(criteria).limit(10)
+        """Find the ten users best matching every word of `query`.
+
+        Each word is matched as a prefix of a word in a user's name, onyen or email through the GIN-indexed
+        `search_vector`, so a query like `jane do` finds Jane Doe without scanning the user table."""
+        statement = _search_statement(query)
+        if statement is None:
+            return []
         entities = self._session.execute(statement).scalars()
         return [entity.to_model() for entity in entities]
 
     def list(self, subject: User, pagination_params: PaginationParams) -> Paginated[User]:
+        """List a page of users.
+
+        When `pagination_params.cursor` is set, the page seeks directly past the cursor's row on an indexed
+        sort key; otherwise `page` is used as an offset. Either way, `next_cursor` of the result continues
+        from the last user on the page.
+
+        Raises:
+            ValueError: if `order_by` is not an indexed column or the cursor is invalid."""
+        rows, length, next_cursor = self._page(subject, pagination_params)
+        return Paginated(
+            items=[User(**row) for row in rows],
+            length=length,
+            params=pagination_params,
+            next_cursor=next_cursor
+        )
+
+    def list_rows(self, subject: User, pagination_params: PaginationParams) -> dict:
+        """`list` as plain JSON-ready dicts in the shape of `Paginated[User]`, without building a model per user.
+
+        Raises:
+            ValueError: if `order_by` is not an indexed column or the cursor is invalid."""
+        rows, length, next_cursor = self._page(subject, pagination_params)
+        return {'items': rows, 'length': length, 'params': pagination_params.dict(), 'next_cursor': next_cursor}
+
+    def _page(self, subject: User, pagination_params: PaginationParams) -> "tuple[list[dict], int, str | None]":
         self._permission.enforce(subject, 'user.list', 'user/')
 
-        statement = select(UserEntity)
+        order_by = pagination_params.order_by or 'id'
+        if order_by not in _ORDER_KEYS:
+            raise ValueError(f'Cannot order users by `{order_by}`')
+        order_key = _ORDER_KEYS[order_by]
+
+        statement = select(*_LIST_COLUMNS)
         length_statement = select(func.count()).select_from(UserEntity)
         if pagination_params.filter != '':
             query = pagination_params.filter
@@ -53,19 +190,27 @@ class UserService:
             statement = statement.where(criteria)
             length_statement = length_statement.where(criteria)
 
-        offset = pagination_params.page * pagination_params.page_size
         limit = pagination_params.page_size
+        if pagination_params.cursor != '':
+            key = decode_seek_key(pagination_params.cursor, order_by, order_key)
+            statement = statement.where(tuple_(*order_key) > tuple_(*key))
+        else:
+            statement = statement.offset(pagination_params.page * limit)
 
-        if pagination_params.order_by != '':
-            statement = statement.order_by(
-                getattr(UserEntity, pagination_params.order_by))
+        statement = statement.order_by(*order_key).limit(limit + 1)
 
-        statement = statement.offset(offset).limit(limit)
+        length = _list_counts.get(pagination_params.filter)
+        if length is None:
+            length = self._session.execute(length_statement).scalar()
+            _list_counts.set(pagination_params.filter, length)
+        rows = self._session.execute(statement).all()
 
-        length = self._session.execute(length_statement).scalar()
-        entities = self._session.execute(statement).scalars()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(order_by, *(getattr(rows[-1], column.key) for column in order_key))
 
-        return Paginated(items=[entity.to_model() for entity in entities], length=length, params=pagination_params)
+        return [dict(zip(_LIST_FIELDS, row), permissions=[]) for row in rows], length, next_cursor
 
     def save(self, user: User) -> User | None:
         if user.id:
@@ -75,4 +220,6 @@ class UserService:
             entity = UserEntity.from_model(user)
             self._session.add(entity)
         self._session.commit()
+        _list_counts.clear()
+        _authenticated.bump()
         return entity.to_model()
@@ -2,12 +2,18 @@
 
 import pytest
 
+from contextlib import contextmanager
 from sqlalchemy import create_engine, text, Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.pool import NullPool
 
-from ..database import _engine_str
+from ..database import _engine_str, track_queries
 from ..env import getenv
+from ..models import Equipment, User, Role
+from ..entities import EquipmentEntity, UserEntity, RoleEntity, PermissionEntity
+from ..services import ReservationService, EquipmentService, PermissionService, OccupancyService, ReservationHistoryService
 
 POSTGRES_DATABASE = f'{getenv("POSTGRES_DATABASE")}_test'
 POSTGRES_USER = getenv('POSTGRES_USER')
@@ -38,9 +44,17 @@ def test_engine() -> Engine:
     return create_engine(_engine_str(POSTGRES_DATABASE))
 
 
+@pytest.fixture(scope='session')
+def test_async_engine(test_engine: Engine) -> AsyncEngine:
+    # Each async test runs its own event loop, so connections must not outlive it in a pool.
+    return create_async_engine(_engine_str(POSTGRES_DATABASE, dialect='postgresql+asyncpg'), poolclass=NullPool)
+
+
 @pytest.fixture(scope='function')
 def test_session(test_engine: Engine):
     from .. import entities
+    from ..services import cache
+    cache.clear_all()
     entities.EntityBase.metadata.drop_all(test_engine)
     entities.EntityBase.metadata.create_all(test_engine)
     session = Session(test_engine)
@@ -48,3 +62,54 @@ def test_session(test_engine: Engine):
         yield session
     finally:
         session.close()
+
+
+@pytest.fixture()
+def query_budget():
+    """Fail the test when the code inside `with query_budget(n):` issues more than `n` statements.
+
+    Declaring the statements a service method needs, with more rows than that in the database, catches a
+    relationship loaded lazily per row, e.g. in a `to_model` chain, as soon as it is introduced."""
+    @contextmanager
+    def budget(limit: int):
+        with track_queries() as stats:
+            yield stats
+        assert stats.count <= limit, (
+            f'{stats.count} statements exceed the budget of {limit}; the slowest was: {stats.slowest}')
+    return budget
+
+
+# Users of the reservation tests: staff may manage every reservation, the student only books.
+staff = User(id=1, pid=888888888, onyen='staff', email='staff@unc.edu')
+staff_role = Role(id=1, name='staff')
+student = User(id=2, pid=100000000, onyen='sol', first_name='Sol', last_name='Student', email='sol@unc.edu')
+
+
+@pytest.fixture()
+def seed_reservations(test_session: Session):
+    """Add `staff`, `student` and the given equipment, for a test module's autouse setup to call with its own."""
+    def seed(*equipment: Equipment):
+        staff_entity = UserEntity.from_model(staff)
+        staff_role_entity = RoleEntity.from_model(staff_role)
+        staff_role_entity.users.append(staff_entity)
+        test_session.add_all([staff_entity, staff_role_entity, UserEntity.from_model(student)])
+        test_session.add(PermissionEntity(action='reservation.*', resource='reservation/*', role=staff_role_entity))
+        test_session.add_all([EquipmentEntity.from_model(model) for model in equipment])
+        test_session.commit()
+    return seed
+
+
+@pytest.fixture()
+def occupancy_service(test_session: Session):
+    return OccupancyService(test_session, PermissionService(test_session))
+
+
+@pytest.fixture()
+def history_service(test_session: Session):
+    return ReservationHistoryService(test_session, PermissionService(test_session))
+
+
+@pytest.fixture()
+def reservation_service(test_session: Session, occupancy_service: OccupancyService, history_service: ReservationHistoryService):
+    permission = PermissionService(test_session)
+    return ReservationService(test_session, EquipmentService(test_session, permission), permission, occupancy_service, history_service)
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import pytest
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+from ...models import Equipment, Reservation, User, Role
+from ...entities import EquipmentEntity, ReservationEntity, UserEntity, RoleEntity, PermissionEntity
+from ...services import UserPermissionError
+from ...services.aio import AsyncPermissionService, AsyncUserService, AsyncEquipmentService, AsyncReservationService
+
+# Mock data
+laptop = Equipment(id=1, name='Lenovo', type='laptop', status=0, notes='')
+camera = Equipment(id=2, name='Sony', type='camera', status=1, notes='')
+
+staff = User(id=1, pid=888888888, onyen='staff', first_name='Staff', last_name='Member', email='staff@unc.edu')
+staff_role = Role(id=1, name='staff')
+student = User(id=2, pid=100000000, onyen='sol', first_name='Sol', last_name='Student', email='sol@unc.edu')
+
+reservation = Reservation(id=1, type=laptop.type, user=student, equipment=laptop, notes='')
+
+
+@pytest.fixture(autouse=True)
+def setup(test_session: Session):
+    staff_entity = UserEntity.from_model(staff)
+    staff_role_entity = RoleEntity.from_model(staff_role)
+    staff_role_entity.users.append(staff_entity)
+    test_session.add_all([staff_entity, staff_role_entity, UserEntity.from_model(student)])
+    test_session.add(PermissionEntity(action='reservation.*', resource='reservation/*', role=staff_role_entity))
+    test_session.add_all([EquipmentEntity.from_model(laptop), EquipmentEntity.from_model(camera)])
+    test_session.add(ReservationEntity.from_model(reservation))
+    test_session.commit()
+
+
+def run(test_async_engine: AsyncEngine, use):
+    """Run `use(session, permission)` against an AsyncSession on its own event loop."""
+    async def main():
+        async with AsyncSession(test_async_engine) as session:
+            return await use(session, AsyncPermissionService(session))
+    return asyncio.run(main())
+
+
+def test_equipment_reads(test_async_engine: AsyncEngine):
+    async def use(session, permission):
+        equipment_svc = AsyncEquipmentService(session, permission)
+        assert await equipment_svc.get(camera.id) == camera
+        assert await equipment_svc.get(99) is None
+        assert await equipment_svc.get_row(camera.id, 'id,status') == {'id': camera.id, 'status': camera.status}
+        assert json.loads((await equipment_svc.cached_filter_type('laptop')).body) == [laptop.dict()]
+        assert json.loads((await equipment_svc.cached_filter_status(1, 'id,name')).body) == [{'id': camera.id, 'name': camera.name}]
+        assert json.loads((await equipment_svc.cached_list()).body) == [laptop.dict(), camera.dict()]
+    run(test_async_engine, use)
+
+
+def test_reservation_reads(test_async_engine: AsyncEngine):
+    async def use(session, permission):
+        reservation_svc = AsyncReservationService(session, permission)
+        assert await reservation_svc.get(reservation.id) == reservation
+        assert await reservation_svc.filter_user(student.pid) == [reservation]
+        assert await reservation_svc.filter_type('laptop', staff) == [reservation]
+        assert await reservation_svc.filter_type_rows('laptop', staff, 'id') == [{'id': reservation.id}]
+        assert await reservation_svc.filter_user_rows(student.pid, 'user.onyen') == [{'user': {'onyen': student.onyen}}]
+        assert await reservation_svc.get_row(reservation.id, 'id,notes') == {'id': reservation.id, 'notes': ''}
+        with pytest.raises(UserPermissionError):
+            await reservation_svc.filter_type('laptop', student)
+        assert await reservation_svc.list_rows('id,user.onyen') == [{'id': reservation.id, 'user': {'onyen': student.onyen}}]
+        compact = await reservation_svc.list_compact()
+        assert compact['reservations'][0]['user_id'] == student.id and list(compact['equipment']) == [str(laptop.id)]
+    run(test_async_engine, use)
+
+
+def test_user_reads(test_async_engine: AsyncEngine):
+    async def use(session, permission):
+        user_svc = AsyncUserService(session)
+        assert await user_svc.authenticate('staff', lambda token: {'pid': staff.pid}) == staff
+        assert await user_svc.authenticate('unknown', lambda token: {'pid': 123}) is None
+        assert await user_svc.search(staff, 'sol stu') == [student]
+    run(test_async_engine, use)
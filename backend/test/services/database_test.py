@@ -0,0 +1,74 @@
+import pytest
+import threading
+import time
+
+from sqlalchemy import Engine, text
+from sqlalchemy.orm import Session
+from ... import database
+from ...database import InstrumentedQueuePool, create_engine, engine_options
+from ...models import PoolStatus
+from ...services.health import HealthService
+from ..conftest import POSTGRES_DATABASE
+
+SETTINGS = ('POSTGRES_ECHO', 'POSTGRES_POOL_SIZE', 'POSTGRES_STATEMENT_TIMEOUT', 'POSTGRES_PREPARED_STATEMENT_CACHE_SIZE')
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch: pytest.MonkeyPatch) -> pytest.MonkeyPatch:
+    for variable in SETTINGS:
+        monkeypatch.delenv(variable, raising=False)
+    return monkeypatch
+
+
+def test_engine_options_defaults():
+    options = engine_options()
+    assert options['echo'] is False
+    assert options['poolclass'] is InstrumentedQueuePool
+    assert (options['pool_size'], options['max_overflow'], options['pool_pre_ping']) == (5, 10, True)
+    assert 'connect_args' not in options
+
+def test_engine_options_from_environment(environment: pytest.MonkeyPatch):
+    environment.setenv('POSTGRES_ECHO', 'debug')
+    environment.setenv('POSTGRES_POOL_SIZE', '20')
+    environment.setenv('POSTGRES_STATEMENT_TIMEOUT', '2500')
+    options = engine_options()
+    assert options['echo'] == 'debug'
+    assert options['pool_size'] == 20
+    assert options['connect_args'] == {'options': '-c statement_timeout=2500'}
+    environment.setenv('POSTGRES_ECHO', 'True')
+    assert engine_options()['echo'] is True
+
+def test_statement_timeout_applies_to_connections(test_engine: Engine, environment: pytest.MonkeyPatch):
+    environment.setenv('POSTGRES_STATEMENT_TIMEOUT', '2500')
+    engine = create_engine(POSTGRES_DATABASE)
+    with engine.connect() as connection:
+        assert connection.scalar(text('SHOW statement_timeout')) == '2500ms'
+    engine.dispose()
+
+def test_async_engine_rewrites_connect_args(environment: pytest.MonkeyPatch):
+    created = {}
+    environment.setattr(database, 'sqlalchemy_create_async_engine', lambda url, **options: created.update(options, url=url))
+    environment.setenv('POSTGRES_STATEMENT_TIMEOUT', '2500')
+    environment.setenv('POSTGRES_PREPARED_STATEMENT_CACHE_SIZE', '0')
+    database.create_async_engine('example')
+    assert created['url'].startswith('postgresql+asyncpg://') and created['url'].endswith('/example')
+    assert 'poolclass' not in created
+    assert created['connect_args'] == {'server_settings': {'statement_timeout': '2500'}, 'prepared_statement_cache_size': 0}
+
+def test_pool_status_counts_blocked_checkouts(test_engine: Engine):
+    engine = create_engine(POSTGRES_DATABASE, pool_size=1, max_overflow=0, pool_timeout=10)
+    health_svc = HealthService(Session(engine))
+    held = engine.connect()
+    assert health_svc.pool() == PoolStatus(size=1, checked_in=0, checked_out=1, overflow=0, waiters=0)
+
+    waiter = threading.Thread(target=lambda: engine.connect().close())
+    waiter.start()
+    deadline = time.monotonic() + 5
+    while health_svc.pool().waiters == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert health_svc.pool().waiters == 1
+
+    held.close()
+    waiter.join()
+    assert health_svc.pool() == PoolStatus(size=1, checked_in=1, checked_out=0, overflow=0, waiters=0)
+    engine.dispose()
@@ -0,0 +1,70 @@
+import asyncio
+import time
+import httpx
+import pytest
+
+from ...services.delegated_auth import DelegatedAuthVerifier, DelegatedAuthError
+
+
+class StandInAuthServer:
+    """Local stand-in for the auth server's `/verify` route, failing the first `failures` requests."""
+
+    def __init__(self, tokens: dict[str, tuple[str, int]], failures: int = 0, status: int = 503, delay: float = 0):
+        self.tokens = tokens
+        self.failures = failures
+        self.status = status
+        self.delay = delay
+        self.requests = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        if self.requests <= self.failures:
+            if self.status == 0:
+                raise httpx.ConnectError('connection refused', request=request)
+            return httpx.Response(self.status)
+        token = request.url.params['token']
+        if token not in self.tokens:
+            return httpx.Response(401)
+        uid, pid = self.tokens[token]
+        return httpx.Response(200, json={'uid': uid, 'pid': pid})
+
+
+def verify_all(server: StandInAuthServer, *tokens: str) -> list:
+    async def main():
+        verifier = DelegatedAuthVerifier('https://auth.test', transport=httpx.MockTransport(server), backoff=0.01)
+        try:
+            return await asyncio.gather(*(verifier.verify(token) for token in tokens), return_exceptions=True)
+        finally:
+            await verifier.aclose()
+    return asyncio.run(main())
+
+
+def test_verify_caches_verified_tokens():
+    server = StandInAuthServer({'good': ('sol', 100000000)})
+    async def main():
+        verifier = DelegatedAuthVerifier('https://auth.test', transport=httpx.MockTransport(server))
+        results = [await verifier.verify('good'), await verifier.verify('good'), await verifier.verify('bad')]
+        await verifier.aclose()
+        return results
+    assert asyncio.run(main()) == [('sol', 100000000), ('sol', 100000000), None]
+    assert server.requests == 2
+
+
+def test_verify_retries_failures_with_backoff():
+    server = StandInAuthServer({'good': ('sol', 100000000)}, failures=2, status=0)
+    assert verify_all(server, 'good') == [('sol', 100000000)]
+    assert server.requests == 3
+
+    server = StandInAuthServer({'good': ('sol', 100000000)}, failures=3, status=502)
+    [error] = verify_all(server, 'good')
+    assert isinstance(error, DelegatedAuthError) and 'HTTP 502' in str(error)
+    assert server.requests == 3
+
+
+def test_login_storm_is_concurrent():
+    tokens = {f'token{i}': (f'user{i}', 100000000 + i) for i in range(100)}
+    server = StandInAuthServer(tokens, delay=0.05)
+    started = time.perf_counter()
+    assert verify_all(server, *tokens) == list(tokens.values())
+    assert time.perf_counter() - started < 1
@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session
+from ...models import Equipment, EquipmentStatusChange, User, Role
+from ...entities import EquipmentEntity, UserEntity, RoleEntity, PermissionEntity
+from ...services import EquipmentService, PermissionService, EquipmentUnavailableError
+from ...services import equipment_events
+from ...services.equipment_events import EventBroker, NotifyBridge, RESYNC
+
+# Mock data
+laptop = Equipment(id=1, name='Lenovo', type='laptop', status=1, notes='')
+camera = Equipment(id=2, name='Sony', type='camera', status=0, notes='')
+
+staff = User(id=1, pid=888888888, onyen='staff', email='staff@unc.edu')
+staff_role = Role(id=1, name='staff')
+
+
+@pytest.fixture(autouse=True)
+def setup(test_session: Session):
+    staff_entity = UserEntity.from_model(staff)
+    staff_role_entity = RoleEntity.from_model(staff_role)
+    staff_role_entity.users.append(staff_entity)
+    test_session.add_all([staff_entity, staff_role_entity])
+    test_session.add(PermissionEntity(action='equipment.*', resource='equipment/*', role=staff_role_entity))
+    test_session.add_all([EquipmentEntity.from_model(laptop), EquipmentEntity.from_model(camera)])
+    test_session.commit()
+
+
+@pytest.fixture()
+def equipment_service(test_session: Session):
+    return EquipmentService(test_session, PermissionService(test_session))
+
+
+def received(broker: EventBroker, write) -> list:
+    """Events `broker` delivers to a subscriber while `write()` runs on a worker thread."""
+    async def main():
+        with broker.subscribe() as queue:
+            await asyncio.to_thread(write)
+            events = []
+            try:
+                while True:
+                    events.append(await asyncio.wait_for(queue.get(), 0.5))
+            except asyncio.TimeoutError:
+                return events
+    return asyncio.run(main())
+
+
+def test_commit_publishes_status_changes(equipment_service: EquipmentService):
+    def write():
+        equipment_service.checkout(laptop.copy())
+        equipment_service.checkin(camera.copy())
+        equipment_service._session.commit()
+    assert received(equipment_events.broker, write) == [
+        EquipmentStatusChange(id=laptop.id, status=0), EquipmentStatusChange(id=camera.id, status=1)]
+
+
+def test_rollback_publishes_nothing(equipment_service: EquipmentService):
+    def write():
+        equipment_service.checkout(laptop.copy())
+        with pytest.raises(EquipmentUnavailableError):
+            equipment_service.checkout(camera.copy())
+        equipment_service._session.rollback()
+    assert received(equipment_events.broker, write) == []
+
+
+def test_other_writes_publish_resync(equipment_service: EquipmentService):
+    def write():
+        equipment_service.update(laptop.copy(update={'status': 0}), staff)
+        equipment_service.update(laptop.copy(update={'notes': 'new battery'}), staff)
+    assert received(equipment_events.broker, write) == [EquipmentStatusChange(id=laptop.id, status=0), RESYNC]
+
+
+def test_slow_subscriber_is_sent_resync():
+    broker = EventBroker(queue_size=2)
+    def write():
+        for id in range(3):
+            broker.publish([EquipmentStatusChange(id=id, status=0)])
+        broker.publish([EquipmentStatusChange(id=3, status=1)])
+    assert received(broker, write) == [RESYNC, EquipmentStatusChange(id=3, status=1)]
+
+
+def test_notify_bridge_relays_commits(equipment_service: EquipmentService, test_engine: Engine, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(equipment_events, 'notify_enabled', True)
+    broker = EventBroker()
+    bridge = NotifyBridge(test_engine, target=broker, poll_interval=0.1)
+    bridge.start()
+    try:
+        assert bridge.wait_listening(5)
+        def write():
+            equipment_service.checkout(laptop.copy())
+            equipment_service._session.commit()
+            equipment_service.checkin(laptop.copy())
+            equipment_service._session.rollback()
+        assert received(broker, write) == [EquipmentStatusChange(id=laptop.id, status=0)]
+    finally:
+        bridge.stop()
@@ -1,9 +1,15 @@
+import json
 import pytest
 
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
 from sqlalchemy.orm import Session
-from ...models import Equipment, User, Role, Permission
+from ...models import Equipment, User, Role, Permission, EquipmentPaginationParams, EquipmentTypeSummary
 from ...entities import EquipmentEntity, UserEntity, RoleEntity, PermissionEntity
-from ...services import EquipmentService, PermissionService, UserPermissionError
+from ...services import EquipmentService, PermissionService, UserPermissionError, EquipmentUnavailableError
+from ...services import bulk
+from ...services.batch import MAX_BATCH_SIZE
+from ...services.pagination import encode_cursor
 
 # Mock data
 monitor1 = Equipment(id=1, name='Asus', type='monitor', status=0, notes='')
@@ -72,6 +78,13 @@ def test_get_by_id2(equipment_service: EquipmentService):
     query_result = equipment_service.get(laptop1.id)
     assert (laptop1 == query_result) is True
 
+def test_get_many_preserves_order_and_reports_missing(equipment_service: EquipmentService):
+    batch = equipment_service.get_many([laptop1.id, 999, camera.id, laptop1.id])
+    assert batch.items == [laptop1, camera]
+    assert batch.missing == [999]
+    with pytest.raises(ValueError):
+        equipment_service.get_many(range(MAX_BATCH_SIZE + 1))
+
 def test_filter_type(equipment_service: EquipmentService):
     expected = [laptop1, laptop2]
     query_result = equipment_service.filter_type('laptop')
@@ -91,6 +104,168 @@ def test_list(equipment_service: EquipmentService):
     query_result = equipment_service.list()
     assert (query_result == models) is True
 
+def test_cached_list_reuses_serialization(equipment_service: EquipmentService, test_session: Session):
+    listing = equipment_service.cached_list()
+    assert sorted(json.loads(listing.body), key=lambda row: row['id']) == [model.dict() for model in models]
+    test_session.execute(text("UPDATE equipment SET name = 'uncached' WHERE id = 1"))
+    assert equipment_service.cached_list() is listing
+    assert equipment_service.cached_filter_status(1) is equipment_service.cached_filter_status(1)
+    test_session.rollback()
+
+def test_cached_list_selects_requested_fields(equipment_service: EquipmentService):
+    listing = equipment_service.cached_list(' status,id')
+    assert sorted(json.loads(listing.body), key=lambda row: row['id']) == [{'id': model.id, 'status': model.status} for model in models]
+    assert equipment_service.cached_list('id,status') is listing
+    assert equipment_service.cached_list().etag != listing.etag
+    with pytest.raises(ValueError):
+        equipment_service.cached_filter_type('monitor', 'id,serial')
+
+def test_rows_select_requested_fields(equipment_service: EquipmentService):
+    assert equipment_service.get_row(keyboard.id, 'id,notes') == {'id': keyboard.id, 'notes': keyboard.notes}
+    assert equipment_service.get_row(99, 'id') is None
+    start = datetime(2030, 4, 1, 9, tzinfo=timezone.utc)
+    assert equipment_service.available_rows('laptop', start, start + timedelta(hours=1), 'id') == [{'id': laptop1.id}, {'id': laptop2.id}]
+    assert equipment_service.available('laptop', start, start + timedelta(hours=1)) == [laptop1, laptop2]
+    with pytest.raises(ValueError):
+        equipment_service.get_row(keyboard.id, 'id,serial')
+
+def test_paginate_rows_select_requested_fields(equipment_service: EquipmentService):
+    params = EquipmentPaginationParams(order_by='name', page_size=4)
+    page = equipment_service.paginate_rows(params, 'id')
+    assert page['items'] == [{'id': model.id} for model in (monitor1, monitor2, laptop1, laptop2)]
+    assert page['length'] == len(models)
+    rest = equipment_service.paginate_rows(params.copy(update={'cursor': page['next_cursor']}), 'id')
+    assert rest['items'] == [{'id': keyboard.id}, {'id': camera.id}] and rest['next_cursor'] is None
+
+def test_cached_list_invalidated_after_commit(equipment_service: EquipmentService):
+    listing = equipment_service.cached_list()
+    available = equipment_service.cached_filter_status(1)
+    with pytest.raises(EquipmentUnavailableError):
+        equipment_service.checkout(monitor1.copy())
+    equipment_service._session.rollback()
+    assert equipment_service.cached_list() is listing
+
+    equipment_service.update(Equipment(id=2, name='Dell 27', type='monitor', status=1, notes=''), staff)
+    assert equipment_service.cached_list().etag != listing.etag
+    assert equipment_service.cached_filter_status(1).etag != available.etag
+    assert {'id': 2, 'name': 'Dell 27', 'type': 'monitor', 'status': 1, 'notes': ''} in json.loads(equipment_service.cached_list().body)
+
+def test_paginate_follows_cursor(equipment_service: EquipmentService):
+    params = EquipmentPaginationParams(page_size=4)
+    first = equipment_service.paginate(params)
+    assert first.items == models[:4]
+    assert first.length == len(models)
+    second = equipment_service.paginate(params.copy(update={'cursor': first.next_cursor}))
+    assert second.items == models[4:]
+    assert second.next_cursor is None
+
+def test_paginate_ordered_by_name(equipment_service: EquipmentService):
+    params = EquipmentPaginationParams(page_size=2, order_by='name')
+    items = []
+    while True:
+        page = equipment_service.paginate(params)
+        items += page.items
+        if page.next_cursor is None:
+            break
+        params = params.copy(update={'cursor': page.next_cursor})
+    assert items == sorted(models, key=lambda model: (model.name, model.id))
+
+def test_paginate_combined_filters(equipment_service: EquipmentService):
+    params = EquipmentPaginationParams(type='monitor', status=1, filter='del')
+    page = equipment_service.paginate(params)
+    assert page.items == [monitor2]
+    assert page.length == 1
+
+def test_paginate_type_ignores_case(equipment_service: EquipmentService):
+    page = equipment_service.paginate(EquipmentPaginationParams(type='Laptop'))
+    assert page.items == [laptop1, laptop2]
+    assert page.length == 2
+
+def test_paginate_count_refreshes_after_add(equipment_service: EquipmentService):
+    params = EquipmentPaginationParams(type='laptop')
+    assert equipment_service.paginate(params).length == 2
+    equipment_service.add(Equipment(id=7, name='Apple', type='laptop', status=1, notes=''), staff)
+    assert equipment_service.paginate(params).length == 3
+
+def test_paginate_invalid_order(equipment_service: EquipmentService):
+    with pytest.raises(ValueError):
+        equipment_service.paginate(EquipmentPaginationParams(order_by='notes'))
+    with pytest.raises(ValueError):
+        equipment_service.paginate(EquipmentPaginationParams(cursor='not a cursor'))
+    for key in (['name', ['Dell'], 2], ['name', 'Dell', {'id': 2}], ['name', 'Dell', '2'], ['status', 'one', 2], ['id', True, True]):
+        with pytest.raises(ValueError):
+            equipment_service.paginate(EquipmentPaginationParams(order_by=key[0], cursor=encode_cursor(*key)))
+    assert equipment_service.paginate(EquipmentPaginationParams(order_by='name', cursor=encode_cursor('name', 'Dell', 2))).items
+
+def test_bulk_add_ndjson_reports_rejected_rows(equipment_service: EquipmentService, test_session: Session):
+    test_session.execute(text('ALTER SEQUENCE equipment_id_seq RESTART WITH 7'))
+    test_session.commit()
+    body = [
+        b'{"name": "HP", "type": "monitor", "status": 1}\n{"name": "Apple", "type": "lap',
+        b'top", "status": 1, "notes": "new"}\nnot json\n\n',
+        b'{"id": 4, "name": "Canon", "type": "camera", "status": 1}\n{"name": "Dell", "type": "monitor"}\n',
+        b'{"id": 20, "name": "Acer", "type": "monitor", "status": 0}',
+    ]
+    report = equipment_service.bulk_add(bulk.read('ndjson', body), staff, chunk_size=2)
+    assert report.inserted == 3
+    assert [error.line for error in report.errors] == [3, 5, 6]
+    assert report.errors[2].message == 'status: field required'
+    assert [(e.id, e.name, e.notes) for e in equipment_service.list()[6:]] == [(7, 'HP', ''), (8, 'Apple', 'new'), (20, 'Acer', '')]
+
+def test_bulk_add_csv(equipment_service: EquipmentService, test_session: Session):
+    test_session.execute(text('ALTER SEQUENCE equipment_id_seq RESTART WITH 7'))
+    body = [b'name,type,status,notes\nHP,monitor,1,\n"Dell, 27""",monitor,1,"two\nlines"\nBad,monitor,x,\n']
+    report = equipment_service.bulk_add(bulk.read('csv', body), staff)
+    assert report.inserted == 2
+    assert [(error.line, error.message) for error in report.errors] == [(5, 'status: value is not a valid integer')]
+    assert equipment_service.get(8) == Equipment(id=8, name='Dell, 27"', type='monitor', status=1, notes='two\nlines')
+
+def test_bulk_add_invalid_user(equipment_service: EquipmentService):
+    with pytest.raises(UserPermissionError):
+        equipment_service.bulk_add(bulk.read('ndjson', [b'{"name": "HP", "type": "monitor", "status": 1}']), user)
+    assert len(equipment_service.list()) == len(models)
+
+def test_export_round_trips(equipment_service: EquipmentService):
+    assert list(equipment_service.stream(batch_size=2)) == models
+    exported = b''.join(bulk.write('csv', equipment_service.stream(), Equipment.__fields__.keys()))
+    rows = [row for _, row in bulk.read('csv', [exported])]
+    assert [Equipment.parse_obj(row) for row in rows] == models
+
+def test_summary_counters_follow_writes(equipment_service: EquipmentService):
+    assert len(equipment_service.reconcile_summary()) == 4
+    assert equipment_service.summary() == [
+        EquipmentTypeSummary(type='camera', available=1, total=1),
+        EquipmentTypeSummary(type='keyboard', available=0, total=1),
+        EquipmentTypeSummary(type='laptop', available=2, total=2),
+        EquipmentTypeSummary(type='monitor', available=1, total=2),
+    ]
+    equipment_service.checkout(laptop1.copy())
+    equipment_service.checkin(monitor1.copy())
+    equipment_service.checkin(monitor2.copy())
+    equipment_service.claim('Laptop')
+    equipment_service._session.commit()
+    equipment_service.add(Equipment(id=7, name='Canon', type='camera', status=1), staff)
+    equipment_service.update(keyboard.copy(update={'type': 'camera', 'status': 1}), staff)
+    equipment_service.remove(camera.id, staff)
+    equipment_service.bulk_add(bulk.read('ndjson', [b'{"id": 8, "name": "HP", "type": "printer", "status": 0}\n{"id": 7}']), staff)
+    assert equipment_service.summary() == [
+        EquipmentTypeSummary(type='camera', available=2, total=2),
+        EquipmentTypeSummary(type='laptop', available=0, total=2),
+        EquipmentTypeSummary(type='monitor', available=2, total=2),
+        EquipmentTypeSummary(type='printer', available=0, total=1),
+    ]
+    assert equipment_service.reconcile_summary() == []
+
+def test_cached_summary_matches_summary(equipment_service: EquipmentService):
+    equipment_service.reconcile_summary()
+    listing = equipment_service.cached_summary()
+    assert json.loads(listing.body) == [model.dict() for model in equipment_service.summary()]
+    assert equipment_service.cached_summary() is listing
+    equipment_service.checkout(laptop1.copy())
+    equipment_service._session.commit()
+    assert json.loads(equipment_service.cached_summary().body) == [model.dict() for model in equipment_service.summary()]
+    assert equipment_service.cached_summary().etag != listing.etag
+
 def test_update_success(equipment_service: EquipmentService):
     thing_to_change = keyboard
     thing_to_change.name = 'Razer'
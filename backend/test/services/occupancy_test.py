@@ -0,0 +1,70 @@
+import pytest
+
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+from ...models import Equipment, Reservation
+from ...entities import ReservationOccupancyEntity
+from ...services import ReservationService, EquipmentService, PermissionService, OccupancyService, UserPermissionError
+from ..conftest import staff, student
+
+# Mock data
+laptop1 = Equipment(id=1, name='Lenovo', type='laptop', status=1, notes='')
+laptop2 = Equipment(id=2, name='Dell', type='laptop', status=1, notes='')
+camera = Equipment(id=3, name='Sony', type='camera', status=1, notes='')
+
+monday = datetime(2030, 4, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def setup(test_session: Session, seed_reservations):
+    seed_reservations(laptop1, laptop2, camera)
+    EquipmentService(test_session, PermissionService(test_session)).reconcile_summary()
+
+
+def book(equipment: Equipment, start: datetime, end: datetime, id: int) -> Reservation:
+    return Reservation(id=id, type=equipment.type, user=student, equipment=equipment, start=start, end=end)
+
+
+def test_grid_counts_bookings_per_hour(reservation_service: ReservationService, occupancy_service: OccupancyService):
+    reservation_service.add(book(laptop1, monday + timedelta(hours=9), monday + timedelta(hours=11), 1))
+    reservation_service.add(book(laptop2, monday + timedelta(hours=10, minutes=30), monday + timedelta(hours=12), 2))
+    reservation_service.add(book(camera, monday + timedelta(hours=8), monday + timedelta(hours=9), 3))
+    grid = occupancy_service.grid(staff, monday + timedelta(hours=8), monday + timedelta(hours=12, minutes=15))
+    assert (grid.start, grid.end) == (monday + timedelta(hours=8), monday + timedelta(hours=13))
+    assert grid.types == ['camera', 'laptop']
+    assert grid.capacity == [1, 2]
+    assert grid.booked == [[1, 0, 0, 0, 0], [0, 1, 2, 1, 0]]
+
+    reservation_service.remove(2)
+    grid = occupancy_service.grid(staff, monday + timedelta(hours=8), monday + timedelta(hours=13), ['laptop'])
+    assert grid.booked == [[0, 1, 1, 0, 0]]
+
+
+def test_bookings_count_against_their_equipment_type(reservation_service: ReservationService, occupancy_service: OccupancyService):
+    start = monday + timedelta(hours=9)
+    for type in ('Laptop', 'camera'):
+        with pytest.raises(ValueError):
+            reservation_service.add(book(laptop1, start, start + timedelta(hours=1), 1).copy(update={'type': type}))
+    grid = occupancy_service.grid(staff, start, start + timedelta(hours=1))
+    assert grid.types == ['camera', 'laptop'] and grid.booked == [[0], [0]]
+
+
+def test_rebuild_matches_incremental_counts(reservation_service: ReservationService, occupancy_service: OccupancyService, test_session: Session):
+    for id, day in enumerate(range(7), start=1):
+        start = monday + timedelta(days=day, hours=9)
+        reservation_service.add(book(laptop1 if day % 2 else laptop2, start, start + timedelta(hours=26), id))
+    week = occupancy_service.grid(staff, monday, monday + timedelta(days=8))
+    test_session.execute(delete(ReservationOccupancyEntity))
+    test_session.commit()
+    assert occupancy_service.rebuild() == 7 * 24 + 2
+    assert occupancy_service.grid(staff, monday, monday + timedelta(days=8)) == week
+
+
+def test_grid_validation(occupancy_service: OccupancyService):
+    with pytest.raises(UserPermissionError):
+        occupancy_service.grid(student, monday, monday + timedelta(days=1))
+    with pytest.raises(ValueError):
+        occupancy_service.grid(staff, monday, monday)
+    with pytest.raises(ValueError):
+        occupancy_service.grid(staff, monday, monday + timedelta(days=400))
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import pytest
+
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import Engine, select, func, text
+from sqlalchemy.orm import Session
+from ...models import Equipment, Reservation
+from ...services import ReservationService, PermissionService, OverdueService, UserPermissionError
+from ...services.overdue import _SWEEP_LOCK
+from ...services.scheduler import Scheduler
+from ..conftest import staff, student
+
+# Mock data
+laptop1 = Equipment(id=1, name='Lenovo', type='laptop', status=1, notes='')
+laptop2 = Equipment(id=2, name='Dell', type='laptop', status=1, notes='')
+camera = Equipment(id=3, name='Sony', type='camera', status=1, notes='')
+
+monday = datetime(2030, 4, 1, 9, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def setup(seed_reservations):
+    seed_reservations(laptop1, laptop2, camera)
+
+
+@pytest.fixture()
+def overdue_service(test_session: Session):
+    return OverdueService(test_session, PermissionService(test_session))
+
+
+def book(reservation_service: ReservationService, id: int, equipment: Equipment, hours: int):
+    reservation_service.add(Reservation(id=id, type=equipment.type, user=student, equipment=equipment,
+                                        start=monday, end=monday + timedelta(hours=hours)))
+
+
+def test_sweep_creates_one_notice_per_overdue_booking(reservation_service: ReservationService, overdue_service: OverdueService):
+    book(reservation_service, 1, laptop1, 2)
+    book(reservation_service, 2, laptop2, 1)
+    book(reservation_service, 3, camera, 5)
+    reservation_service.add(Reservation(id=4, type=camera.type, user=student, equipment=camera))
+    now = monday + timedelta(hours=3)
+    assert overdue_service.sweep(now, batch_size=1) == 2
+    assert overdue_service.sweep(now) == 0
+    assert [(notice.reservation_id, notice.due) for notice in overdue_service.notices(staff)] == [
+        (2, monday + timedelta(hours=1)), (1, monday + timedelta(hours=2))]
+
+    reservation_service.remove(2)
+    assert [notice.reservation_id for notice in overdue_service.notices(staff)] == [1]
+    with pytest.raises(UserPermissionError):
+        overdue_service.notices(student)
+
+
+def test_sweep_skips_while_another_worker_holds_the_lock(reservation_service: ReservationService, overdue_service: OverdueService, test_engine: Engine):
+    book(reservation_service, 1, laptop1, 2)
+    with test_engine.connect() as leader:
+        leader.execute(select(func.pg_advisory_xact_lock(_SWEEP_LOCK)))
+        assert overdue_service.sweep(monday + timedelta(days=1)) is None
+    assert overdue_service.sweep(monday + timedelta(days=1)) == 1
+
+
+def test_sweep_uses_due_index(test_session: Session):
+    test_session.execute(text('SET LOCAL enable_seqscan = off'))
+    plan = '\n'.join(test_session.scalars(text(
+        "EXPLAIN SELECT id FROM reservation WHERE during IS NOT NULL AND upper(during) <= now() ORDER BY upper(during)")))
+    assert 'ix_reservation_due' in plan
+
+
+def test_scheduler_runs_jobs_without_overlap():
+    running, overlapped, runs = threading.Lock(), [], []
+
+    def job():
+        if not running.acquire(blocking=False):
+            overlapped.append(True)
+            return 0
+        try:
+            runs.append(True)
+            threading.Event().wait(0.02)
+            return 2
+        finally:
+            running.release()
+
+    def failing():
+        raise RuntimeError('boom')
+
+    async def main():
+        scheduler = Scheduler()
+        scheduler.every(0.001, 'job', job)
+        scheduler.every(0.001, 'failing', failing)
+        scheduler.every(0.001, 'follower', lambda: None)
+        await scheduler.start()
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+        return {status.name: status for status in scheduler.status()}
+
+    status = asyncio.run(main())
+    assert overlapped == []
+    # A run still on its thread when the scheduler stops is not counted.
+    assert len(runs) - 1 <= status['job'].runs <= len(runs) and status['job'].runs > 1
+    assert status['job'].processed == 2 * status['job'].runs
+    assert status['failing'].failures > 1 and status['failing'].runs == 0
+    assert status['follower'].skipped > 1 and status['follower'].runs == 0
@@ -3,7 +3,8 @@ import pytest
 from sqlalchemy.orm import Session
 from ...models import User, Role, Permission
 from ...entities import UserEntity, RoleEntity, PermissionEntity
-from ...services import PermissionService
+from ...services import PermissionService, RoleService
+from ...services.permission import CompiledPermissions, compile_pattern
 
 # Mock Models
 root = User(id=1, pid=999999999, onyen='root', email='root@unc.edu')
@@ -115,3 +116,60 @@ def test_check_specific_permission(permission: PermissionService):
         p, 'checkin.create', 'checkin/12') is False
     assert permission._check_permission(
         p, 'permission.revoke', 'checkin.*') is False
+
+
+def test_check_is_cached(permission: PermissionService, query_budget):
+    assert permission.check(ambassador, 'checkin.create', 'checkin')
+    with query_budget(0):
+        assert permission.check(ambassador, 'checkin.create', 'checkin')
+        assert permission.check(ambassador, 'checkin.delete', 'checkin') is False
+        assert permission.get_permissions(ambassador) == [ambassador_permission]
+
+
+def test_role_membership_invalidates_cache(permission: PermissionService, test_session: Session):
+    role_service = RoleService(test_session, permission)
+    assert permission.check(user, 'checkin.create', 'checkin') is False
+    role_service.add(root, ambassador_role.id, user)
+    assert permission.check(user, 'checkin.create', 'checkin')
+    role_service.remove(root, ambassador_role.id, user.id)
+    assert permission.check(user, 'checkin.create', 'checkin') is False
+
+
+def test_compiled_permissions_prefix_lookup():
+    compiled = CompiledPermissions([
+        Permission(action='checkin.*', resource='checkin/*'),
+        Permission(action='user.search', resource='*'),
+    ])
+    assert compiled.allows('checkin.delete', 'checkin/1')
+    assert compiled.allows('user.search', 'user/1')
+    assert compiled.allows('user.searches', 'user/1') is False
+    assert compiled.allows('checkin.delete', 'user/1') is False
+    assert compiled.allows('c', 'checkin/1') is False
+
+
+def test_compile_pattern_escapes_metacharacters():
+    matches = compile_pattern('equipment/1.0')
+    assert matches('equipment/1.0')
+    assert matches('equipment/100') is False
+    assert compile_pattern('role/(*)')('role/(1)')
+    assert compile_pattern('role/(*)')('role/1') is False
+
+
+def test_compile_pattern_wildcards():
+    assert compile_pattern('*')('')
+    assert compile_pattern('**')('anything')
+    assert compile_pattern('checkin.*')('checkin.')
+    assert compile_pattern('checkin.*')('checkin') is False
+    assert compile_pattern('*.delete')('checkin.delete')
+    assert compile_pattern('a*a')('a') is False
+    assert compile_pattern('user/*/role/*')('user/1/role/2')
+    assert compile_pattern('user/*/role/*')('user/1/roles/2') is False
+
+
+def test_compile_pattern_is_shared_across_services(test_session: Session):
+    assert compile_pattern('checkin/*') is compile_pattern('checkin/*')
+    PermissionService(test_session).check(ambassador, 'checkin.create', 'checkin')
+    PermissionService(test_session).invalidate()
+    before = compile_pattern.cache_info().misses
+    assert PermissionService(test_session).check(ambassador, 'checkin.create', 'checkin')
+    assert compile_pattern.cache_info().misses == before
@@ -0,0 +1,60 @@
+import pytest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, text
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+from ...api import query_timing
+from ...database import track_queries
+from ...api.query_timing import QueryTimingMiddleware, route_query_stats
+
+
+@pytest.fixture()
+def client(test_engine: Engine, test_async_engine: AsyncEngine):
+    app = FastAPI()
+    app.add_middleware(QueryTimingMiddleware)
+
+    @app.get("/items/{count}")
+    def items(count: int):
+        with Session(test_engine) as session:
+            return [session.scalar(text('SELECT :i'), {'i': i}) for i in range(count)]
+
+    @app.get("/async")
+    async def async_items():
+        async with AsyncSession(test_async_engine) as session:
+            return [await session.scalar(text('SELECT 1')), await session.scalar(text('SELECT pg_sleep(0.01)::text'))]
+
+    query_timing._routes.clear()
+    yield TestClient(app)
+    query_timing._routes.clear()
+
+
+def test_server_timing_reports_each_request(client: TestClient):
+    assert client.get('/items/3').headers['server-timing'].startswith('db;dur=')
+    assert '"3 queries"' in client.get('/items/3').headers['server-timing']
+    assert '"0 queries"' in client.get('/items/0').headers['server-timing']
+    assert '"2 queries"' in client.get('/async').headers['server-timing']
+
+
+def test_totals_aggregate_per_route(client: TestClient):
+    for count in (1, 4, 2):
+        client.get(f'/items/{count}')
+    client.get('/async')
+    client.get('/missing')
+    stats = {stats.route: stats for stats in route_query_stats()}
+    assert set(stats) == {'GET /items/{count}', 'GET /async'}
+    assert (stats['GET /items/{count}'].requests, stats['GET /items/{count}'].queries, stats['GET /items/{count}'].max_queries) == (3, 7, 4)
+    assert 'pg_sleep' in stats['GET /async'].slowest_statement
+    assert route_query_stats()[0].route == 'GET /async'
+
+
+def test_failed_statements_leave_no_state_on_the_connection(test_engine: Engine):
+    with track_queries() as stats, Session(test_engine) as session:
+        with pytest.raises(ProgrammingError):
+            session.execute(text('SELECT missing FROM nowhere'))
+        session.rollback()
+        session.execute(text('SELECT 1'))
+        assert all('query_started' not in key for key in session.connection().info)
+    assert stats.count == 1
@@ -0,0 +1,78 @@
+import pytest
+
+from datetime import datetime, timezone
+from sqlalchemy import select, func, text
+from sqlalchemy.orm import Session
+from ...models import Equipment, Reservation
+from ...entities import ReservationEntity
+from ...services import ReservationService, ReservationHistoryService, UserPermissionError
+from ...services.reservation_history import _partition_name
+from ..conftest import staff, student
+
+# Mock data
+laptop = Equipment(id=1, name='Lenovo', type='laptop', status=1, notes='')
+camera = Equipment(id=2, name='Sony', type='camera', status=1, notes='')
+
+
+def month(number: int) -> datetime:
+    return datetime(2030, number, 15, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def setup(seed_reservations):
+    seed_reservations(laptop, camera)
+
+
+def archive_year(history_service: ReservationHistoryService, test_session: Session):
+    """Archive one reservation of each item by each user in every month of 2030."""
+    id = 0
+    for number in range(1, 13):
+        for user in (staff, student):
+            for equipment in (laptop, camera):
+                id += 1
+                reservation = Reservation(id=id, type=equipment.type, user=user, equipment=equipment)
+                history_service.archive(reservation, month(number))
+    test_session.commit()
+
+
+def test_remove_archives_reservation(reservation_service: ReservationService, history_service: ReservationHistoryService, test_session: Session):
+    reservation_service.add(Reservation(id=1, type=laptop.type, user=student, equipment=laptop.copy(), notes='for class'))
+    reservation_service.remove(1)
+    assert test_session.scalar(select(func.count()).select_from(ReservationEntity)) == 0
+    page = history_service.history(student, user_pid=student.pid)
+    assert [(record.id, record.equipment_id, record.notes) for record in page.items] == [(1, laptop.id, 'for class')]
+    name = _partition_name(page.items[0].completed_at.replace(day=1))
+    assert test_session.scalar(select(func.to_regclass(name))) is not None
+
+
+def test_history_filters_and_pages(history_service: ReservationHistoryService, test_session: Session):
+    archive_year(history_service, test_session)
+    spring = history_service.history(staff, user_pid=student.pid, since=month(1).replace(day=1), until=month(5).replace(day=1), limit=3)
+    assert [record.completed_at.month for record in spring.items] == [4, 4, 3]
+    spring = history_service.history(staff, user_pid=student.pid, since=month(1).replace(day=1), until=month(5).replace(day=1), cursor=spring.next_cursor, limit=10)
+    assert [record.completed_at.month for record in spring.items] == [3, 2, 2, 1, 1]
+    assert spring.next_cursor is None
+
+    camera_history = history_service.history(staff, equipment_id=camera.id)
+    assert len(camera_history.items) == 24
+    assert {record.equipment_id for record in camera_history.items} == {camera.id}
+
+
+def test_history_is_pruned_to_requested_months(history_service: ReservationHistoryService, test_session: Session):
+    archive_year(history_service, test_session)
+    plan = '\n'.join(test_session.scalars(text(
+        "EXPLAIN SELECT * FROM reservation_history WHERE user_id = 2 "
+        "AND completed_at >= '2030-03-01T00:00:00+00:00' AND completed_at < '2030-05-01T00:00:00+00:00'")))
+    scanned = {number for number in range(1, 13) if _partition_name(month(number).replace(day=1)) in plan}
+    assert scanned == {3, 4}
+
+
+def test_history_permissions(history_service: ReservationHistoryService, test_session: Session):
+    archive_year(history_service, test_session)
+    assert len(history_service.history(student, user_pid=student.pid).items) == 24
+    with pytest.raises(UserPermissionError):
+        history_service.history(student, user_pid=staff.pid)
+    with pytest.raises(UserPermissionError):
+        history_service.history(student, equipment_id=laptop.id)
+    with pytest.raises(ValueError):
+        history_service.history(staff, cursor='not-a-cursor')
@@ -1,9 +1,14 @@
+import orjson
 import pytest
 
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import text, select, func, Engine
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
-from ...models import Equipment, Reservation, User, Role, Permission
+from ...models import Equipment, Reservation, AllocationRequest, User, Role, Permission
 from ...entities import ReservationEntity, EquipmentEntity, UserEntity, PermissionEntity, RoleEntity
-from ...services import ReservationService, EquipmentService, PermissionService, UserPermissionError
+from ...services import ReservationService, EquipmentService, PermissionService, OccupancyService, ReservationHistoryService, UserPermissionError, EquipmentUnavailableError, InsufficientEquipmentError
 
 
 # mock data
@@ -78,10 +83,6 @@ def setup(test_session: Session):
     test_session.add_all([to_user_entity(userModel) for userModel in userModels])
     test_session.commit()
 
-@pytest.fixture(autouse=True)
-def reservation_service(test_session: Session):
-    return ReservationService(test_session, EquipmentService(test_session, PermissionService(test_session)), PermissionService(test_session))
-
 
 def test_get_by_id1(reservation_service: ReservationService):
     query_result = reservation_service.get(reservation1.id)
@@ -91,6 +92,13 @@ def test_get_by_id2(reservation_service: ReservationService):
     query_result = reservation_service.get(9999)
     assert (None == query_result) is True
 
+def test_get_many_issues_one_statement(reservation_service: ReservationService, query_budget):
+    with query_budget(1) as stats:
+        batch = reservation_service.get_many([reservation2.id, 9999, reservation1.id])
+    assert 'ANY' in stats.slowest
+    assert batch.items == [reservation2, reservation1]
+    assert batch.missing == [9999]
+
 def test_filter_type_valid_user(reservation_service: ReservationService):
     query_result = reservation_service.filter_type(reservation1.type, staff)
     assert ([reservation1] == query_result)
@@ -114,6 +122,45 @@ def test_list_valid_user(reservation_service: ReservationService):
     query_result = reservation_service.list()
     assert (reservationModels == query_result) is True
 
+def test_list_rows_match_models(reservation_service: ReservationService):
+    start = datetime(2030, 4, 1, 9, tzinfo=timezone.utc)
+    reservation_service.add(Reservation(id=3, type=camera.type, user=sol_student, equipment=camera, start=start, end=start + timedelta(hours=2)))
+    assert orjson.loads(orjson.dumps(reservation_service.list_rows())) == jsonable_encoder(reservation_service.list())
+
+def test_list_rows_selects_requested_fields(reservation_service: ReservationService, query_budget):
+    with query_budget(1) as stats:
+        rows = reservation_service.list_rows('id,equipment.id,start')
+    assert rows == [{'id': model.id, 'equipment': {'id': model.equipment.id}, 'start': model.start} for model in reservationModels]
+    assert ' JOIN "user"' not in stats.slowest and 'equipment.name' not in stats.slowest
+
+    [row, _] = reservation_service.list_rows('user,notes')
+    assert row == {'user': {**reservation1.user.dict(), 'permissions': []}, 'notes': reservation1.notes}
+    with pytest.raises(ValueError):
+        reservation_service.list_rows('id,user.password')
+
+def test_filtered_rows_select_requested_fields(reservation_service: ReservationService, query_budget):
+    with query_budget(1) as stats:
+        assert reservation_service.filter_user_rows(sol_student.pid, 'id,equipment.name') == [{'id': reservation2.id, 'equipment': {'name': keyboard.name}}]
+    assert ' JOIN "user"' not in stats.slowest
+    assert reservation_service.filter_type_rows('Monitor', staff, 'id,user.onyen') == [{'id': reservation1.id, 'user': {'onyen': root.onyen}}]
+    assert reservation_service.get_row(reservation2.id, 'id,type') == {'id': reservation2.id, 'type': keyboard.type}
+    assert reservation_service.get_row(9999, 'id') is None
+    with pytest.raises(UserPermissionError):
+        reservation_service.filter_type_rows('monitor', user, 'id')
+    with pytest.raises(ValueError):
+        reservation_service.get_row(reservation1.id, 'user.password')
+
+def test_list_compact_side_loads_users_and_equipment(reservation_service: ReservationService):
+    for id, equipment in enumerate([laptop1, laptop2, monitor2], start=3):
+        reservation_service.add(Reservation(id=id, type=equipment.type, user=sol_student, equipment=equipment.copy()))
+    listing = orjson.loads(orjson.dumps(reservation_service.list_compact()))
+    models = jsonable_encoder(reservation_service.list())
+    assert len(listing['users']) == len({model['user']['id'] for model in models}) < len(models)
+    for reservation in listing['reservations']:
+        reservation['user'] = listing['users'][str(reservation.pop('user_id'))]
+        reservation['equipment'] = listing['equipment'][str(reservation.pop('equipment_id'))]
+    assert listing['reservations'] == models
+
 # def test_list_invalid_user(reservation_service: ReservationService):
 #     try:
 #         reservation_service.list(user)
@@ -125,12 +172,165 @@ def test_list_valid_user(reservation_service: ReservationService):
 #         print(str(e))
 #         assert False
 
+def test_read_paths_stay_within_query_budget(reservation_service: ReservationService, test_session: Session, query_budget):
+    reservation_service.filter_type(laptop1.type, staff)  # Warm the permission cache
+    for id, equipment in enumerate([laptop1, laptop2, monitor2, camera], start=3):
+        test_session.add(ReservationEntity(id=id, type=equipment.type, user_id=merritt_manager.id, equipment_id=equipment.id))
+    test_session.commit()
+    test_session.expunge_all()
+    with query_budget(1):
+        assert len(reservation_service.list()) == 6
+    with query_budget(1):
+        assert len(reservation_service.filter_type(laptop1.type, staff)) == 2
+    with query_budget(1):
+        assert len(reservation_service.filter_user(merritt_manager.pid)) == 4
+    with query_budget(1):
+        reservation_service.get_many([3, 4, 5, 6])
+    with query_budget(1):
+        reservation_service.list_rows()
+    with query_budget(3):
+        reservation_service.list_compact()
+
 def test_add(reservation_service: ReservationService):
-    newReservation = Reservation(id=3, type=camera.type, user=merritt_manager, equipment=camera)
+    newReservation = Reservation(id=3, type=camera.type, user=merritt_manager, equipment=camera.copy())
     reservation_service.add(newReservation)
     query_result = reservation_service.get(newReservation.id)
     assert (newReservation == query_result) is True
 
+def test_add_unavailable(reservation_service: ReservationService):
+    reservation_service.add(Reservation(id=3, type=camera.type, user=merritt_manager, equipment=camera.copy()))
+    with pytest.raises(EquipmentUnavailableError):
+        reservation_service.add(Reservation(id=4, type=camera.type, user=sol_student, equipment=camera.copy()))
+    assert [reservation.id for reservation in reservation_service.list()] == [1, 2, 3]
+
+def test_concurrent_checkouts_claim_each_item_once(test_session: Session, test_engine: Engine):
+    items = [monitor2, camera, laptop1, laptop2]
+    test_session.execute(text('ALTER SEQUENCE reservation_id_seq RESTART WITH 100'))
+    test_session.commit()
+
+    def checkout(attempt: int) -> bool:
+        with Session(test_engine) as session:
+            service = ReservationService(session, EquipmentService(session, PermissionService(session)), PermissionService(session), OccupancyService(session, PermissionService(session)), ReservationHistoryService(session, PermissionService(session)))
+            equipment = items[attempt % len(items)].copy()
+            try:
+                service.add(Reservation(id=None, type=equipment.type, user=sol_student, equipment=equipment))
+                return True
+            except EquipmentUnavailableError:
+                return False
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(checkout, range(300)))
+
+    assert results.count(True) == len(items)
+    per_item = select(ReservationEntity.equipment_id, func.count()).group_by(ReservationEntity.equipment_id)
+    counts = dict(test_session.execute(per_item).all())
+    assert all(counts[item.id] == 1 for item in items)
+
+def test_allocate(reservation_service: ReservationService, test_session: Session):
+    test_session.execute(text('ALTER SEQUENCE reservation_id_seq RESTART WITH 3'))
+    reservations = reservation_service.allocate(AllocationRequest(type='laptop', notes='lab'), sol_student)
+    assert [(r.id, r.user, r.equipment.id, r.equipment.status, r.notes) for r in reservations] == [(3, sol_student, laptop1.id, 0, 'lab')]
+    reservations = reservation_service.allocate(AllocationRequest(type='Laptop'), sol_student)
+    assert [(r.type, r.equipment.id) for r in reservations] == [('laptop', laptop2.id)]
+    with pytest.raises(InsufficientEquipmentError):
+        reservation_service.allocate(AllocationRequest(type='laptop'), sol_student)
+
+def test_allocate_batch_requires_permission(reservation_service: ReservationService):
+    with pytest.raises(UserPermissionError):
+        reservation_service.allocate(AllocationRequest(type='monitor', count=2), sol_student)
+
+def test_allocate_batch_is_all_or_nothing(reservation_service: ReservationService, test_session: Session):
+    test_session.execute(text('ALTER SEQUENCE reservation_id_seq RESTART WITH 3'))
+    test_session.commit()
+    with pytest.raises(InsufficientEquipmentError):
+        reservation_service.allocate(AllocationRequest(type='laptop', count=3), staff)
+    available = select(func.count()).select_from(EquipmentEntity).where(EquipmentEntity.type == 'laptop', EquipmentEntity.status == 1)
+    assert test_session.scalar(available) == 2
+    reservations = reservation_service.allocate(AllocationRequest(type='laptop', count=2), staff)
+    assert [(r.user, r.equipment.id) for r in reservations] == [(staff, laptop1.id), (staff, laptop2.id)]
+
+def test_concurrent_allocations_skip_locked_items(test_session: Session, test_engine: Engine):
+    test_session.add_all([EquipmentEntity(id=id, name='Dell', type='projector', status=1, notes='') for id in range(10, 30)])
+    test_session.execute(text('ALTER SEQUENCE reservation_id_seq RESTART WITH 100'))
+    test_session.commit()
+
+    def allocate(attempt: int) -> int:
+        with Session(test_engine) as session:
+            service = ReservationService(session, EquipmentService(session, PermissionService(session)), PermissionService(session), OccupancyService(session, PermissionService(session)), ReservationHistoryService(session, PermissionService(session)))
+            try:
+                return len(service.allocate(AllocationRequest(type='projector'), sol_student))
+            except InsufficientEquipmentError:
+                return 0
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(allocate, range(60)))
+
+    assert sum(results) == 20
+    per_item = select(ReservationEntity.equipment_id, func.count()).where(ReservationEntity.type == 'projector').group_by(ReservationEntity.equipment_id)
+    assert sorted(dict(test_session.execute(per_item).all()).items()) == [(id, 1) for id in range(10, 30)]
+
+tuesday = datetime(2030, 4, 2, 14, tzinfo=timezone.utc)
+
+def book(equipment: Equipment, start: datetime, hours: int, user: User = sol_student, id: int | None = None) -> Reservation:
+    return Reservation(id=id, type=equipment.type, user=user, equipment=equipment.copy(), start=start, end=start + timedelta(hours=hours))
+
+def test_add_booking(reservation_service: ReservationService, test_session: Session):
+    booking = book(laptop1, tuesday, 2, id=3)
+    reservation_service.add(booking)
+    assert reservation_service.get(3) == booking
+    assert test_session.get(EquipmentEntity, laptop1.id).status == 1
+
+def test_overlapping_bookings_conflict(reservation_service: ReservationService):
+    reservation_service.add(book(laptop1, tuesday, 2, id=3))
+    with pytest.raises(EquipmentUnavailableError):
+        reservation_service.add(book(laptop1, tuesday + timedelta(hours=1), 2, id=4))
+    reservation_service.add(book(laptop1, tuesday + timedelta(hours=2), 1, id=4))
+    reservation_service.add(book(laptop2, tuesday, 2, id=5))
+    assert [reservation.id for reservation in reservation_service.list()] == [1, 2, 3, 4, 5]
+
+def test_checkouts_and_bookings_of_the_present_conflict(reservation_service: ReservationService, test_session: Session):
+    now = datetime.now(timezone.utc)
+    reservation_service.add(book(laptop1, now - timedelta(hours=1), 2, id=3))
+    with pytest.raises(EquipmentUnavailableError):
+        reservation_service.add(Reservation(id=4, type=laptop1.type, user=sol_student, equipment=laptop1.copy()))
+    assert test_session.get(EquipmentEntity, laptop1.id).status == 1
+
+    reservation_service.add(Reservation(id=4, type=laptop2.type, user=sol_student, equipment=laptop2.copy()))
+    with pytest.raises(EquipmentUnavailableError):
+        reservation_service.add(book(laptop2, now - timedelta(hours=1), 2, id=5))
+    reservation_service.add(book(laptop2, now + timedelta(hours=1), 2, id=5))
+    with pytest.raises(InsufficientEquipmentError):
+        reservation_service.allocate(AllocationRequest(type='laptop'), sol_student)
+
+def test_naive_booking_times_are_utc(reservation_service: ReservationService):
+    naive = tuesday.replace(tzinfo=None)
+    reservation_service.add(Reservation(id=3, type=laptop1.type, user=sol_student, equipment=laptop1.copy(), start=naive, end=naive + timedelta(hours=2)))
+    assert reservation_service.get(3).start == tuesday
+
+def test_booking_window_must_be_ordered():
+    with pytest.raises(ValueError):
+        book(laptop1, tuesday, 0)
+    with pytest.raises(ValueError):
+        Reservation(id=None, type='laptop', user=sol_student, equipment=laptop1, start=tuesday)
+
+def test_available_during_window(reservation_service: ReservationService, test_session: Session):
+    equipment_svc = EquipmentService(test_session, PermissionService(test_session))
+    reservation_service.add(book(laptop1, tuesday, 2, id=3))
+    assert equipment_svc.available('laptop', tuesday + timedelta(hours=1), tuesday + timedelta(hours=3)) == [laptop2]
+    assert equipment_svc.available('laptop', tuesday + timedelta(hours=2), tuesday + timedelta(hours=3)) == [laptop1, laptop2]
+    reservation_service.add(Reservation(id=4, type=laptop2.type, user=sol_student, equipment=laptop2.copy()))
+    now = datetime.now(timezone.utc)
+    assert equipment_svc.available('laptop', now, now + timedelta(hours=1)) == [laptop1]
+    assert equipment_svc.available('laptop', tuesday, tuesday + timedelta(hours=1)) == [laptop2.copy(update={'status': 0})]
+    with pytest.raises(ValueError):
+        equipment_svc.available('laptop', tuesday, tuesday)
+
+def test_remove_booking_leaves_equipment_status(reservation_service: ReservationService, test_session: Session):
+    reservation_service.add(Reservation(id=3, type=camera.type, user=merritt_manager, equipment=camera.copy()))
+    reservation_service.add(book(camera, tuesday, 2, id=4))
+    reservation_service.remove(4)
+    assert test_session.get(EquipmentEntity, camera.id).status == 0
+
 def test_remove(reservation_service: ReservationService):
     reservation_service.remove(reservation2.id)
     query_result = reservation_service.list()
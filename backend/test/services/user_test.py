@@ -0,0 +1,158 @@
+import time
+import orjson
+import pytest
+
+from sqlalchemy import text
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+from ...models import User, Role, Permission, PaginationParams
+from ...entities import UserEntity, RoleEntity, PermissionEntity
+from ...services import UserService, PermissionService, RoleService
+
+# Mock Models
+root = User(id=1, pid=999999999, onyen='root', first_name='Super', last_name='User', email='root@unc.edu')
+root_role = Role(id=1, name='root')
+
+users = [
+    User(id=2, pid=100000000, onyen='sol', first_name='Sol', last_name='Student', email='sol@unc.edu'),
+    User(id=3, pid=100000001, onyen='arden', first_name='Arden', last_name='Ambassador', email='arden@unc.edu'),
+    User(id=4, pid=100000002, onyen='merritt', first_name='Merritt', last_name='Manager', email='merritt@unc.edu'),
+    User(id=5, pid=100000003, onyen='sam', first_name='Sol', last_name='Sampson', email='sam@unc.edu'),
+    User(id=6, pid=100000004, onyen='jane', first_name='Jane', last_name='Doe', email='jane@unc.edu'),
+]
+
+
+@pytest.fixture(autouse=True)
+def setup_teardown(test_session: Session):
+    root_user_entity = UserEntity.from_model(root)
+    test_session.add(root_user_entity)
+    root_role_entity = RoleEntity.from_model(root_role)
+    root_role_entity.users.append(root_user_entity)
+    test_session.add(root_role_entity)
+    test_session.add(PermissionEntity(action='*', resource='*', role=root_role_entity))
+    test_session.add_all([UserEntity.from_model(user) for user in users])
+    test_session.execute(text(f'ALTER SEQUENCE user_id_seq RESTART WITH {len(users) + 2}'))
+    test_session.commit()
+    yield
+
+
+@pytest.fixture()
+def user_service(test_session: Session):
+    return UserService(test_session, PermissionService(test_session))
+
+
+def list_all(user_service: UserService, params: PaginationParams) -> list[User]:
+    items = []
+    while True:
+        page = user_service.list(root, params)
+        items += page.items
+        if page.next_cursor is None:
+            return items
+        params = params.copy(update={'cursor': page.next_cursor})
+
+
+def test_list_cursor_ties_broken_by_id(user_service: UserService):
+    params = PaginationParams(page_size=2, order_by='first_name')
+    expected = sorted([root, *users], key=lambda user: (user.first_name, user.id))
+    assert list_all(user_service, params) == expected
+
+
+def test_list_cursor_unique_column(user_service: UserService):
+    params = PaginationParams(page_size=4, order_by='onyen')
+    assert list_all(user_service, params) == sorted([root, *users], key=lambda user: user.onyen)
+
+
+def test_list_cursor_matches_offset(user_service: UserService):
+    offset_page = user_service.list(root, PaginationParams(page=1, page_size=2, order_by='last_name'))
+    first_page = user_service.list(root, PaginationParams(page_size=2, order_by='last_name'))
+    cursor_page = user_service.list(root, PaginationParams(
+        page_size=2, order_by='last_name', cursor=first_page.next_cursor))
+    assert cursor_page.items == offset_page.items
+
+
+def test_list_filter_count(user_service: UserService):
+    page = user_service.list(root, PaginationParams(page_size=1, order_by='first_name', filter='sol'))
+    assert page.length == 2
+    assert page.items == [users[0]]
+
+
+def test_list_count_refreshes_after_save(user_service: UserService):
+    assert user_service.list(root, PaginationParams(filter='sol')).length == 2
+    user_service.save(User(pid=100000005, onyen='solange', first_name='Solange', email='solange@unc.edu'))
+    assert user_service.list(root, PaginationParams(filter='sol')).length == 3
+
+
+def test_list_rows_match_models(user_service: UserService):
+    params = PaginationParams(page_size=3, order_by='last_name', filter='s')
+    assert orjson.loads(orjson.dumps(user_service.list_rows(root, params))) == jsonable_encoder(user_service.list(root, params))
+
+
+def test_list_rejects_unindexed_order(user_service: UserService):
+    with pytest.raises(ValueError):
+        user_service.list(root, PaginationParams(order_by='pronouns'))
+    with pytest.raises(ValueError):
+        user_service.list(root, PaginationParams(order_by='__class__'))
+
+
+def test_search_multiple_words(user_service: UserService):
+    assert user_service.search(root, 'jane doe') == [users[4]]
+    assert user_service.search(root, 'Do, Ja') == [users[4]]
+
+
+def test_search_prefix_of_any_field(user_service: UserService):
+    assert user_service.search(root, 'merr') == [users[2]]
+    assert user_service.search(root, 'ambass') == [users[1]]
+    assert user_service.search(root, 'arden@unc') == [users[1]]
+
+
+def test_search_ranks_closer_matches_first(user_service: UserService):
+    assert user_service.search(root, 'sol') == [users[0], users[3]]
+
+
+def test_search_without_words(user_service: UserService):
+    assert user_service.search(root, '  %_ ') == []
+
+
+def test_authenticate_caches_users_by_token(user_service: UserService, query_budget):
+    verified = []
+    def claims(token: str) -> dict:
+        verified.append(token)
+        return {'pid': int(token), 'exp': time.time() + 3600}
+
+    assert user_service.authenticate(str(root.pid), claims).permissions == [Permission(id=1, action='*', resource='*')]
+    with query_budget(1) as stats:
+        user = user_service.authenticate(str(root.pid), claims)
+        assert user_service.authenticate(str(users[0].pid), claims, permissions=False) == users[0]
+    assert user == root.copy(update={'permissions': [Permission(id=1, action='*', resource='*')]})
+    assert verified == [str(root.pid), str(users[0].pid)]
+    assert stats.count == 1
+    assert user_service.authenticate('123', lambda token: {'pid': 123}) is None
+
+
+def test_authenticate_respects_token_expiry(user_service: UserService):
+    expires_at = time.time() + 0.05
+    claims = lambda token: {'pid': root.pid, 'exp': expires_at}
+    user_service.authenticate('token', claims)
+    assert user_service.authenticate('token', lambda token: pytest.fail('verified a cached token')) is not None
+    time.sleep(0.1)
+    with pytest.raises(RuntimeError):
+        user_service.authenticate('token', lambda token: (_ for _ in ()).throw(RuntimeError('expired')))
+
+
+def test_authenticate_invalidated_by_profile_and_permission_changes(user_service: UserService, test_session: Session):
+    claims = lambda token: {'pid': users[0].pid}
+    sol = user_service.authenticate('token', claims)
+    assert sol.permissions == []
+
+    user_service.save(sol.copy(update={'pronouns': 'they / them'}))
+    assert user_service.authenticate('token', claims).pronouns == 'they / them'
+
+    RoleService(test_session, PermissionService(test_session)).add(root, root_role.id, users[0])
+    assert user_service.authenticate('token', claims).permissions == [Permission(id=1, action='*', resource='*')]
+
+
+def test_get_many_by_pid(user_service: UserService):
+    sol, jane = users[0], users[4]
+    batch = user_service.get_many([jane.pid, 123, sol.pid])
+    assert batch.items == [jane, sol]
+    assert batch.missing == [123]
@@ -5,4 +5,9 @@ export interface Equipment {
     status: number
     notes: string
     
-}
\ No newline at end of file
+}
+
+export interface EquipmentStatusChange {
+    id: number
+    status: number
+}
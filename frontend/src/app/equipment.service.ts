@@ -1,7 +1,7 @@
-import { Injectable, ɵsetCurrentInjector } from '@angular/core';
+import { Injectable, NgZone, ɵsetCurrentInjector } from '@angular/core';
 import { HttpClient } from '@angular/common/http';
 import { Observable, throwError, map, tap, pipe, OperatorFunction, Subscriber, from } from 'rxjs';
-import { Equipment } from './Equipment'
+import { Equipment, EquipmentStatusChange } from './Equipment'
 
 
 @Injectable({
@@ -9,7 +9,22 @@ import { Equipment } from './Equipment'
   })
 
 export class EquipmentService{
-    constructor(private http: HttpClient) {}
+    constructor(private http: HttpClient, private zone: NgZone) {}
+
+    /* Emits a status change each time an equipment is checked out or returned, and null when the
+       list must be reloaded. The browser reconnects the stream automatically if it drops. */
+    statusChanges(): Observable<EquipmentStatusChange | null> {
+        return new Observable((subscriber: Subscriber<EquipmentStatusChange | null>) => {
+            let source = new EventSource("/api/equipment/stream");
+            source.addEventListener("status", (event) => {
+                this.zone.run(() => subscriber.next(JSON.parse((event as MessageEvent).data)));
+            });
+            source.addEventListener("resync", () => {
+                this.zone.run(() => subscriber.next(null));
+            });
+            return () => source.close();
+        });
+    }
     
     sortByAvailable() {
         return this.http.get<Equipment[]>("/api/equipment/status/?status=1");
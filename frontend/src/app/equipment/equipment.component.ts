@@ -1,8 +1,8 @@
-import { Component } from '@angular/core';
+import { Component, OnDestroy } from '@angular/core';
 import { MatTable } from '@angular/material/table'
-import { Equipment } from '../Equipment';
+import { Equipment, EquipmentStatusChange } from '../Equipment';
 import { EquipmentService } from '../equipment.service';
-import { Observable } from 'rxjs';
+import { Observable, Subscription } from 'rxjs';
 import { Router } from '@angular/router';
 import { UpdateEquipmentFormService } from '../update-equipment-form.service';
 import { ReservationService } from '../reservation.service';
@@ -20,12 +20,13 @@ import { MatSlideToggleChange } from '@angular/material/slide-toggle'
   templateUrl: './equipment.component.html',
   styleUrls: ['./equipment.component.css']
 })
-export class EquipmentComponent {
+export class EquipmentComponent implements OnDestroy {
   columnsToDisplay = ['name', 'type', 'status', 'notes', 'reserve_button', 'edit_button', 'delete_button'];
   equipmentList: Equipment[] = [];
   canEditEquipment: boolean = false;
   canDeleteEquipment: boolean = false;
   filterByStatus: boolean = false;
+  statusChanges: Subscription;
 
   constructor(
     private equipmentService: EquipmentService,
@@ -37,6 +38,7 @@ export class EquipmentComponent {
     private snackBar: MatSnackBar
   ) {
     this.updateList();
+    this.statusChanges = this.equipmentService.statusChanges().subscribe((change: EquipmentStatusChange | null) => this.applyStatusChange(change));
     this.permissionService.check("equipment.update", "*").subscribe((perm: boolean) => {this.canEditEquipment = perm});
     this.permissionService.check("equipment.delete", "*").subscribe((perm: boolean) => {this.canDeleteEquipment = perm});
   }
@@ -48,6 +50,25 @@ export class EquipmentComponent {
       this.equipmentService.listEquipment().subscribe((data: Equipment[]) => {this.equipmentList = data});
   }
 
+  ngOnDestroy() {
+    this.statusChanges.unsubscribe();
+  }
+
+  applyStatusChange(change: EquipmentStatusChange | null) {
+    if (change == null) {
+      this.updateList();
+      return;
+    }
+    let { id, status } = change;
+    let listed = this.equipmentList.some((equipment) => equipment.id == id);
+    if (this.filterByStatus && status == 0)
+      this.equipmentList = this.equipmentList.filter((equipment) => equipment.id != id);
+    else if (listed && !this.filterByStatus)
+      this.equipmentList = this.equipmentList.map((equipment) => equipment.id == id ? {...equipment, status: status} : equipment);
+    else if (!listed)
+      this.updateList();
+  }
+
   editEquipment(equipment: Equipment): void {
     this.editEquipmentFormService.setEquipment(equipment);
     this.router.navigate(['/equipment/edit']);